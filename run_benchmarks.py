@@ -0,0 +1,114 @@
+import argparse
+import json
+from typing import Any, Dict, Tuple
+
+from virus_model.benchmark import *
+from virus_model.util import write_atomically
+
+
+def parse_layout(layout: str) -> Tuple[int, int]:
+    """
+    Parses a layout specification of the form 'CxS', where C is the number of lecture rooms and S their size.
+
+    :param layout: The layout specification.
+    :return: The number of rooms and the size of the rooms.
+    """
+    try:
+        room_count, room_size = (int(value) for value in layout.split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("Invalid layout \"{}\"! Please use the format 'CxS', e.g. '10x15'."
+                                         .format(layout))
+    return room_count, room_size
+
+
+def format_time(seconds: float) -> str:
+    """
+    Formats a duration using a unit that fits its magnitude.
+
+    :param seconds: The duration in seconds.
+    :return: The formatted duration.
+    """
+    for unit, factor in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= factor:
+            return "{:.3f} {}".format(seconds / factor, unit)
+    return "{:.3f} ns".format(seconds / 1e-9)
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    """
+    Prints the result of a single benchmark.
+
+    :param result: The result of the benchmark. See `run_benchmarks`.
+    """
+    print("{:<20} agents: {:>6} layout: {:>2}x{:<3} median: {:>12} min: {:>12}".format(
+        result["benchmark"], "-" if result["num_agents"] is None else result["num_agents"], result["room_count"],
+        result["room_size"], format_time(result["median"]), format_time(result["min"])))
+
+
+def main(raw_args=None):
+    parser = argparse.ArgumentParser(
+        description='Times the hot paths of the simulation and compares them to a baseline. See '
+                    'virus_model/benchmark.py.')
+    parser.add_argument('--benchmarks', type=str, nargs='+', choices=[benchmark.name for benchmark in BENCHMARKS],
+                        default=[benchmark.name for benchmark in BENCHMARKS],
+                        help="The benchmarks to run. Defaults to all of them.")
+    parser.add_argument('--agents', type=int, nargs='+', default=list(DEFAULT_AGENT_COUNTS),
+                        help="The numbers of agents to run the benchmarks with.")
+    parser.add_argument('--layouts', type=parse_layout, nargs='+', default=list(DEFAULT_LAYOUTS),
+                        help="The layouts to run the benchmarks with, as 'CxS' with C the number of lecture rooms and "
+                             "S their size.")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="The number of times every benchmark is timed. The median time is used for comparisons.")
+    parser.add_argument('--output', type=str, default=None,
+                        help="The JSON file to write the results to.")
+    parser.add_argument('--baseline', type=str, default=None,
+                        help="A JSON file with the results of an earlier run to compare the results to. Benchmarks "
+                             "that are slower than the baseline by more than the threshold are reported as "
+                             "regressions and make this script fail.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="The maximum relative slowdown compared to the baseline, e.g. 0.25 for 25%%.")
+
+    args = parser.parse_args(raw_args)
+
+    if args.repeat < 1:
+        raise ValueError("The number of repeats must be at least 1, but got {}!".format(args.repeat))
+
+    # Read the baseline first, so an invalid baseline is reported before spending any time on the benchmarks.
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as baseline_file:
+            baseline = json.load(baseline_file)
+
+    benchmarks = [benchmark for benchmark in BENCHMARKS if benchmark.name in args.benchmarks]
+    results = run_benchmarks(benchmarks, args.agents, args.layouts, args.repeat, progress=print_result)
+
+    if args.output is not None:
+        def write_results(file_name: str) -> None:
+            with open(file_name, "w") as file:
+                json.dump(results, file, indent=2)
+
+        write_atomically(args.output, write_results)
+
+    if baseline is None:
+        return
+
+    if baseline.get("environment") != results["environment"]:
+        print("Warning: the baseline was created in a different environment, so the times may not be comparable!")
+
+    comparisons = compare_results(results, baseline, args.threshold)
+    print("\nCompared to the baseline \"{}\":".format(args.baseline))
+    for comparison in comparisons:
+        name, num_agents, room_count, room_size = comparison["key"]
+        print("{:<20} agents: {:>6} layout: {:>2}x{:<3} baseline: {:>12} median: {:>12} change: {:>+7.1%}{}".format(
+            name, "-" if num_agents is None else num_agents, room_count, room_size,
+            format_time(comparison["baseline"]), format_time(comparison["median"]), comparison["ratio"] - 1,
+            "  REGRESSION" if comparison["regression"] else ""))
+
+    regressions = sum(comparison["regression"] for comparison in comparisons)
+    if regressions > 0:
+        raise SystemExit("{} out of {} benchmarks are more than {:.0%} slower than the baseline!"
+                         .format(regressions, len(comparisons), args.threshold))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,27 +1,169 @@
 import argparse
+import itertools
 import os
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import run_model_noviz
 from virus_model.noviz import run_csv_generator
+from virus_model.noviz.result_cache import DEFAULT_CACHE_SIZE
+from virus_model.noviz.sweep import Sweep
 
-parser = argparse.ArgumentParser(
-    description='Runs multiple experiments using different configurations and generates a CSV file.')
-parser.add_argument('input_file', type=str, help="The file containing a set of experiment specifications.")
+DEFAULT_CACHE_DIRECTORY = ".result_cache"
+"""
+The default directory of the result cache. See `virus_model.noviz.result_cache`.
+"""
 
-args = parser.parse_args()
 
-input_file = args.input_file
-if not os.path.exists(input_file):
-    raise FileNotFoundError("Path does not exist: \"{}\"!".format(input_file))
+def read_experiments(input_file: str) -> Iterator[str]:
+    """
+    Reads the experiment specifications from a file. Empty lines and lines starting with '#' are ignored.
 
-if not os.path.isfile(input_file):
-    raise NotADirectoryError("Path is not a file: \"{}\"!".format(input_file))
+    :param input_file: The file containing a set of experiment specifications.
+    :return: The experiment specifications, one per line.
+    """
+    with open(input_file, 'r') as file:
+        for line in file:
+            if line.strip() and not line.startswith("#"):
+                yield line.strip()
 
-with open(input_file, 'r') as file:
-    for line in file.readlines():
-        if not line.strip() or line.startswith("#"):
-            continue
-        print(line)
-        run_model_noviz.main(line.split())
 
-run_csv_generator.main(["."])
+def parse_shard(shard: str) -> Tuple[int, int]:
+    """
+    Parses a shard specification of the form 'i/n', where 0 <= i < n.
+
+    :param shard: The shard specification.
+    :return: The index of the shard and the total number of shards.
+    """
+    try:
+        index, count = (int(value) for value in shard.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("Invalid shard \"{}\"! Please use the format 'i/n'.".format(shard))
+
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError("Invalid shard \"{}\"! The index must be at least 0 and less than {}."
+                                         .format(shard, count))
+    return index, count
+
+
+def run_experiment(experiment: str, extra_args: List[str]) -> Optional[str]:
+    """
+    Runs a single experiment. Any errors are caught, so that a failing experiment doesn't affect the other ones.
+
+    :param experiment: The specification of the experiment. See `run_model_noviz.main`.
+    :param extra_args: Additional arguments for `run_model_noviz.main`.
+    :return: The error that occurred while running the experiment, or None if it finished successfully.
+    """
+    print(experiment)
+    try:
+        run_model_noviz.main(extra_args + experiment.split())
+    except (Exception, SystemExit):
+        return traceback.format_exc()
+    return None
+
+
+def run_experiments(experiments: Iterator[str], jobs: int,
+                    extra_args: List[str]) -> Tuple[int, List[Tuple[str, str]]]:
+    """
+    Runs all the given experiments.
+
+    :param experiments: The specifications of the experiments to run.
+    :param jobs: The number of experiments to run in parallel. When 1, they are run in the current process.
+    :param extra_args: Additional arguments for `run_model_noviz.main` for every experiment. Arguments specified by
+    the experiment itself take precedence.
+    :return: The number of experiments that were run and the specification and error of every failed experiment.
+    """
+    count = 0
+    failed: List[Tuple[str, str]] = []
+    if jobs == 1:
+        for experiment in experiments:
+            count += 1
+            error = run_experiment(experiment, extra_args)
+            if error is not None:
+                failed.append((experiment, error))
+        return count, failed
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending: Dict[Future, str] = {}
+        while True:
+            # Only submit a few experiments more than can run at once, so large sweeps aren't expanded up front.
+            for experiment in itertools.islice(experiments, 2 * jobs - len(pending)):
+                count += 1
+                pending[executor.submit(run_experiment, experiment, extra_args)] = experiment
+            if len(pending) == 0:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                experiment = pending.pop(future)
+                try:
+                    error = future.result()
+                except Exception:
+                    # The worker process itself failed (e.g. it was killed), so the experiment couldn't report it.
+                    error = traceback.format_exc()
+                if error is not None:
+                    failed.append((experiment, error))
+    return count, failed
+
+
+def main(raw_args=None):
+    parser = argparse.ArgumentParser(
+        description='Runs multiple experiments using different configurations and generates a CSV file.')
+    parser.add_argument('input_file', type=str,
+                        help="The file containing a set of experiment specifications. This is either a text file with "
+                             "one experiment per line or a JSON file (*.json) describing a sweep (see "
+                             "virus_model/noviz/sweep.py).")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="The number of experiments to run in parallel, each in its own process. Defaults to 1, "
+                             "which runs all the experiments one after another in the current process.")
+    parser.add_argument('--shard', type=parse_shard, default=(0, 1),
+                        help="Only run part of the experiments, so they can be split over multiple machines. Use 'i/n' "
+                             "to run every n-th experiment, starting at experiment i (with 0 <= i < n).")
+    parser.add_argument('--cache', type=str, default=DEFAULT_CACHE_DIRECTORY,
+                        help="The directory of the result cache. Experiments that were run before with the exact same "
+                             "settings (including the seed) and the same version of the model reuse their results "
+                             "instead of running the simulation again. Defaults to '{}'."
+                             .format(DEFAULT_CACHE_DIRECTORY))
+    parser.add_argument('--cache-size', type=int, dest='cache_size', default=DEFAULT_CACHE_SIZE,
+                        help="The maximum size of the result cache in megabytes.")
+    parser.add_argument('--no-cache', dest='no_cache', action='store_true',
+                        help="Always run the simulations, without reading from or writing to the result cache.")
+
+    args = parser.parse_args(raw_args)
+
+    input_file = args.input_file
+    if not os.path.exists(input_file):
+        raise FileNotFoundError("Path does not exist: \"{}\"!".format(input_file))
+
+    if not os.path.isfile(input_file):
+        raise NotADirectoryError("Path is not a file: \"{}\"!".format(input_file))
+
+    if args.jobs < 1:
+        raise ValueError("The number of jobs must be at least 1, but got {}!".format(args.jobs))
+
+    if input_file.endswith(".json"):
+        experiments = iter(Sweep.load(input_file))
+    else:
+        experiments = read_experiments(input_file)
+
+    # Arguments later on the commandline take precedence, so put these before the arguments of the experiments.
+    extra_args = [] if args.no_cache else ['--cache', args.cache, '--cache-size', str(args.cache_size)]
+
+    shard_index, shard_count = args.shard
+    count, failed = run_experiments(itertools.islice(experiments, shard_index, None, shard_count), args.jobs,
+                                    extra_args)
+
+    for experiment, error in failed:
+        print("Experiment failed: {}\n{}".format(experiment, error))
+
+    # Only generate the CSV file once all experiments have finished.
+    if len(failed) < count:
+        run_csv_generator.main(["."])
+
+    if len(failed) > 0:
+        raise SystemExit("{} out of {} experiments failed!".format(len(failed), count))
+
+
+if __name__ == '__main__':
+    main()
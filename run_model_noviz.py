@@ -1,8 +1,32 @@
 import argparse
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
 
+from virus_model.batched_model import aggregate_replicates
 from virus_model.model import *
-from virus_model.noviz.constants import MODEL_DATA_PATH
+from virus_model.noviz.constants import MODEL_DATA_PATH, LEGACY_MODEL_DATA_PATH, STREAM_DATA_PATH, \
+    AGGREGATE_DATA_SUFFIX, PROFILE_PATH, PROFILE_TRACE_PATH, WORK_COUNTERS_PATH
+from virus_model.noviz.model_data import ModelData
+from virus_model.noviz.result_cache import ResultCache, get_cache_key, get_code_version, DEFAULT_CACHE_SIZE
 from virus_model.noviz.visualize import Visualizer
+from virus_model.profiler import PhaseProfiler
+from virus_model.snapshot import FORKABLE_PARAMETERS, fork_model, write_snapshot
+from virus_model.streaming_collector import StreamingDataCollector
+from virus_model.util import write_atomically
+from virus_model.vectorized_model import VectorizedVirusModel
+from virus_model.work_counters import WorkCounters
+
+ENGINES = {'object': VirusModel, 'vectorized': VectorizedVirusModel}
+"""
+The model implementations that can be selected using the '--engine' argument.
+"""
+
+FORKED_ARGUMENTS = {'choice_of_measure': 'mitigation', 'participation_tracing': 'participationTracing',
+                    'daily_testing_chance': 'testChance', 'spread_chance': 'spreadChance'}
+"""
+The commandline argument of every parameter in `FORKABLE_PARAMETERS`. These are the only model parameters that are
+used by a run that continues from a snapshot; the others are those of the snapshot.
+"""
 
 
 def main(raw_args=None):
@@ -44,6 +68,51 @@ def main(raw_args=None):
                                                                      "numerical value. Not providing a seed means random "
                                                                      "values will be used.",
                         default=DEFAULT_RANDOM_SEED)
+    parser.add_argument('--engine', type=str, choices=list(ENGINES.keys()), default='object',
+                        help="The simulation engine to use. 'object' steps every agent individually (reference "
+                             "implementation), 'vectorized' advances all agents at once using NumPy arrays.")
+    parser.add_argument('--cache', type=str, default=None,
+                        help="The directory of the result cache. When an experiment with the exact same settings "
+                             "(including the seed) and the same version of the model was run before, its result is "
+                             "reused instead of running the simulation again. Requires a random seed.")
+    parser.add_argument('--cache-size', type=int, dest='cache_size', default=DEFAULT_CACHE_SIZE,
+                        help="The maximum size of the result cache in megabytes. When the cache grows larger, the "
+                             "least recently used results are removed.")
+    parser.add_argument('--chunk-size', type=int, dest='chunk_size', default=DEFAULT_CHUNK_SIZE,
+                        help="The number of steps whose data is buffered in memory before it is written to '{}' in "
+                             "the output directory. That file is replaced by '{}' once the run has finished."
+                             .format(STREAM_DATA_PATH, MODEL_DATA_PATH))
+    parser.add_argument('--save-snapshot', type=str, dest='save_snapshot', default=None,
+                        help="The file to write a snapshot of the complete state of the model to, so other runs can "
+                             "continue from it using '--from-snapshot'. See virus_model/snapshot.py.")
+    parser.add_argument('--snapshot-step', type=int, dest='snapshot_step', default=None,
+                        help="The number of steps after which the snapshot is taken. Defaults to the end of the run.")
+    parser.add_argument('--from-snapshot', type=str, dest='from_snapshot', default=None,
+                        help="Continue from a snapshot instead of starting a new run, until a total of stepCount steps "
+                             "has been simulated. Only the mitigation parameters ({}) of this run are applied to the "
+                             "restored model; all other parameters are those of the snapshot. When a random seed is "
+                             "given, the random generators are reseeded with it."
+                             .format(", ".join(FORKABLE_PARAMETERS)))
+    parser.add_argument('--replicates', type=int, default=1,
+                        help="The number of replicates to run at once, using the random seeds 'seed', 'seed + 1', "
+                             "etc. Replicate r is written to the directory '{output}_r'. See "
+                             "virus_model/vectorized_model.py. Requires '--engine vectorized'.")
+    parser.add_argument('--aggregate', action='store_true',
+                        help="When running multiple replicates, also write the mean and quantiles of every column at "
+                             "every step over all the replicates to the file '{{output}}{}'."
+                             .format(AGGREGATE_DATA_SUFFIX))
+    parser.add_argument('--profile', action='store_true',
+                        help="Measure the time spent in every phase of the steps (e.g. movement, transmission or data "
+                             "collection) and write a summary to '{}' in the output directory. See "
+                             "virus_model/profiler.py.".format(PROFILE_PATH))
+    parser.add_argument('--profile-trace', dest='profile_trace', action='store_true',
+                        help="Like '--profile', but also write the time of every phase on every simulated day to '{}' "
+                             "in the output directory.".format(PROFILE_TRACE_PATH))
+    parser.add_argument('--work-counters', dest='work_counters', action='store_true',
+                        help="Count the work done in every step (e.g. the pairs of agents compared, the line-of-sight "
+                             "checks and the random values drawn from every stream) and write the counts of every "
+                             "step to '{}' in the output directory. See virus_model/work_counters.py."
+                        .format(WORK_COUNTERS_PATH))
 
     args = parser.parse_args(raw_args)
 
@@ -52,61 +121,336 @@ def main(raw_args=None):
     if args.stepCount < minimum_step_count:
         raise ValueError("Please select at least {} steps.".format(minimum_step_count))
 
+    if args.snapshot_step is not None and not 0 <= args.snapshot_step <= args.stepCount:
+        raise ValueError("The snapshot step must be between 0 and {}!".format(args.stepCount))
+
+    if args.replicates < 1:
+        raise ValueError("The number of replicates must be at least 1, but got {}!".format(args.replicates))
+
+    if args.replicates > 1:
+        run_replicates(args)
+        return
+
     directory = args.output.rstrip(os.sep)
+    _, stream_data_path = prepare_directory(directory, args, args.seed)
+    run_settings = get_run_settings(args, args.seed)
+
+    cache = None
+    cache_key = None
+    if uses_cache(args):
+        cache = ResultCache(args.cache, args.cache_size)
+        cache_key = get_cache_key(run_settings, get_code_version())
+
+    if cache is None or not reuse_cached_result(directory, cache, cache_key):
+        if args.from_snapshot is not None:
+            with open(args.from_snapshot, 'rb') as snapshot:
+                model = fork_model(snapshot.read(), stream_data_path, args.seed,
+                                   **{parameter: getattr(args, argument)
+                                      for parameter, argument in FORKED_ARGUMENTS.items()})
+            if not isinstance(model.datacollector, StreamingDataCollector):
+                raise ValueError("Snapshot \"{}\" was not created by this script!".format(args.from_snapshot))
+            first_step = model.datacollector.get_step_count()
+        else:
+            model = ENGINES[args.engine](args.num_agents, DEFAULT_GRID_WIDTH, DEFAULT_GRID_HEIGHT,
+                                         args.baseInfection, args.spreadDistance, args.spreadChance, args.testChance,
+                                         args.mitigation, args.testDelay, args.participationTracing,
+                                         args.lastContactDays, args.distanceTracking, args.seed, None, None,
+                                         args.room_count, args.room_size, args.break_room_size, stream_data_path,
+                                         args.chunk_size)
+            first_step = 0
+        model.profiler = PhaseProfiler() if args.profile or args.profile_trace else None
+        model.set_counters(WorkCounters(first_step) if args.work_counters else None)
+
+        snapshot_step = args.stepCount if args.snapshot_step is None else args.snapshot_step
+        for step in range(first_step, args.stepCount):
+            if args.save_snapshot is not None and step == snapshot_step:
+                write_snapshot(model, args.save_snapshot)
+            # Once the epidemic has died out, every remaining step would collect exactly the same values, so they are
+            # filled in at once instead. The model is still needed for a snapshot that's taken later on, however.
+            if model.has_died_out() and (args.save_snapshot is None or step >= snapshot_step):
+                print("The epidemic has died out after {} steps, skipping the remaining {} steps."
+                      .format(step, args.stepCount - step))
+                model.collect_repeated(args.stepCount - step)
+                break
+            model.step()
+        if args.save_snapshot is not None and snapshot_step == args.stepCount:
+            write_snapshot(model, args.save_snapshot)
+
+        model.datacollector.flush()
+        finish_run(directory, run_settings, cache, cache_key)
+        if model.profiler is not None:
+            write_profile(model.profiler, directory + os.sep + PROFILE_PATH,
+                          directory + os.sep + PROFILE_TRACE_PATH if args.profile_trace else None)
+        if model.counters is not None:
+            print(model.counters.format_summary())
+            write_atomically(directory + os.sep + WORK_COUNTERS_PATH, model.counters.write_csv)
+
+    if args.show or args.write:
+        visualize(directory, args)
+
+
+def prepare_directory(directory: str, args: argparse.Namespace, seed: Optional[int]) -> Tuple[str, str]:
+    """
+    Prepares the output directory of a run. This removes the data of any previous run and writes the settings.
+
+    :param directory: The output directory of the run.
+    :param args: The parsed commandline arguments.
+    :param seed: The random seed of the run.
+    :return: The path of the model data and the path of the streamed data in the directory.
+    """
     os.makedirs(directory, exist_ok=True)
 
-    settings_file = directory + os.sep + "settings.txt"
-    file = open(settings_file, "w+")
-    file.write("Running with settings: \n"
-               "Output dir: {}\n"
-               "Num agents: {}\n"
-               "Mitigation: {}\n"
-               "Base infection: {}\n"
-               "Spread chance: {}\n"
-               "Spread distance: {}\n"
-               "Daily test chance: {}\n"
-               "Number of steps: {}\n"
-               "Test delay: {}\n"
-               "Participation Contact Tracing: {}\n"
-               "Days of Tracing Contacts: {}\n"
-               "Distance of Contact Tracing: {}\n"
-               "Seed: {}\n"
-               "Room Size: {}\n"
-               "Room Count: {}\n"
-               "Break Room Size: {}\n"
-               .format(directory,
-                       args.num_agents,
-                       args.mitigation,
-                       args.baseInfection,
-                       args.spreadChance,
-                       args.spreadDistance,
-                       args.testChance,
-                       args.stepCount,
-                       args.testDelay,
-                       args.participationTracing,
-                       args.lastContactDays,
-                       args.distanceTracking,
-                       args.seed,
-                       args.room_size,
-                       args.room_count,
-                       args.break_room_size))
-
-    file.close()
-
-    model = VirusModel(args.num_agents, DEFAULT_GRID_WIDTH, DEFAULT_GRID_HEIGHT, args.baseInfection,
-                       args.spreadDistance, args.spreadChance, args.testChance, args.mitigation, args.testDelay,
-                       args.participationTracing, args.lastContactDays, args.distanceTracking, args.seed,
-                       None, None, args.room_count, args.room_size, args.break_room_size)
-
-    for step in range(0, args.stepCount):
-        model.step()
-
-    df = model.datacollector.get_model_vars_dataframe()
+    # Remove the data of any previous run, so a failed run doesn't leave outdated results behind.
     model_data_path = directory + os.sep + MODEL_DATA_PATH
-    df.to_pickle(model_data_path)
+    stream_data_path = directory + os.sep + STREAM_DATA_PATH
+    for path in (model_data_path, directory + os.sep + LEGACY_MODEL_DATA_PATH, stream_data_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    if args.from_snapshot is not None:
+        # All the other parameters are restored from the snapshot, so the arguments don't reflect them.
+        settings = ("Running with settings: \n"
+                    "Output dir: {}\n"
+                    "Mitigation: {}\n"
+                    "Spread chance: {}\n"
+                    "Daily test chance: {}\n"
+                    "Number of steps: {}\n"
+                    "Participation Contact Tracing: {}\n"
+                    "Seed: {}\n"
+                    "From snapshot: {}\n"
+                    .format(directory,
+                            args.mitigation,
+                            args.spreadChance,
+                            args.testChance,
+                            args.stepCount,
+                            args.participationTracing,
+                            seed,
+                            args.from_snapshot))
+    else:
+        settings = ("Running with settings: \n"
+                    "Output dir: {}\n"
+                    "Num agents: {}\n"
+                    "Mitigation: {}\n"
+                    "Base infection: {}\n"
+                    "Spread chance: {}\n"
+                    "Spread distance: {}\n"
+                    "Daily test chance: {}\n"
+                    "Number of steps: {}\n"
+                    "Test delay: {}\n"
+                    "Participation Contact Tracing: {}\n"
+                    "Days of Tracing Contacts: {}\n"
+                    "Distance of Contact Tracing: {}\n"
+                    "Seed: {}\n"
+                    "Room Size: {}\n"
+                    "Room Count: {}\n"
+                    "Break Room Size: {}\n"
+                    "Engine: {}\n"
+                    .format(directory,
+                            args.num_agents,
+                            args.mitigation,
+                            args.baseInfection,
+                            args.spreadChance,
+                            args.spreadDistance,
+                            args.testChance,
+                            args.stepCount,
+                            args.testDelay,
+                            args.participationTracing,
+                            args.lastContactDays,
+                            args.distanceTracking,
+                            seed,
+                            args.room_size,
+                            args.room_count,
+                            args.break_room_size,
+                            args.engine))
+
+    def write_settings(file_name: str) -> None:
+        with open(file_name, "w+") as file:
+            file.write(settings)
+
+    write_atomically(directory + os.sep + "settings.txt", write_settings)
+    return model_data_path, stream_data_path
+
+
+def get_run_settings(args: argparse.Namespace, seed: Optional[int]) -> Dict[str, Any]:
+    """
+    Gets all the settings that affect the results of a run. A replicate of a batch has the settings of a single run
+    with its seed (see `VectorizedVirusModel`), so they share their entries in the result cache. For a run that
+    continues from a snapshot, these are only the arguments in `FORKED_ARGUMENTS`, the number of steps, the seed and
+    the snapshot.
+
+    :param args: The parsed commandline arguments.
+    :param seed: The random seed of the run.
+    :return: The settings by name.
+    """
+    if args.from_snapshot is not None:
+        # All the other parameters are restored from the snapshot, so they are determined by its contents. The result
+        # depends on those contents, not on where the snapshot is stored.
+        run_settings = {argument: getattr(args, argument) for argument in FORKED_ARGUMENTS.values()}
+        run_settings['stepCount'] = args.stepCount
+        with open(args.from_snapshot, 'rb') as snapshot:
+            run_settings['from_snapshot'] = hashlib.sha256(snapshot.read()).hexdigest()
+    else:
+        run_settings = {name: value for name, value in vars(args).items()
+                        if name not in ('output', 'show', 'write', 'cache', 'cache_size', 'chunk_size',
+                                        'save_snapshot', 'snapshot_step', 'replicates', 'aggregate', 'profile',
+                                        'profile_trace', 'work_counters')}
+    run_settings['seed'] = seed
+    return run_settings
+
+
+def uses_cache(args: argparse.Namespace) -> bool:
+    """
+    Checks if the result cache is used for a run. Runs that produce more than their model data (i.e. a snapshot, a
+    profile or work counters) require the model itself, so they can't be skipped and always run the simulation.
+
+    :param args: The parsed commandline arguments.
+    :return: True if a cached result can be reused and the result of the run is stored in the cache.
+    """
+    if args.cache is None or args.seed is None:
+        return False
+    return args.save_snapshot is None and not args.profile and not args.profile_trace and not args.work_counters
+
+
+def reuse_cached_result(directory: str, cache: ResultCache, cache_key: str) -> bool:
+    """
+    Uses the result of an earlier run from the result cache as the result of a run, if the cache contains it.
+
+    :param directory: The output directory of the run.
+    :param cache: The result cache.
+    :param cache_key: The key of the run in the result cache.
+    :return: True if the cached result was used, False if the run still has to be simulated.
+    """
+    if not cache.copy_to(cache_key, directory + os.sep + MODEL_DATA_PATH):
+        return False
+    print("Reusing the cached result for: {}".format(directory))
+    return True
+
+
+def finish_run(directory: str, run_settings: Dict[str, Any], cache: Optional[ResultCache],
+               cache_key: Optional[str]) -> None:
+    """
+    Converts the data that was streamed to the output directory during a run into the model data of the run.
+
+    :param directory: The output directory of the run.
+    :param run_settings: The settings of the run. See `get_run_settings`.
+    :param cache: The result cache to store the result in, if any.
+    :param cache_key: The key of the run in the result cache.
+    """
+    # The collected data is streamed to a separate file while running, so it's available even if the run crashes.
+    # The model data is written atomically, so it only exists once the simulation completed successfully.
+    model_data_path = directory + os.sep + MODEL_DATA_PATH
+    stream_data_path = directory + os.sep + STREAM_DATA_PATH
+    with ModelData.from_stream(stream_data_path, run_settings) as model_data:
+        write_atomically(model_data_path, model_data.write)
+    # The streamed data is memory mapped until the model data is closed, so it can only be removed afterwards.
+    os.remove(stream_data_path)
+
+    if cache is not None:
+        cache.put(cache_key, model_data_path)
+
+
+def write_profile(profiler: PhaseProfiler, summary_file: str, trace_file: Optional[str]) -> None:
+    """
+    Prints the summary of the time spent in every phase of a run and writes it to a file.
+
+    :param profiler: The profiler of the run.
+    :param summary_file: The file to write the summary to.
+    :param trace_file: The file to write the time of every phase on every day to, if any.
+    """
+    summary = profiler.format_summary()
+    print(summary)
+
+    def write_summary(file_name: str) -> None:
+        with open(file_name, "w") as file:
+            file.write(summary + "\n")
+
+    write_atomically(summary_file, write_summary)
+    if trace_file is not None:
+        write_atomically(trace_file, profiler.write_trace)
+
+
+def visualize(directory: str, args: argparse.Namespace) -> None:
+    """
+    Shows and/or writes the plots of a run.
+
+    :param directory: The output directory of the run.
+    :param args: The parsed commandline arguments.
+    """
+    with ModelData.load(directory + os.sep + MODEL_DATA_PATH) as model_data:
+        df = model_data.to_dataframe()
+    Visualizer(df, directory, save_file=args.write, show_file=args.show).visualize_all()
+
+
+def run_replicates(args: argparse.Namespace) -> None:
+    """
+    Runs multiple replicates of the same experiment at once using a `VectorizedVirusModel`. Replicate r is written to
+    the directory '{output}_{r}' and uses the random seed 'seed + r', like a single run with that seed (see
+    `VectorizedVirusModel`).
+
+    :param args: The parsed commandline arguments.
+    """
+    if args.engine != 'vectorized':
+        raise ValueError("Running multiple replicates at once requires '--engine vectorized'!")
+    if args.save_snapshot is not None or args.from_snapshot is not None:
+        raise ValueError("Snapshots cannot be used when running multiple replicates at once!")
+    if args.work_counters:
+        raise ValueError("Work counters cannot be used when running multiple replicates at once!")
+
+    output = args.output.rstrip(os.sep)
+    directories = ["{}_{}".format(output, replicate) for replicate in range(args.replicates)]
+    seeds = [None if args.seed is None else args.seed + replicate for replicate in range(args.replicates)]
+
+    cache = None
+    if uses_cache(args):
+        cache = ResultCache(args.cache, args.cache_size)
+
+    # Only the replicates without a cached result are simulated.
+    pending: List[Tuple[str, Dict[str, Any], Optional[int], Optional[str]]] = []
+    for directory, seed in zip(directories, seeds):
+        _, stream_data_path = prepare_directory(directory, args, seed)
+        run_settings = get_run_settings(args, seed)
+        cache_key = get_cache_key(run_settings, get_code_version()) if cache is not None else None
+
+        if cache is None or not reuse_cached_result(directory, cache, cache_key):
+            pending.append((directory, run_settings, seed, cache_key))
+
+    if len(pending) > 0:
+        model = VectorizedVirusModel(args.num_agents, DEFAULT_GRID_WIDTH, DEFAULT_GRID_HEIGHT, args.baseInfection,
+                                     args.spreadDistance, args.spreadChance, args.testChance, args.mitigation,
+                                     args.testDelay, args.participationTracing, args.lastContactDays,
+                                     args.distanceTracking, room_count=args.room_count, room_size=args.room_size,
+                                     break_room_size=args.break_room_size, chunk_size=args.chunk_size,
+                                     seeds=[seed for _, _, seed, _ in pending],
+                                     data_files=[directory + os.sep + STREAM_DATA_PATH
+                                                 for directory, _, _, _ in pending])
+        model.profiler = PhaseProfiler() if args.profile or args.profile_trace else None
+        for step in range(args.stepCount):
+            if model.has_died_out():
+                print("The epidemic has died out in every replicate after {} steps, skipping the remaining {} steps."
+                      .format(step, args.stepCount - step))
+                model.collect_repeated(args.stepCount - step)
+                break
+            model.step()
+
+        for replicate, (directory, run_settings, _, cache_key) in zip(model.replicates, pending):
+            replicate.datacollector.flush()
+            finish_run(directory, run_settings, cache, cache_key)
+        # The replicates are run together, so the profile covers all of them.
+        if model.profiler is not None:
+            write_profile(model.profiler, "{}_{}".format(output, PROFILE_PATH),
+                          "{}_{}".format(output, PROFILE_TRACE_PATH) if args.profile_trace else None)
+
+    if args.aggregate:
+        data = []
+        for directory in directories:
+            with ModelData.load(directory + os.sep + MODEL_DATA_PATH) as model_data:
+                data.append(model_data.to_dataframe())
+        write_atomically(output + AGGREGATE_DATA_SUFFIX,
+                         lambda file_name: aggregate_replicates(data).to_csv(file_name, index_label="step"))
 
     if args.show or args.write:
-        Visualizer(df, directory, save_file=args.write, show_file=args.show).visualize_all()
+        for directory in directories:
+            visualize(directory, args)
 
 
 if __name__ == '__main__':
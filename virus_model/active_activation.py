@@ -0,0 +1,85 @@
+from typing import Dict, List
+
+from mesa import Agent, Model
+from mesa.time import RandomActivation
+
+
+class ActiveRandomActivation(RandomActivation):
+    """
+    A `RandomActivation` that only activates the agents that are active. Agents are active when they are added and can
+    be deactivated and activated again at any time, e.g. when they are quarantined or die. Inactive agents stay in the
+    schedule, but they are skipped without calling their `step`.
+
+    The order of every step is still drawn for all the agents, so the draws of `model.random` don't depend on how many
+    agents are active. The active agents are activated in the same order as when the inactive agents would have been
+    activated as well.
+    """
+
+    def __init__(self, model: Model):
+        super().__init__(model)
+        self.__active: Dict[int, Agent] = {}
+        """
+        The active agents by their unique ID.
+        """
+
+    def add(self, agent: Agent) -> None:
+        super().add(agent)
+        self.__active[agent.unique_id] = agent
+
+    def remove(self, agent: Agent) -> None:
+        super().remove(agent)
+        self.__active.pop(agent.unique_id, None)
+
+    def activate(self, agent: Agent) -> None:
+        """
+        Activates an agent of this schedule from the next activation on.
+
+        :param agent: The agent to activate.
+        """
+        self.__active[agent.unique_id] = agent
+
+    def deactivate(self, agent: Agent) -> None:
+        """
+        Stops activating an agent of this schedule, until it is activated again.
+
+        :param agent: The agent to deactivate.
+        """
+        self.__active.pop(agent.unique_id, None)
+
+    def is_active(self, agent: Agent) -> bool:
+        """
+        Checks if an agent is active.
+
+        :param agent: The agent to check.
+        :return: True if the agent is part of this schedule and active.
+        """
+        return agent.unique_id in self.__active
+
+    @property
+    def active_agents(self) -> List[Agent]:
+        """
+        All the active agents.
+        """
+        return list(self.__active.values())
+
+    def get_active_count(self) -> int:
+        """
+        Gets the number of active agents.
+
+        :return: The number of active agents.
+        """
+        return len(self.__active)
+
+    def step(self) -> None:
+        """
+        Executes the step of all the active agents, one at a time, in random order. Like `agent_buffer`, whether an
+        agent is active is checked right before its turn, so changes during the step are taken into account.
+        """
+        agent_keys = list(self._agents.keys())
+        self.model.random.shuffle(agent_keys)
+        for key in agent_keys:
+            agent = self.__active.get(key)
+            if agent is not None:
+                agent.step()
+        self.steps += 1
+        self.time += 1
@@ -0,0 +1,120 @@
+"""
+The replicates of a `VectorizedVirusModel` that runs several replicates of the same experiment at once, and the
+aggregation of the data collected for them.
+
+Replicates of an experiment only differ in their random seed. Instead of creating a separate model for every replicate
+(and paying for the grid, the layout and the overhead of every vectorized pass once per replicate), the
+`VectorizedVirusModel` stores the state of all the replicates in its arrays. The rest of the state of every replicate
+(its random streams, rooster, contact ledger and data collector) is kept in a `Replicate`. See `VectorizedVirusModel`
+for why every replicate has the same results as a single run.
+"""
+import functools
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from mesa.datacollection import DataCollector
+
+from virus_model.contact_ledger import create_contact_ledger
+from virus_model.random_streams import RandomStreams
+from virus_model.rooster import RoosterModel
+from virus_model.streaming_collector import StreamingDataCollector
+
+# Make sure we can reference VectorizedVirusModel for typing hints without running into cyclical dependencies.
+if TYPE_CHECKING:
+    from virus_model.vectorized_model import VectorizedVirusModel
+
+DEFAULT_QUANTILES = (0.05, 0.5, 0.95)
+"""
+The quantiles of every column that are included in the aggregate of a batch of replicates. See `aggregate_replicates`.
+"""
+
+
+class Replicate:
+    """
+    The part of the state of a single replicate of a `VectorizedVirusModel` that cannot be stored in its arrays.
+
+    A `Replicate` exposes the same `grid`, `num_agents` and `streams` attributes as a `VirusModel`, so the
+    `RoosterModel` can be reused as is.
+    """
+
+    def __init__(self, model: 'VectorizedVirusModel', index: int, seed: Optional[int], columns: Sequence[str],
+                 data_file: Optional[str], chunk_size: int):
+        """
+        :param model: The model this replicate is part of.
+        :param index: The index of this replicate in the model, i.e. its index in the first axis of the state arrays.
+        :param seed: The seed of the random streams of this replicate.
+        :param columns: The names of the columns that are collected for this replicate.
+        :param data_file: The file to stream the collected data of this replicate to. See `StreamingDataCollector`.
+        When None, the data is kept in memory instead.
+        :param chunk_size: The number of rows to buffer before writing them to the data file.
+        """
+        self.index = index
+        self.seed = seed
+        self.grid = model.grid
+        self.num_agents = model.num_agents
+
+        self.streams = RandomStreams(seed)
+        """
+        The random streams of this replicate. See `VirusModel.streams`.
+        """
+
+        self.rooster_model = RoosterModel(self)
+        self.contact_ledger = create_contact_ledger(model.num_agents)
+        """
+        Keeps track of the last day of contact between every pair of agents of this replicate.
+        """
+
+        self.values = np.zeros(len(columns), dtype=np.int64)
+        """
+        The values of the columns of this replicate for the current step. See `VectorizedVirusModel.collect`.
+        """
+
+        reporters = get_replicate_reporters(columns)
+        if data_file is None:
+            self.datacollector = DataCollector(model_reporters=reporters)
+        else:
+            self.datacollector = StreamingDataCollector(reporters, data_file, chunk_size)
+
+
+def aggregate_replicates(data: Sequence[pd.DataFrame], quantiles: Sequence[float] = DEFAULT_QUANTILES) -> pd.DataFrame:
+    """
+    Aggregates the data collected for a number of replicates into the mean and the given quantiles of every column at
+    every step.
+
+    :param data: The data collected for every replicate. All of them must have the same columns and number of rows.
+    :param quantiles: The quantiles to compute for every column.
+    :return: The aggregated data, with the columns '<column> (mean)' and '<column> (q<quantile>)' for every column.
+    """
+    stacked = np.stack([frame.to_numpy(dtype=float) for frame in data])
+    aggregate = {}
+    for idx, column in enumerate(data[0].columns):
+        aggregate["{} (mean)".format(column)] = stacked[:, :, idx].mean(axis=0)
+        for quantile in quantiles:
+            aggregate["{} (q{:g})".format(column, quantile)] = np.quantile(stacked[:, :, idx], quantile, axis=0)
+    return pd.DataFrame(aggregate, index=data[0].index)
+
+
+def get_replicate_value(idx: int, replicate: Replicate) -> int:
+    """
+    Gets the value of a column of a replicate for the current step.
+
+    :param idx: The index of the column.
+    :param replicate: The replicate to get the value of.
+    :return: The value of the column. See `Replicate.values`.
+    """
+    return int(replicate.values[idx])
+
+
+def get_replicate_reporters(columns: Sequence[str]) -> Dict[str, Callable[[Replicate], int]]:
+    """
+    Creates the DataCollector reporters of a `Replicate`. These get the values that were computed for all the
+    replicates at once, so the model only computes every column once per step.
+
+    The reporters are partial functions rather than closures, so the model can still be pickled (see
+    `virus_model.snapshot`).
+
+    :param columns: The names of the columns.
+    :return: The reporter of every column, by its name.
+    """
+    return {name: functools.partial(get_replicate_value, idx) for idx, name in enumerate(columns)}
@@ -0,0 +1,314 @@
+"""
+Benchmarks of the hot paths of the simulation. See `run_benchmarks.py` for running them from the commandline.
+
+Every `Benchmark` times a single operation (e.g. a step of the model or a line-of-sight check) for a number of
+`Configuration`s, i.e. combinations of the number of agents and the layout of the rooms. The results can be written to
+a JSON file and compared to the results of an earlier run (the baseline) to find performance regressions.
+"""
+import contextlib
+import functools
+import io
+import platform
+import random
+import statistics
+import timeit
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from virus_model.model import *
+from virus_model.vectorized_model import VectorizedVirusModel
+
+RESULTS_FORMAT = 2
+"""
+The version of the format of the results. Results of other versions cannot be compared.
+"""
+
+DEFAULT_AGENT_COUNTS = (100, 1000, 5000, 20000)
+"""
+The numbers of agents every benchmark is run with by default.
+"""
+
+DEFAULT_LAYOUTS = ((10, 15), (20, 10))
+"""
+The layouts every benchmark is run with by default, as (room count, room size).
+"""
+
+DEFAULT_THRESHOLD = 0.25
+"""
+The default maximum relative slowdown compared to the baseline before a benchmark counts as a regression.
+"""
+
+SAMPLE_SIZE = 1000
+"""
+The number of random positions used by the benchmarks of single grid queries.
+"""
+
+
+class Configuration:
+    """
+    The settings a benchmark is run with.
+    """
+
+    def __init__(self, num_agents: Optional[int], room_count: int, room_size: int):
+        """
+        :param num_agents: The number of agents. None for benchmarks that don't depend on the number of agents.
+        :param room_count: The number of lecture rooms.
+        :param room_size: The size of the lecture rooms.
+        """
+        self.num_agents = num_agents
+        self.room_count = room_count
+        self.room_size = room_size
+
+    def create_model(self, model_class=VirusModel) -> Model:
+        """
+        Creates a model with this configuration. Apart from the number of agents and the layout, all the parameters
+        have their default values, except that contact tracing is enabled and the seed is fixed, so every run of a
+        benchmark does the exact same work.
+
+        :param model_class: The model implementation to create.
+        :return: The new model.
+        """
+        with contextlib.redirect_stdout(io.StringIO()):
+            return model_class(self.num_agents, DEFAULT_GRID_WIDTH, DEFAULT_GRID_HEIGHT, DEFAULT_BASE_INFECTION_RATE,
+                               DEFAULT_SPREAD_DISTANCE, DEFAULT_SPREAD_CHANCE, DEFAULT_DAILY_TEST_CHANCE,
+                               'contact_tracing', DEFAULT_TEST_DELAY, DEFAULT_PARTICIPATION_TRACING,
+                               DEFAULT_LAST_CONTACT_DAYS, DEFAULT_DISTANCE_TRACKING, 42, None, None,
+                               self.room_count, self.room_size, DEFAULT_BREAK_ROOM_SIZE)
+
+    def create_grid(self) -> RoomGrid:
+        """
+        Creates a grid with the layout of this configuration.
+
+        :return: The new grid.
+        """
+        return RoomGrid(DEFAULT_GRID_WIDTH, DEFAULT_GRID_HEIGHT, False, room_count=self.room_count,
+                        room_size=self.room_size, break_room_size=DEFAULT_BREAK_ROOM_SIZE,
+                        occlusion_radius=DEFAULT_SPREAD_DISTANCE)
+
+    def get_key(self) -> Tuple[Optional[int], int, int]:
+        """
+        Gets the key that identifies this configuration in the results.
+
+        :return: The number of agents, the room count and the room size.
+        """
+        return self.num_agents, self.room_count, self.room_size
+
+
+class Benchmark:
+    """
+    Times a single operation of the model.
+    """
+
+    def __init__(self, name: str, description: str, setup: Callable[[Configuration], Callable[[], Any]],
+                 number: Optional[int] = None, uses_agents: bool = True, changes_state: bool = False):
+        """
+        :param name: The name of this benchmark.
+        :param description: What is timed by this benchmark.
+        :param setup: Prepares everything for a configuration and returns the operation to time.
+        :param number: The number of times the operation is executed per repeat. The reported time is the time per
+        operation. When None, the number is chosen so every repeat takes at least 0.2 seconds. This must be fixed for
+        operations that change the state of the model (e.g. a step), so every run does the same work.
+        :param uses_agents: Whether the operation depends on the number of agents. When False, the benchmark is only
+        run once for every layout.
+        :param changes_state: Whether the operation changes the state of the model, so repeating it on the same model
+        does different work (e.g. a step simulates the next day). When True, the setup is run again before every
+        repeat, outside of the timed region, so every repeat times the exact same work.
+        """
+        self.name = name
+        self.description = description
+        self.setup = setup
+        self.number = number
+        self.uses_agents = uses_agents
+        self.changes_state = changes_state
+
+        if changes_state and number is None:
+            raise ValueError("Benchmark \"{}\" changes the state of the model, so it needs a fixed number!"
+                             .format(name))
+
+    def run(self, configuration: Configuration, repeat: int) -> Dict[str, Any]:
+        """
+        Runs this benchmark.
+
+        :param configuration: The configuration to run the benchmark with.
+        :param repeat: The number of times to time the operation.
+        :return: The result of the benchmark. See `run_benchmarks`.
+        """
+        # The model prints a line at the start of every day, which shouldn't be part of the measurements.
+        with contextlib.redirect_stdout(io.StringIO()):
+            if self.changes_state:
+                operation = None
+
+                def reset():
+                    nonlocal operation
+                    operation = self.setup(configuration)
+
+                # The setup of a timer is run before every repeat, outside of the timed region.
+                timer = timeit.Timer(lambda: operation(), setup=reset)
+            else:
+                timer = timeit.Timer(self.setup(configuration))
+            number = self.number if self.number is not None else timer.autorange()[0]
+            times = [time / number for time in timer.repeat(repeat, number)]
+
+        num_agents, room_count, room_size = configuration.get_key()
+        return {"benchmark": self.name, "num_agents": num_agents, "room_count": room_count, "room_size": room_size,
+                "number": number, "times": times, "min": min(times), "median": statistics.median(times)}
+
+
+def setup_model_init(configuration: Configuration) -> Callable[[], Any]:
+    return configuration.create_model
+
+
+def setup_model_step(configuration: Configuration) -> Callable[[], Any]:
+    return configuration.create_model().step
+
+
+def setup_vectorized_step(configuration: Configuration) -> Callable[[], Any]:
+    return configuration.create_model(VectorizedVirusModel).step
+
+
+def setup_make_day_rooster(configuration: Configuration) -> Callable[[], Any]:
+    return configuration.create_model().rooster_model.make_day_rooster
+
+
+def setup_trace_contact(configuration: Configuration) -> Callable[[], Any]:
+    model = configuration.create_model()
+    return functools.partial(model.trace_contacts, model.agents_by_id)
+
+
+def get_sample_positions(grid: RoomGrid) -> List[Tuple[int, int, int, int]]:
+    """
+    Gets random pairs of positions for the benchmarks of single grid queries. The first position of every pair is an
+    available position and the second one is any position on the grid within the spread distance of it.
+
+    :param grid: The grid to get the positions on.
+    :return: The x- and y-coordinates of the first and the second position of every pair.
+    """
+    rand = random.Random(42)
+    pairs = []
+    while len(pairs) < SAMPLE_SIZE:
+        x, y = grid.get_random_pos(rand)
+        dx, dy = (rand.randint(-DEFAULT_SPREAD_DISTANCE, DEFAULT_SPREAD_DISTANCE) for _ in range(2))
+        if not grid.out_of_bounds((x + dx, y + dy)):
+            pairs.append((x, y, x + dx, y + dy))
+    return pairs
+
+
+def setup_is_path_obstructed(configuration: Configuration) -> Callable[[], Any]:
+    grid = configuration.create_grid()
+    pairs = get_sample_positions(grid)
+
+    def is_path_obstructed():
+        for x_0, y_0, x_1, y_1 in pairs:
+            grid.is_path_obstructed(x_0, y_0, x_1, y_1)
+
+    return is_path_obstructed
+
+
+def setup_get_neighborhood(configuration: Configuration) -> Callable[[], Any]:
+    grid = configuration.create_grid()
+    positions = [(x, y) for x, y, _, _ in get_sample_positions(grid)]
+
+    def get_neighborhood():
+        for pos in positions:
+            grid.get_neighborhood(pos, moore=True, radius=DEFAULT_SPREAD_DISTANCE)
+
+    return get_neighborhood
+
+
+def setup_collect(configuration: Configuration) -> Callable[[], Any]:
+    model = configuration.create_model()
+    return functools.partial(model.datacollector.collect, model)
+
+
+BENCHMARKS = [
+    Benchmark("model_init", "Creating a `VirusModel`.", setup_model_init),
+    Benchmark("model_step", "A step of the `VirusModel`, averaged over its first day (including the start of the day).",
+              setup_model_step, number=DAY_DURATION, changes_state=True),
+    Benchmark("vectorized_step", "A step of the `VectorizedVirusModel`, averaged over its first day.",
+              setup_vectorized_step, number=DAY_DURATION, changes_state=True),
+    Benchmark("make_day_rooster", "`RoosterModel.make_day_rooster`.", setup_make_day_rooster),
+    Benchmark("trace_contact", "`VirusModel.trace_contacts` for every agent.", setup_trace_contact),
+    Benchmark("is_path_obstructed", "{} calls of `RoomGrid.is_path_obstructed`.".format(SAMPLE_SIZE),
+              setup_is_path_obstructed, uses_agents=False),
+    Benchmark("get_neighborhood", "{} calls of `RoomGrid.get_neighborhood`.".format(SAMPLE_SIZE),
+              setup_get_neighborhood, uses_agents=False),
+    Benchmark("collect", "`DataCollector.collect` of the `VirusModel`.", setup_collect),
+]
+"""
+All the available benchmarks.
+"""
+
+
+def get_environment() -> Dict[str, str]:
+    """
+    Gets a description of the environment the benchmarks are run in. Results are only comparable to a baseline that
+    was created in the same environment.
+
+    :return: The versions of Python and NumPy and a description of the machine.
+    """
+    return {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine()}
+
+
+def run_benchmarks(benchmarks: Sequence[Benchmark], agent_counts: Sequence[int],
+                   layouts: Sequence[Tuple[int, int]], repeat: int = 5,
+                   progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Runs the given benchmarks for every combination of the number of agents and the layout.
+
+    :param benchmarks: The benchmarks to run.
+    :param agent_counts: The numbers of agents to run the benchmarks with.
+    :param layouts: The layouts to run the benchmarks with, as (room count, room size).
+    :param repeat: The number of times to time every benchmark. The median is used for comparisons.
+    :param progress: Called with the result of every benchmark as soon as it's available.
+    :return: The results, which can be stored as JSON. Every result contains the name of the benchmark, its
+    configuration, the number of operations per repeat, the time per operation of every repeat (in seconds) and the
+    minimum and median of those times.
+    """
+    results = []
+    for benchmark in benchmarks:
+        for room_count, room_size in layouts:
+            for num_agents in agent_counts if benchmark.uses_agents else [None]:
+                result = benchmark.run(Configuration(num_agents, room_count, room_size), repeat)
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+    return {"format": RESULTS_FORMAT, "environment": get_environment(), "repeat": repeat, "results": results}
+
+
+def get_result_key(result: Dict[str, Any]) -> Tuple[str, Optional[int], int, int]:
+    """
+    Gets the key that identifies a result, so it can be matched with the same result in the baseline.
+
+    :param result: The result of a benchmark.
+    :return: The name of the benchmark and the key of its configuration. See `Configuration.get_key`.
+    """
+    return result["benchmark"], result["num_agents"], result["room_count"], result["room_size"]
+
+
+def compare_results(results: Dict[str, Any], baseline: Dict[str, Any],
+                    threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Compares the results of benchmarks to a baseline. Benchmarks that are missing from either are ignored.
+
+    :param results: The results to compare. See `run_benchmarks`.
+    :param baseline: The results to compare them to.
+    :param threshold: The maximum relative slowdown of the median time before a benchmark counts as a regression,
+    e.g. 0.25 for 25%.
+    :return: The comparison of every benchmark in both, with the key of the benchmark, the median time of the
+    baseline and the results, their ratio and whether it is a regression.
+    """
+    if baseline.get("format") != RESULTS_FORMAT:
+        raise ValueError("Unsupported baseline format! Expected format {}.".format(RESULTS_FORMAT))
+
+    baseline_medians = {get_result_key(result): result["median"] for result in baseline["results"]}
+    comparisons = []
+    for result in results["results"]:
+        key = get_result_key(result)
+        if key not in baseline_medians:
+            continue
+        ratio = result["median"] / baseline_medians[key]
+        comparisons.append({"key": key, "baseline": baseline_medians[key], "median": result["median"],
+                            "ratio": ratio, "regression": ratio > 1 + threshold})
+    return comparisons
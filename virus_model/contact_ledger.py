@@ -0,0 +1,159 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Set, Tuple
+
+import numpy as np
+
+DENSE_LEDGER_MAX_AGENTS = 4096
+"""
+The maximum number of agents for which a `DenseContactLedger` is used. The dense ledger needs 2 bytes per pair of agents,
+so 4096 agents take up 32MB. For larger populations, a `SparseContactLedger` is used instead.
+"""
+
+NO_CONTACT = -1
+"""
+The day value that describes that two agents never had any contact.
+"""
+
+
+class ContactLedger(ABC):
+    """
+    Keeps track of the last day on which any two agents had contact with each other.
+
+    Contacts are always symmetric: if agent a had contact with agent b, agent b also had contact with agent a.
+    """
+
+    def __init__(self, num_agents: int):
+        """
+        :param num_agents: The number of agents in the model. Agents are identified by their unique ID in [0, num_agents).
+        """
+        self.num_agents = num_agents
+
+    @abstractmethod
+    def add_contact(self, agent_a: int, agent_b: int, day: int) -> None:
+        """
+        Registers a contact between two agents.
+
+        :param agent_a: The ID of the first agent.
+        :param agent_b: The ID of the second agent.
+        :param day: The day on which the contact took place.
+        """
+        raise NotImplementedError
+
+    def add_contacts(self, agents_a: np.ndarray, agents_b: np.ndarray, day: int) -> None:
+        """
+        Registers a contact between each pair of agents (agents_a[i], agents_b[i]).
+
+        :param agents_a: The IDs of the first agent of every pair.
+        :param agents_b: The IDs of the second agent of every pair.
+        :param day: The day on which the contacts took place.
+        """
+        for agent_a, agent_b in zip(agents_a.tolist(), agents_b.tolist()):
+            self.add_contact(agent_a, agent_b, day)
+
+    @abstractmethod
+    def get_contacts(self, agent: int, since_day: int) -> np.ndarray:
+        """
+        Gets all the agents the given agent had contact with on or after a given day.
+
+        :param agent: The ID of the agent whose contacts to retrieve.
+        :param since_day: The first day (inclusive) to consider.
+        :return: The sorted IDs of all the agents the given agent had contact with since the given day.
+        """
+        raise NotImplementedError
+
+    def get_contact_pairs(self, agents: np.ndarray, since_days: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gets the contacts of multiple agents at once. See `get_contacts`.
+
+        :param agents: The IDs of the agents whose contacts to retrieve.
+        :param since_days: For every agent, the first day (inclusive) to consider.
+        :return: Two arrays (owners, contacts), where contacts[i] is a contact of agent owners[i].
+        """
+        contacts = [self.get_contacts(agent, since_day) for agent, since_day in zip(agents.tolist(), since_days.tolist())]
+        owners = np.repeat(agents, [len(entry) for entry in contacts])
+        return owners, np.concatenate(contacts) if len(contacts) > 0 else np.empty(0, dtype=int)
+
+    def prune(self, oldest_day: int) -> None:
+        """
+        Informs the ledger that contacts before the given day will never be requested again, so it can free them.
+
+        :param oldest_day: The oldest day that may still be requested.
+        """
+        pass
+
+
+class DenseContactLedger(ContactLedger):
+    """
+    A `ContactLedger` that stores the last day of contact for every pair of agents in a single matrix.
+    """
+
+    def __init__(self, num_agents: int):
+        super().__init__(num_agents)
+        self.last_contact = np.full((num_agents, num_agents), NO_CONTACT, dtype=np.int16)
+        """
+        The last day of contact between agents [a, b].
+        """
+
+    # Override
+    def add_contact(self, agent_a: int, agent_b: int, day: int) -> None:
+        self.last_contact[agent_a, agent_b] = day
+        self.last_contact[agent_b, agent_a] = day
+
+    # Override
+    def add_contacts(self, agents_a: np.ndarray, agents_b: np.ndarray, day: int) -> None:
+        self.last_contact[agents_a, agents_b] = day
+        self.last_contact[agents_b, agents_a] = day
+
+    # Override
+    def get_contacts(self, agent: int, since_day: int) -> np.ndarray:
+        return np.flatnonzero(self.last_contact[agent] >= max(since_day, 0))
+
+    # Override
+    def get_contact_pairs(self, agents: np.ndarray, since_days: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        rows, contacts = np.nonzero(self.last_contact[agents] >= np.maximum(since_days, 0)[:, None])
+        return agents[rows], contacts
+
+
+class SparseContactLedger(ContactLedger):
+    """
+    A `ContactLedger` that stores the contacts of every day in a separate bucket. Only agents that actually had contact
+    take up any memory, and entire days can be dropped at once once they are no longer needed.
+    """
+
+    def __init__(self, num_agents: int):
+        super().__init__(num_agents)
+        self.days: Dict[int, Dict[int, Set[int]]] = {}
+        """
+        For every day, the set of contacts of every agent that had any contact on that day.
+        """
+
+    # Override
+    def add_contact(self, agent_a: int, agent_b: int, day: int) -> None:
+        bucket = self.days.setdefault(day, {})
+        bucket.setdefault(agent_a, set()).add(agent_b)
+        bucket.setdefault(agent_b, set()).add(agent_a)
+
+    # Override
+    def get_contacts(self, agent: int, since_day: int) -> np.ndarray:
+        contacts = set()
+        for day, bucket in self.days.items():
+            if day >= since_day and agent in bucket:
+                contacts.update(bucket[agent])
+        return np.array(sorted(contacts), dtype=int)
+
+    # Override
+    def prune(self, oldest_day: int) -> None:
+        for day in [day for day in self.days if day < oldest_day]:
+            del self.days[day]
+
+
+def create_contact_ledger(num_agents: int) -> ContactLedger:
+    """
+    Creates the most suitable `ContactLedger` for the given number of agents. See `DENSE_LEDGER_MAX_AGENTS`.
+
+    :param num_agents: The number of agents in the model.
+    :return: The new `ContactLedger`.
+    """
+    if num_agents <= DENSE_LEDGER_MAX_AGENTS:
+        return DenseContactLedger(num_agents)
+    return SparseContactLedger(num_agents)
@@ -0,0 +1,110 @@
+"""
+Schedules the days on which agents need attention at the start of a day, e.g. because their disease advances, a test
+result becomes available or their quarantine ends.
+
+Without a calendar, every agent has to be checked at the start of every day, even though only a few of them have
+something to do. The calendar keeps a bucket of agents for every day with events, so starting a day only costs time
+for the agents that are actually handled on it.
+"""
+import heapq
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+
+class EventCalendar:
+    """
+    Keeps track of the days on which agents have something scheduled, e.g. the next stage of their disease, an active
+    test result or the end of their quarantine. At the start of a day, only the agents with something scheduled on
+    that day have to be handled, instead of all the agents.
+
+    The agents of a day are handled in the order of their unique IDs. Events that are scheduled for the current day
+    while it is being started (e.g. because an agent quarantines and tests one of their contacts) are handled that
+    same day if the agent hasn't been handled yet. Otherwise, they are ignored, as they would have been when the
+    start of the day was handled for every agent.
+    """
+
+    def __init__(self):
+        self.__buckets: Dict[int, Set[int]] = {}
+        """
+        The IDs of the agents with something scheduled on every day.
+        """
+        self.__days: List[int] = []
+        """
+        The heap of the days that have a bucket.
+        """
+        self.__day: Optional[int] = None
+        """
+        The day that is currently being started, if any. See `start_day`.
+        """
+        self.__queue: List[int] = []
+        """
+        The heap of the IDs of the agents that still have to be handled on the day that is being started.
+        """
+        self.__current = -1
+        """
+        The ID of the agent that is currently being handled.
+        """
+
+    def schedule(self, day: int, agent_id: int) -> None:
+        """
+        Schedules an agent to be handled at the start of a day. Scheduling an agent multiple times for the same day
+        only handles it once.
+
+        :param day: The day on which to handle the agent.
+        :param agent_id: The unique ID of the agent.
+        """
+        if self.__day is not None and day <= self.__day:
+            if agent_id > self.__current:
+                heapq.heappush(self.__queue, agent_id)
+            return
+
+        bucket = self.__buckets.get(day)
+        if bucket is None:
+            bucket = set()
+            self.__buckets[day] = bucket
+            heapq.heappush(self.__days, day)
+        bucket.add(agent_id)
+
+    def is_handled(self, agent_id: int) -> bool:
+        """
+        Checks whether an agent has been handled on the current day already.
+
+        :param agent_id: The unique ID of the agent.
+        :return: True if the agent was handled on the current day before the agent that is currently being handled, or
+        if no day is being started at the moment.
+        """
+        return self.__day is None or agent_id < self.__current
+
+    def start_day(self, day: int, agents: Iterable[int] = ()) -> Iterator[int]:
+        """
+        Starts a new day. This gets all the agents that are scheduled on (or before) the day, in the order of their
+        unique IDs.
+
+        :param day: The day to start.
+        :param agents: Any additional agents to handle on this day.
+        :return: The IDs of the agents to handle, including those that are scheduled while handling the others.
+        """
+        self.__queue = list(agents)
+        while len(self.__days) > 0 and self.__days[0] <= day:
+            self.__queue.extend(self.__buckets.pop(heapq.heappop(self.__days)))
+        heapq.heapify(self.__queue)
+
+        self.__day = day
+        self.__current = -1
+        try:
+            while len(self.__queue) > 0:
+                agent_id = heapq.heappop(self.__queue)
+                if agent_id <= self.__current:
+                    continue
+                self.__current = agent_id
+                yield agent_id
+        finally:
+            self.__day = None
+            self.__queue = []
+
+    def get_scheduled_count(self) -> int:
+        """
+        Gets the number of scheduled events, counting an agent only once per day.
+
+        :return: The number of scheduled events.
+        """
+        return sum(len(bucket) for bucket in self.__buckets.values())
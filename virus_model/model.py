@@ -1,17 +1,25 @@
 import random
 
-import pandas as pd
 from mesa import Agent, Model
 from mesa.datacollection import DataCollector
-from mesa.time import RandomActivation
+from mesa.space import Coordinate
 from mesa.visualization.UserParam import UserSettableParameter
 from mesa.visualization.modules import TextElement
 
+from virus_model.active_activation import ActiveRandomActivation
 from virus_model.canvas_room_grid import CanvasRoomGrid
+from virus_model.contact_ledger import create_contact_ledger
+from virus_model.event_calendar import EventCalendar
 from virus_model.modular_server import CustomModularServer
+from virus_model.profiler import *
+from virus_model.random_streams import RandomStreams
+from virus_model.transmission import TransmissionKernel
 from virus_model.rooster import *
+from virus_model.state_counters import StateCounters
+from virus_model.streaming_collector import StreamingDataCollector, DEFAULT_CHUNK_SIZE
 from virus_model.virus import *
-from virus_model.virus_test import VirusTest, TestOutcome
+from virus_model.virus_test import VirusTest, TestOutcome, TestStatistics, RESULT_ACTIVE_DAY
+from virus_model.work_counters import *
 
 DAY_DURATION = 8 * 4
 """
@@ -23,6 +31,12 @@ NIGHT_DURATION = 24 * 4 - DAY_DURATION
 The number of ticks that fit into a 'night'.
 """
 
+QUARANTINE_DURATION = 10
+"""
+The number of days an agent is quarantined for after testing positive or after being traced as a contact. See
+`VirusAgent.enforce_quarantine`.
+"""
+
 
 class VirusAgent(Agent):
     """ An agent with fixed initial wealth."""
@@ -32,32 +46,36 @@ class VirusAgent(Agent):
         self.model = model
         self.in_lecture = False
         self.agent_id = unique_id
-        self.day_time = 0
         self.rooster_agent = RoosterAgent(self, self.model)
         self.room: Optional[LectureRoom] = None
         self.seat: Optional[Seat] = None
-        self.virus_test = VirusTest(self.model.test_delay, self.model.random)
+        self.virus_test = VirusTest(self.model.test_delay, self.model.streams.results,
+                                    parent_stats=self.model.test_stats)
 
         """
         The day rooster where the agent will sit or walk.
         """
         self.virus = self.__create_virus()
-        self.quarantine = False
+        self.__quarantine = False
         """
         Keeps track of whether this agent is under quarantine or not
         """
-        self.quarantine_duration = 0
+        self.model.state_counters.add(self.virus.disease_state, self.__quarantine)
+        if self.virus.is_infected():
+            self.model.infected_agents.add(self.unique_id)
+            self.model.calendar.schedule(self.virus.get_next_update_day(), self.unique_id)
+        self.quarantine_end_day = 0
         """
-        Keeps track of the remaining number of days this agent will be quarantined.
+        The day on which the quarantine of this agent ends.
         """
-        self.day_tested = float(np.nan)
+        self.inactive_pos: Optional[Coordinate] = None
         """
-        Keeps track of the day when tested
+        The position of this agent when they became inactive, where they return to when they become active again.
+        See `update_activity`.
         """
-
-        self.df_contacts = pd.DataFrame(columns=["unique_id", "time_contact"])
+        self.day_tested = float(np.nan)
         """
-        Traces the last contact to each other agent
+        Keeps track of the day when tested
         """
 
     def __create_virus(self) -> Virus:
@@ -78,50 +96,85 @@ class VirusAgent(Agent):
             else:
                 state = DiseaseState.SYMPTOMATIC
 
-        return Virus(self.model.random, state)
+        return Virus(self.model.streams.disease, state, self.on_state_change)
 
-    def enforce_quarantine(self, days: int) -> None:
+    def on_state_change(self, old_state: DiseaseState, new_state: DiseaseState) -> None:
         """
-        Places this agent under quarantine.
+        Updates the state counters of the model when the state of the disease of this agent changes.
 
-        :param days: The number of days this agent will be quarantined for.
+        This isn't a private method, because pickle can't restore references to (name-mangled) private methods.
+
+        :param old_state: The previous state of the disease.
+        :param new_state: The new state of the disease.
         """
-        self.quarantine = True
-        self.quarantine_duration = days
+        self.model.state_counters.move(old_state, self.__quarantine, new_state, self.__quarantine)
+        if new_state >= DiseaseState.INFECTED:
+            self.model.infected_agents.add(self.unique_id)
+            self.model.calendar.schedule(self.virus.get_next_update_day(), self.unique_id)
+        else:
+            self.model.infected_agents.discard(self.unique_id)
+        if new_state == DiseaseState.DECEASED:
+            self.update_activity()
 
-    def move(self) -> None:
-        possible_steps = self.model.grid.get_neighborhood(
-            self.pos,
-            moore=True,
-            include_center=False,
-            radius=1, in_break_room=True)
-        if len(possible_steps) == 0:
+    def update_activity(self) -> None:
+        """
+        Removes this agent from the grid and the activation order of the model when they become inactive, and puts them
+        back when they become active again. Agents are inactive while they are quarantined or deceased: they can't
+        move, spread the virus or be traced as a contact, so the model doesn't have to consider them at all.
+        """
+        active = not self.__quarantine and not self.virus.is_deceased()
+        if active == self.model.schedule.is_active(self):
             return
 
-        new_position = self.random.choice(possible_steps)
+        if active:
+            self.model.schedule.activate(self)
+            self.model.grid.place_agent(self, self.inactive_pos)
+            self.inactive_pos = None
+        else:
+            self.model.schedule.deactivate(self)
+            self.inactive_pos = self.pos
+            self.model.grid.remove_agent(self)
 
-        self.model.grid.move_agent(self, new_position)
+    @property
+    def day_time(self) -> int:
+        """
+        The number of steps that have passed on the current day.
+        """
+        return self.model.schedule.steps % DAY_DURATION
 
-    def handle_contact(self, other_agent: 'VirusAgent') -> None:
+    @property
+    def quarantine(self) -> bool:
         """
-        Attempts to spread the virus to another agent. This only has an effect if the other agent isn't already infected.
+        Whether this agent is under quarantine or not.
+        """
+        return self.__quarantine
+
+    @quarantine.setter
+    def quarantine(self, quarantine: bool) -> None:
+        if quarantine != self.__quarantine:
+            state = self.virus.disease_state
+            self.model.state_counters.move(state, self.__quarantine, state, quarantine)
+        self.__quarantine = quarantine
+        self.update_activity()
 
-        Make sure that this agent is even infectious before calling this method!
-        :param other_agent: The victim.
+    def enforce_quarantine(self, days: int) -> None:
         """
-        # We assume that there's only a single strain  of the disease, so you cannot get infected more than once.
-        if other_agent.virus.is_infected():
-            return
+        Places this agent under quarantine.
 
-        # You cannot infect people who aren't there.
-        if other_agent.quarantine:
-            return
+        :param days: The number of days this agent will be quarantined for.
+        """
+        self.quarantine = True
+        # The current day counts as the first day of the quarantine, unless this agent's start of the day has already
+        # been handled.
+        self.quarantine_end_day = self.model.day + days - (0 if self.model.calendar.is_handled(self.unique_id) else 1)
+        self.model.calendar.schedule(self.quarantine_end_day, self.unique_id)
 
-        # The virus can't go through walls, so don't do anything if there's a wall between this agent and the other one.
-        if self.model.grid.is_path_obstructed(self.pos[0], self.pos[1], other_agent.pos[0], other_agent.pos[1]):
+    def move(self) -> None:
+        new_position = self.model.grid.get_random_break_neighbor(self.pos, self.model.streams.movement)
+        if new_position is None:
             return
 
-        other_agent.virus.infect(self.model.spread_chance, self.model.day)
+        self.model.grid.move_agent(self, new_position)
 
     def set_room(self) -> None:
         """
@@ -134,11 +187,12 @@ class VirusAgent(Agent):
         else:
             self.room = self.model.grid.rooms_list[room_id]
 
-    def set_seat(self, random_seat: bool = True) -> None:
+    def set_seat(self, random_seat: bool = True, rand: Optional[random.Random] = None) -> None:
         """
         Updates the seat of this agent. If this agent is currently not in a room, their seat will be made available again.
 
         :param random_seat: Whether to attempt to randomly assign a seat.
+        :param rand: The random instance used to pick the seat. Defaults to the movement stream of the model.
         """
         if self.room is None:
             if self.seat is not None:
@@ -146,34 +200,14 @@ class VirusAgent(Agent):
                 self.seat = None
             return
 
-        found_seat = None
-        if random_seat:
-            threshold = self.room.get_capacity() / 4
-            """
-            At which point we'll abandon the idea of randomly assigning agents to seats, as it'll take too long and 
-            becomes less and less important.
-            """
-
-            available_seat_count = sum([seat.available for seat in self.room.seats])
-            if available_seat_count < threshold:
-                random_seat = False
-
-            found_seat = self.room.seats[0]
-            while not found_seat.available:
-                found_seat = self.room.seats[self.model.random.randrange(self.room.get_capacity())]
-
-        if not random_seat:
-            for seat in self.room.seats:
-                if seat.available:
-                    found_seat = seat
-                    break
-
+        found_seat = self.room.take_random_seat((rand or self.model.streams.movement) if random_seat else None)
+        if self.model.counters is not None:
+            self.model.counters.add(COUNTER_SEAT_PICKS)
         if found_seat is None:
             print("Failed to find a seat for agent {} in room {}!".format(self.unique_id, self.room.room_id))
             self.seat = None
             return
 
-        found_seat.available = False
         new_position = (found_seat.x, found_seat.y)
         self.model.grid.move_agent(self, new_position)
         self.seat = found_seat
@@ -182,23 +216,22 @@ class VirusAgent(Agent):
         """
         Handles the start of a new day.
 
+        This is only called on the days this agent has something scheduled in the `EventCalendar` of the model (or
+        gets a routine test), as nothing would happen on any of the other days.
+
         :param day: The number of the new day (assuming the models started at 0).
         """
         self.virus.handle_disease_progression(day)
         self.virus_test.new_day(day)
 
         if self.virus_test.get_result(self.model.day) == TestOutcome.NEGATIVE:
-            self.quarantine_duration = 0
+            self.quarantine_end_day = day
 
         self.testing()
         self.quarantine_agents(self.model.last_contact_days)
 
-        if self.quarantine:
-            self.quarantine_duration -= 1
-            if self.quarantine_duration <= 0:
-                self.quarantine = False
-
-        self.day_time = 0
+        if self.quarantine and day >= self.quarantine_end_day:
+            self.quarantine = False
 
     def testing(self, reason="routine") -> None:
         """"
@@ -206,18 +239,25 @@ class VirusAgent(Agent):
 
         :param reason: Checking if routine testing or contact tracing suggestion
         """
+        chance = self.model.testing_chances[self.unique_id] if reason == "routine" else 0
+
         if (self.quarantine or
                 self.virus.is_deceased()):
             return
 
         if reason == "routine":
             if (not self.virus.is_infected() or
-                    self.model.random.randrange(0, 100) > self.model.daily_testing_chance):
+                    chance > self.model.daily_testing_chance):
                 return
 
         self.day_tested = self.model.day
         self.virus_test.perform_test(self.model.day, self.virus)
 
+        # The result has to be handled on every day it is active, see `VirusTest.get_result`.
+        result_day = self.model.day + self.model.test_delay
+        for day in range(result_day, result_day + RESULT_ACTIVE_DAY + 1):
+            self.model.calendar.schedule(day, self.unique_id)
+
     def quarantine_agents(self, last_contact_days) -> None:  # , detection_days = 1
         """"
         quarantine agents after being tested positive or having contact to positive tested person
@@ -226,42 +266,29 @@ class VirusAgent(Agent):
         """
         if self.virus_test.get_result(self.model.day) == TestOutcome.POSITIVE:
 
-            ids_contact = self.df_contacts.loc[
-                (self.day_tested - self.df_contacts["time_contact"]) <= last_contact_days, "unique_id"].unique()
-            for other_agent in self.model.schedule.agent_buffer(shuffled=False):
-                if (other_agent.unique_id in list(ids_contact)) & (not other_agent.quarantine):
-                    if self.model.random.randrange(0, 100) < self.model.participation_tracing:
+            ids_contact = self.model.contact_ledger.get_contacts(self.unique_id,
+                                                                 int(self.day_tested) - last_contact_days)
+            for contact_id in ids_contact:
+                other_agent = self.model.agents_by_id[contact_id]
+                if not other_agent.quarantine:
+                    if self.model.streams.tracing.randrange(0, 100) < self.model.participation_tracing:
                         other_agent.testing(reason="risk_contact")
-                        other_agent.enforce_quarantine(10)
+                        other_agent.enforce_quarantine(QUARANTINE_DURATION)
 
             if not self.quarantine:
-                self.enforce_quarantine(10)
+                self.enforce_quarantine(QUARANTINE_DURATION)
 
-    def trace_contact(self, distance_tracking) -> None:
-        """"
-        tracing contact to each agent in certain radius with time of last contact
-
-        :param distance_tracking: radius of moore-distance within contacts are traced
-        """
-        if not self.quarantine:
-
-            for other_agent in self.model.grid.get_neighbors(pos=self.pos, radius=distance_tracking, moore=True):
-                if not other_agent.quarantine:
-                    self.df_contacts = self.df_contacts.append(
-                        {"unique_id": other_agent.unique_id, "time_contact": self.model.day},
-                        ignore_index=True)
-                    self.df_contacts = self.df_contacts.groupby("unique_id").max().reset_index()
-                    other_agent.df_contacts = other_agent.df_contacts.append(
-                        {"unique_id": self.unique_id, "time_contact": self.model.day},
-                        ignore_index=True)
-                    other_agent.df_contacts = other_agent.df_contacts.groupby("unique_id").max().reset_index()
-
-    def move_to_random_position(self) -> None:
+    def move_to_random_position(self, rand: Optional[random.Random] = None) -> None:
         """
         Moves this agent to a random position on the grid. Note that only 'valid' positions are considered
         (see RoomGrid#is_available(int, int, False).
+
+        :param rand: The random instance used to pick the position. Defaults to the movement stream of the model.
         """
-        (pos_x, pos_y) = self.model.grid.get_random_pos(self.random, in_break_room=self.room is None)
+        (pos_x, pos_y) = self.model.grid.get_random_pos(rand or self.model.streams.movement,
+                                                        in_break_room=self.room is None)
+        if self.model.counters is not None:
+            self.model.counters.add(COUNTER_POSITION_PICKS)
 
         # If the agent doesn't exist on the grid at the moment, place them.
         # Otherwise, move them. This is required, because move has to remove the agent
@@ -302,28 +329,24 @@ class VirusAgent(Agent):
         """
         Executes a single step in the model for this agent.
         """
-        # No zombies allowed
-        if self.virus.disease_state == DiseaseState.DECEASED or self.quarantine:
-            self.day_time += 1
-            return
+        # No zombies allowed: quarantined and deceased agents are never activated, see `update_activity`.
+        profiler = self.model.profiler
+        if profiler is not None:
+            start = profiler.start()
 
         room_rooster_id = self.rooster_agent.rooster[self.model.day_step]
         self.do_rooster_step(room_rooster_id)
+        if profiler is not None:
+            start = profiler.record(PHASE_SEATING, start)
 
         # Free to move around wherever they want! Just not in the rooms.
         if not self.in_lecture:
             self.move()
+            if profiler is not None:
+                profiler.record(PHASE_MOVEMENT, start)
 
-        if not self.virus.is_infectious():
-            self.day_time += 1
-            return
-
-        for other_agent in self.model.grid.get_neighbors(pos=self.pos, radius=self.model.spread_distance, moore=True):
-            self.handle_contact(other_agent)
-
-        if self.model.choice_of_measure == 'contact_tracing':
-            self.trace_contact(self.model.distance_tracking)
-        self.day_time += 1
+        # Spreading the virus to the agents around this one and tracing the contacts with them are handled for all
+        # agents at once, see `VirusModel.spread_virus` and `VirusModel.trace_contacts`.
 
 
 class VirusModel(Model):
@@ -339,7 +362,8 @@ class VirusModel(Model):
                  test_delay: int, participation_tracing: int, last_contact_days: int, distance_tracking: int,
                  seed: int = None, grid_canvas: Optional[CanvasRoomGrid] = None,
                  server: Optional[CustomModularServer] = None,
-                 room_count: int = 10, room_size: int = 15, break_room_size: int = 20, *args, **kwargs):
+                 room_count: int = 10, room_size: int = 15, break_room_size: int = 20,
+                 data_file: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE, *args, **kwargs):
         """
         Initializes a new Virus Model.
 
@@ -354,10 +378,18 @@ class VirusModel(Model):
         :param test_delay: The number of days it takes to get the result of a test.
         :param seed: The seed to use for the random module. This can be a numerical value or None (default).
         None means that the random module will be random.
+        :param data_file: The file to stream the collected data to (see `StreamingDataCollector`). None (default) keeps
+        all the collected data in memory using a regular `DataCollector`.
+        :param chunk_size: The number of steps to buffer before they are written to the data file.
         """
         super().__init__(*args, **kwargs)
         if seed is not None:
             self.random = random.Random(seed)
+        self.streams = RandomStreams(seed)
+        """
+        The random streams used by the different parts of the model. `self.random` is only used to shuffle the order
+        in which the agents are activated.
+        """
 
         self.grid_canvas = grid_canvas
 
@@ -379,10 +411,19 @@ class VirusModel(Model):
         """
         self.participation_tracing = participation_tracing
         self.last_contact_days = last_contact_days
+        self.contact_ledger = create_contact_ledger(num_agents)
+        """
+        Keeps track of the last day of contact between every pair of agents. See `trace_contacts`.
+        """
 
-        self.schedule = RandomActivation(self)
+        self.schedule = ActiveRandomActivation(self)
+        """
+        Only activates the agents that aren't quarantined or deceased. See `VirusAgent.update_activity`.
+        """
         self.grid = RoomGrid(grid_width, grid_height, False, room_count=room_count,
-                             room_size=room_size, break_room_size=break_room_size)
+                             room_size=room_size, break_room_size=break_room_size,
+                             occlusion_radius=spread_distance, agent_capacity=num_agents)
+        self.transmission_kernel = TransmissionKernel(self.grid, spread_distance)
 
         if self.grid_canvas is not None and server is not None:
             new_width, new_height = self.grid.get_total_dimensions()
@@ -390,6 +431,14 @@ class VirusModel(Model):
             self.grid_canvas.update_dimensions(server, new_width, new_height)
 
         self.running = True
+        self.profiler: Optional[PhaseProfiler] = None
+        """
+        Measures the time of the phases of every step when set. See `virus_model.profiler`.
+        """
+        self.counters: Optional[WorkCounters] = None
+        """
+        Counts the work done in every step when set. See `set_counters`.
+        """
         self.day = 0
         self.total_steps = 0
         self.day_step = 0
@@ -413,28 +462,62 @@ class VirusModel(Model):
         self.choice_of_measure = choice_of_measure
         self.distance_tracking = distance_tracking
 
+        self.agents_by_id: List[VirusAgent] = []
+        """
+        All the agents in this model, indexed by their unique ID.
+        """
+
+        self.state_counters = StateCounters()
+        """
+        The number of agents in every `DiseaseState`, split by whether they are quarantined or not.
+        """
+
+        self.test_stats = TestStatistics()
+        """
+        The statistics of the tests performed by all agents combined.
+        """
+
+        self.calendar = EventCalendar()
+        """
+        The days on which the agents have something to do at the start of the day. See `VirusAgent.new_day`.
+        """
+
+        self.infected_agents: Set[int] = set()
+        """
+        The unique IDs of all the infected agents. Only these can get a routine test.
+        """
+
+        self.testing_chances = np.zeros(num_agents, dtype=int)
+        """
+        The chance drawn for every agent at the start of the current day that decides whether they get a routine test.
+        """
+
         # Create agents
         for uid in range(self.num_agents):
             agent = VirusAgent(uid, self)
             self.schedule.add(agent)
+            self.agents_by_id.append(agent)
 
-            agent.move_to_random_position()
+            agent.move_to_random_position(self.streams.placement)
             agent.set_room()
-            agent.set_seat()
-
-        self.datacollector = DataCollector(
-            model_reporters={"infected": get_infection_rate, "deaths": get_death_count,
-                             "quarantined": get_quarantined_count,
-                             "healthy": get_healty_count, "just infected": get_infected_count,
-                             "testable": get_testable_count,
-                             "infectious": get_infectious_count, "symptomatic": get_symptomatic_count,
-                             "recovered": get_recovered_count,
-                             "quarantined: infected": get_quarantined_infected,
-                             "quarantined: healthy": get_quarantined_healthy,
-                             "not quarantined: infected": get_notquarantined_infected,
-                             "tested total": get_tested_count, "tested pending": get_tested_pending_count,
-                             "tested positive": get_tested_positive_count,
-                             "tested negative": get_tested_negative_count})
+            agent.set_seat(rand=self.streams.placement)
+
+        model_reporters = {"infected": get_infection_rate, "deaths": get_death_count,
+                           "quarantined": get_quarantined_count,
+                           "healthy": get_healty_count, "just infected": get_infected_count,
+                           "testable": get_testable_count,
+                           "infectious": get_infectious_count, "symptomatic": get_symptomatic_count,
+                           "recovered": get_recovered_count,
+                           "quarantined: infected": get_quarantined_infected,
+                           "quarantined: healthy": get_quarantined_healthy,
+                           "not quarantined: infected": get_notquarantined_infected,
+                           "tested total": get_tested_count, "tested pending": get_tested_pending_count,
+                           "tested positive": get_tested_positive_count,
+                           "tested negative": get_tested_negative_count}
+        if data_file is None:
+            self.datacollector = DataCollector(model_reporters=model_reporters)
+        else:
+            self.datacollector = StreamingDataCollector(model_reporters, data_file, chunk_size)
 
     def set_day_step(self) -> None:
         """
@@ -448,40 +531,161 @@ class VirusModel(Model):
         Resets all the seats in all the rooms back to 'available'.
         """
         for room in self.grid.rooms_list:
-            for seat in room.seats:
-                seat.available = True
+            room.release_all_seats()
+
+    def spread_virus(self) -> None:
+        """
+        Gives every infectious agent that is present a chance to infect every agent around them (see
+        `TransmissionKernel`). Agents that aren't present (i.e. inactive, see `VirusAgent.update_activity`) can't infect
+        others or get infected.
+
+        Only agents in available positions can be reached (see `RoomGrid.is_available`).
+        """
+        infectious = []
+        susceptible = []
+        # Inactive agents aren't on the grid, so they keep the position (0, 0) without being part of any pair.
+        x = np.zeros(self.num_agents, dtype=int)
+        y = np.zeros(self.num_agents, dtype=int)
+        for agent in self.schedule.active_agents:
+            x[agent.unique_id], y[agent.unique_id] = agent.pos
+            if agent.virus.is_infectious():
+                infectious.append(agent.unique_id)
+            elif agent.virus.is_susceptible(self.day) and self.grid.is_available(agent.pos[0], agent.pos[1]):
+                susceptible.append(agent.unique_id)
+
+        # The kernel is used even if nobody can get infected, so it always uses the same part of the random stream.
+        infected = self.transmission_kernel.spread(x, y, np.array(infectious), np.array(susceptible),
+                                                   self.spread_chance, self.streams.get_generator('transmission'))
+        for uid in infected:
+            self.agents_by_id[uid].virus.set_infected(self.day)
+
+    def trace_contacts(self, agents: List[VirusAgent]) -> None:
+        """
+        Registers the contacts between the given agents and all the agents within the tracing distance (Moore distance)
+        around them, on the current day. The neighbors of all the agents are found at once, see
+        `RoomGrid.get_neighbor_pairs`.
+
+        :param agents: The agents to trace the contacts of. They have to be active, see `VirusAgent.update_activity`.
+        """
+        owners, contacts = self.grid.get_neighbor_pairs(np.array([agent.unique_id for agent in agents], dtype=int),
+                                                        self.distance_tracking)
+        self.contact_ledger.add_contacts(owners, contacts, self.day)
+        if self.counters is not None:
+            self.counters.add(COUNTER_TRACED_NEIGHBORS, len(contacts))
+            self.counters.add(COUNTER_CONTACTS, len(contacts))
 
     def next_day(self) -> None:
         """
         Handles the start of a new day.
         """
+        profiler = self.profiler
+        if profiler is not None:
+            start = profiler.start()
+
         self.rooster_model.make_day_rooster()
         self.day = int(self.schedule.steps / DAY_DURATION)
-        for agent in self.schedule.agent_buffer(shuffled=False):
-            agent.new_day(self.day)
+        if profiler is not None:
+            profiler.day = self.day
+            start = profiler.record(PHASE_ROOSTER, start)
+
+        # The chance of a routine test is drawn for every agent, even if they can't be tested. This way, every agent
+        # uses the same part of the testing stream every day, no matter what happened before (see `RandomStreams`).
+        self.testing_chances = self.streams.get_generator('testing').integers(0, 100, self.num_agents)
+        routine_tests = [uid for uid in self.infected_agents if self.testing_chances[uid] <= self.daily_testing_chance]
+        for uid in self.calendar.start_day(self.day, routine_tests):
+            self.agents_by_id[uid].new_day(self.day)
+
+        # Contacts from before this day can no longer be traced, as every positive result has expired by then.
+        self.contact_ledger.prune(self.day - self.test_delay - RESULT_ACTIVE_DAY - self.last_contact_days)
 
         self.virtual_steps = self.day * NIGHT_DURATION
         print("NEXT DAY: {}".format(self.day))
+        if profiler is not None:
+            profiler.record(PHASE_DAY_ROLLOVER, start)
+
+    def set_counters(self, counters: Optional[WorkCounters]) -> None:
+        """
+        Starts or stops counting the work done in every step. See `virus_model.work_counters`.
+
+        :param counters: The counters to add the work to. None stops counting.
+        """
+        self.counters = counters
+        self.grid.counters = counters
+        self.transmission_kernel.counters = counters
+        self.streams.set_counters(counters)
+
+    def has_died_out(self) -> bool:
+        """
+        Checks whether the epidemic has died out: nobody is infected or quarantined, no test results are pending and no
+        positive result can still cause any quarantines. From then on, none of the collected values can change anymore,
+        so the remaining steps don't have to be simulated (see `StreamingDataCollector.collect_repeated`).
+
+        :return: True if the values collected by this model will remain the same forever.
+        """
+        if (self.state_counters.count_infected() > 0 or self.state_counters.count_quarantined() > 0 or
+                self.test_stats.get_pending_count() > 0):
+            return False
+        return not any(agent.virus_test.has_positive_result(self.day) for agent in self.agents_by_id)
+
+    def collect_repeated(self, count: int) -> None:
+        """
+        Collects the values of the current step a number of times, e.g. for all the remaining steps once the epidemic
+        has died out (see `has_died_out`). See `StreamingDataCollector.collect_repeated`.
+
+        :param count: The number of rows to collect.
+        """
+        if isinstance(self.datacollector, StreamingDataCollector):
+            self.datacollector.collect_repeated(self, count)
+        else:
+            for _ in range(count):
+                self.datacollector.collect(self)
 
     def step(self) -> None:
         """
         Executes a step for the model.
         """
+        profiler = self.profiler
+        if profiler is not None:
+            step_start = start = profiler.start()
+            recorded = profiler.get_total_time()
+
         self.clear_rooms()
         self.set_day_step()
+        if profiler is not None:
+            start = profiler.record(PHASE_SEATING, start)
         self.datacollector.collect(self)
+        if profiler is not None:
+            profiler.record(PHASE_COLLECT, start)
         if self.schedule.steps % DAY_DURATION == 0:
             self.next_day()
 
         # Skip weekends
         if self.day % 7 > 4:
             self.schedule.steps += DAY_DURATION
+            if profiler is not None:
+                profiler.record_step(step_start, recorded)
+            if self.counters is not None:
+                self.counters.record_step()
             return  # Just return, everything will be updated on the next call
 
         '''Advance the model by one step.'''
         self.schedule.step()
+        if profiler is not None:
+            start = profiler.start()
+        self.spread_virus()
+        if profiler is not None:
+            start = profiler.record(PHASE_TRANSMISSION, start)
+        # The contacts are traced after everybody has moved, like the spread of the virus.
+        if self.choice_of_measure == 'contact_tracing':
+            self.trace_contacts([agent for agent in self.schedule.active_agents if agent.virus.is_infectious()])
+            if profiler is not None:
+                profiler.record(PHASE_CONTACT_TRACING, start)
 
         self.total_steps = self.schedule.steps + self.virtual_steps
+        if profiler is not None:
+            profiler.record_step(step_start, recorded)
+        if self.counters is not None:
+            self.counters.record_step()
 
 
 def agent_portrayal(agent: VirusAgent):
@@ -522,68 +726,67 @@ def agent_portrayal(agent: VirusAgent):
 
 # Functions for the Datacollector
 def get_infection_rate(model: VirusModel) -> int:
-    return int(np.sum([agent.virus.is_infected() for agent in model.schedule.agents]))
+    return model.state_counters.count_infected()
 
 
 def get_death_count(model: VirusModel) -> int:
-    return int(np.sum([agent.virus.disease_state == DiseaseState.DECEASED for agent in model.schedule.agents]))
+    return model.state_counters.count(DiseaseState.DECEASED)
 
 
 def get_quarantined_count(model: VirusModel) -> int:
-    return int(np.sum([agent.quarantine for agent in model.schedule.agents]))
+    return model.state_counters.count_quarantined()
 
 
 def get_healty_count(model: VirusModel) -> int:
-    return int(np.sum([agent.virus.disease_state == DiseaseState.HEALTHY for agent in model.schedule.agents]))
+    return model.state_counters.count(DiseaseState.HEALTHY)
 
 
 def get_recovered_count(model: VirusModel) -> int:
-    return int(np.sum([agent.virus.disease_state == DiseaseState.RECOVERED for agent in model.schedule.agents]))
+    return model.state_counters.count(DiseaseState.RECOVERED)
 
 
 def get_infected_count(model: VirusModel) -> int:
-    return int(np.sum([agent.virus.disease_state == DiseaseState.INFECTED for agent in model.schedule.agents]))
+    return model.state_counters.count(DiseaseState.INFECTED)
 
 
 def get_testable_count(model: VirusModel) -> int:
-    return int(np.sum([agent.virus.disease_state == DiseaseState.TESTABLE for agent in model.schedule.agents]))
+    return model.state_counters.count(DiseaseState.TESTABLE)
 
 
 def get_infectious_count(model: VirusModel) -> int:
-    return int(np.sum([agent.virus.disease_state == DiseaseState.INFECTIOUS for agent in model.schedule.agents]))
+    return model.state_counters.count(DiseaseState.INFECTIOUS)
 
 
 def get_symptomatic_count(model: VirusModel) -> int:
-    return int(np.sum([agent.virus.disease_state == DiseaseState.SYMPTOMATIC for agent in model.schedule.agents]))
+    return model.state_counters.count(DiseaseState.SYMPTOMATIC)
 
 
 def get_tested_count(model: VirusModel) -> int:
-    return int(np.sum([agent.virus_test.get_test_stats().get_total_count() for agent in model.schedule.agents]))
+    return model.test_stats.get_total_count()
 
 
 def get_tested_pending_count(model: VirusModel) -> int:
-    return int(np.sum([agent.virus_test.get_test_stats().get_pending_count() for agent in model.schedule.agents]))
+    return model.test_stats.get_pending_count()
 
 
 def get_tested_positive_count(model: VirusModel) -> int:
-    return int(np.sum([agent.virus_test.get_test_stats().get_positive_count() for agent in model.schedule.agents]))
+    return model.test_stats.get_positive_count()
 
 
 def get_tested_negative_count(model: VirusModel) -> int:
-    return int(np.sum([agent.virus_test.get_test_stats().get_negative_count() for agent in model.schedule.agents]))
+    return model.test_stats.get_negative_count()
 
 
 def get_quarantined_infected(model: VirusModel) -> int:
-    return int(np.sum([agent.quarantine & (agent.virus.is_infected()) for agent in model.schedule.agents]))
+    return model.state_counters.count_infected(True)
 
 
 def get_quarantined_healthy(model: VirusModel) -> int:
-    return int(
-        np.sum([agent.quarantine & (not agent.virus.is_infected()) for agent in model.schedule.agents]))
+    return model.state_counters.count_not_infected(True)
 
 
 def get_notquarantined_infected(model: VirusModel) -> int:
-    return int(np.sum([(agent.quarantine is False) & (agent.virus.is_infected()) for agent in model.schedule.agents]))
+    return model.state_counters.count_infected(False)
 
 
 disease_states = [DiseaseState.DECEASED, DiseaseState.HEALTHY, DiseaseState.RECOVERED, DiseaseState.INFECTED,
@@ -1,4 +1,10 @@
 
 
 LOG_PATH = "log.txt"
-MODEL_DATA_PATH = "model.pickle"
+MODEL_DATA_PATH = "model.npz"
+LEGACY_MODEL_DATA_PATH = "model.pickle"
+STREAM_DATA_PATH = "model.stream"
+AGGREGATE_DATA_SUFFIX = "_aggregate.csv"
+PROFILE_PATH = "profile.txt"
+PROFILE_TRACE_PATH = "profile_trace.csv"
+WORK_COUNTERS_PATH = "work_counters.csv"
@@ -0,0 +1,250 @@
+"""
+This module stores the data collected during a run of the model in a compact, columnar format.
+
+Every column is stored as a separate (compressed) fixed-width array in a NumPy NPZ file, together with a small JSON
+file containing the names of the columns, the last row and the settings of the run. Reading a single column only
+decompresses that column and reading the last row doesn't decompress any of the columns at all.
+
+The files can also be read using `numpy.load`.
+"""
+
+import json
+import os
+import zipfile
+from typing import Any, Dict, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from virus_model.noviz.constants import MODEL_DATA_PATH, LEGACY_MODEL_DATA_PATH, STREAM_DATA_PATH
+from virus_model.streaming_collector import read_stream
+
+METADATA_FILE = "metadata.json"
+"""
+The name of the file with the metadata (the names of the columns, the last row and the settings) in the archive.
+"""
+
+COLUMN_KEY_FORMAT = "column_{}"
+"""
+The format of the key of the array of a column, using its index. The names of the columns themselves aren't used as
+keys, as they can contain characters that aren't allowed in file names. In the archive, every column is stored as
+'{key}.npy'.
+"""
+
+
+def get_column_dtype(values: np.ndarray) -> np.dtype:
+    """
+    Gets the smallest fixed-width type that can store all the values of a column without any loss.
+
+    :param values: The values of the column.
+    :return: The type to store the column as.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in 'iub' or (values.dtype.kind in 'fO' and len(values) > 0 and
+                                      np.all(np.mod(values.astype(float), 1) == 0)):
+        values = values.astype(np.int64)
+        if len(values) == 0 or (values.min() >= np.iinfo(np.int32).min and values.max() <= np.iinfo(np.int32).max):
+            return np.dtype(np.int32)
+        return np.dtype(np.int64)
+    return np.dtype(np.float64)
+
+
+class ArchiveColumns(Mapping[str, np.ndarray]):
+    """
+    Lazily reads the arrays of the columns from an archive. See `ModelData.write`.
+    """
+
+    def __init__(self, archive: zipfile.ZipFile):
+        """
+        :param archive: The archive to read the columns from.
+        """
+        self.archive = archive
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        with self.archive.open(key + ".npy") as file:
+            return np.lib.format.read_array(file, allow_pickle=False)
+
+    def __iter__(self):
+        return (name[:-len(".npy")] for name in self.archive.namelist() if name.endswith(".npy"))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class StreamColumns(Mapping[str, np.ndarray]):
+    """
+    Lazily converts the columns of the data written by a `StreamingDataCollector` to their own types, one at a time.
+    """
+
+    def __init__(self, values: np.ndarray):
+        """
+        :param values: The values of all the columns. See `read_stream`.
+        """
+        self.values = values
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        idx = int(key[len(COLUMN_KEY_FORMAT.format("")):])
+        values = self.values[:, idx]
+        return np.array(values, dtype=get_column_dtype(values))
+
+    def __iter__(self):
+        return (COLUMN_KEY_FORMAT.format(idx) for idx in range(self.values.shape[1]))
+
+    def __len__(self) -> int:
+        return self.values.shape[1]
+
+    def close(self) -> None:
+        """
+        Releases the values, so the memory map of the file they are read from is closed (see `read_stream`). A file
+        can't be removed while it's mapped on all platforms, e.g. on Windows.
+        """
+        self.values = None
+
+
+class ModelData:
+    """
+    The data collected during a single run of the model. See `load_model_data`.
+
+    Model data that's loaded from a file (or from the data of a `StreamingDataCollector`) keeps the file open until
+    `close` is called, so it can read the columns when they are requested. It can also be used as a context manager.
+    """
+
+    def __init__(self, columns: List[str], arrays: Mapping[str, np.ndarray], last_row: List[Any],
+                 settings: Dict[str, Any], archive: Optional[zipfile.ZipFile] = None):
+        """
+        :param columns: The names of all the columns.
+        :param arrays: The arrays of the columns, by their key. See `COLUMN_KEY_FORMAT`.
+        :param last_row: The values of the last row, in the same order as the columns.
+        :param settings: The settings of the run.
+        :param archive: The archive the columns are read from, if any.
+        """
+        self.columns = columns
+        self.__arrays = arrays
+        self.__last_row = last_row
+        self.settings = settings
+        self.__archive = archive
+
+    def __enter__(self) -> 'ModelData':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Closes the file this model data was loaded from, if any.
+        """
+        if self.__archive is not None:
+            self.__archive.close()
+        if isinstance(self.__arrays, StreamColumns):
+            self.__arrays.close()
+
+    @staticmethod
+    def from_dataframe(data: pd.DataFrame, settings: Optional[Dict[str, Any]] = None) -> 'ModelData':
+        """
+        Creates the model data from the DataFrame of a `DataCollector`.
+
+        :param data: The collected data.
+        :param settings: The settings of the run.
+        :return: The model data.
+        """
+        columns = [str(column) for column in data.columns]
+        arrays = {}
+        for idx, column in enumerate(data.columns):
+            values = data[column].to_numpy()
+            arrays[COLUMN_KEY_FORMAT.format(idx)] = values.astype(get_column_dtype(values))
+
+        last_row = [arrays[COLUMN_KEY_FORMAT.format(idx)][-1].item() if len(data) > 0 else 0
+                    for idx in range(len(columns))]
+        return ModelData(columns, arrays, last_row, settings if settings is not None else {})
+
+    @staticmethod
+    def from_stream(file: str, settings: Optional[Dict[str, Any]] = None) -> 'ModelData':
+        """
+        Creates the model data from the file written by a `StreamingDataCollector`. The columns are only read from the
+        file when they are requested, so the whole run is never in memory at once.
+
+        :param file: The file written by the collector.
+        :param settings: The settings of the run.
+        :return: The model data.
+        """
+        columns, values = read_stream(file)
+        last_row = [0] * len(columns)
+        if len(values) > 0:
+            last_row = [int(value) if value.is_integer() else value for value in values[-1].tolist()]
+        return ModelData(columns, StreamColumns(values), last_row, settings if settings is not None else {})
+
+    @staticmethod
+    def load(file: str) -> 'ModelData':
+        """
+        Loads model data from a file. The columns are only read when they are requested.
+
+        :param file: The file to load. See `write`.
+        :return: The model data.
+        """
+        archive = zipfile.ZipFile(file)
+        metadata = json.loads(archive.read(METADATA_FILE))
+        return ModelData(metadata["columns"], ArchiveColumns(archive), metadata["last_row"], metadata["settings"],
+                         archive)
+
+    def get_column(self, column: str) -> np.ndarray:
+        """
+        Gets all the values of a single column.
+
+        :param column: The name of the column.
+        :return: The values of the column for every step.
+        """
+        return self.__arrays[COLUMN_KEY_FORMAT.format(self.columns.index(column))]
+
+    def get_last(self, column: str) -> Any:
+        """
+        Gets the value of a column in the last row.
+
+        :param column: The name of the column.
+        :return: The value of the column at the end of the run.
+        """
+        return self.__last_row[self.columns.index(column)]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Reads all the columns into a DataFrame.
+
+        :return: The DataFrame with all the columns.
+        """
+        return pd.DataFrame({column: self.get_column(column) for column in self.columns}, columns=self.columns)
+
+    def write(self, file: str) -> None:
+        """
+        Writes this model data to a compressed NPZ file.
+
+        :param file: The file to write to. It should use the '.npz' extension.
+        """
+        with zipfile.ZipFile(file, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(METADATA_FILE, json.dumps({"columns": self.columns, "last_row": self.__last_row,
+                                                        "settings": self.settings}))
+            for idx in range(len(self.columns)):
+                key = COLUMN_KEY_FORMAT.format(idx)
+                with archive.open(key + ".npy", 'w') as output:
+                    np.lib.format.write_array(output, np.asarray(self.__arrays[key]), allow_pickle=False)
+
+
+def load_model_data(directory: str, partial: bool = False) -> Optional[ModelData]:
+    """
+    Loads the model data of a run from its output directory. This also supports the legacy pickle format.
+
+    :param directory: The output directory of the run.
+    :param partial: Whether to fall back to the data streamed by a run that didn't finish (e.g. because it crashed).
+    :return: The model data or None if the directory doesn't contain any model data.
+    """
+    model_data_path = directory.rstrip(os.sep) + os.sep + MODEL_DATA_PATH
+    if os.path.exists(model_data_path):
+        return ModelData.load(model_data_path)
+
+    legacy_model_data_path = directory.rstrip(os.sep) + os.sep + LEGACY_MODEL_DATA_PATH
+    if os.path.exists(legacy_model_data_path):
+        return ModelData.from_dataframe(pd.read_pickle(legacy_model_data_path))
+
+    stream_data_path = directory.rstrip(os.sep) + os.sep + STREAM_DATA_PATH
+    if partial and os.path.exists(stream_data_path):
+        return ModelData.from_stream(stream_data_path)
+    return None
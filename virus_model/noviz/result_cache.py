@@ -0,0 +1,165 @@
+"""
+This module allows the results of experiments to be reused when an experiment with exactly the same settings is run
+again. Every result is stored under a key that is derived from all the settings of the experiment as well as the
+version of the code of the model, so changing the model automatically invalidates all earlier results.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+from typing import Any, Dict, Optional
+
+import mesa
+import numpy as np
+
+from virus_model.util import write_atomically
+
+CACHE_FILE_EXTENSION = ".npz"
+"""
+The extension of the files in the cache.
+"""
+
+DEFAULT_CACHE_SIZE = 1024
+"""
+The default maximum size of the cache in megabytes.
+"""
+
+TEST_DIRECTORY = "unittest"
+"""
+The directory of the tests in the package of the model. Its files don't affect the results, so they are not part of
+the version stamp of the code.
+"""
+
+
+def get_code_version() -> str:
+    """
+    Gets the version stamp of the code of the model. This is a hash of all the source files of the package of the model
+    (except for its tests) and the script that runs it, as well as the versions of the libraries that affect the results.
+
+    :return: The version stamp of the code of the model.
+    """
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    root_dir = os.path.dirname(package_dir)
+    test_dir = os.path.join(package_dir, TEST_DIRECTORY)
+    source_files = glob.glob(os.path.join(package_dir, "**", "*.py"), recursive=True)
+    source_files = sorted(file for file in source_files if not file.startswith(test_dir + os.sep))
+    source_files.append(os.path.join(root_dir, "run_model_noviz.py"))
+
+    digest = hashlib.sha256()
+    digest.update("mesa={};numpy={}".format(mesa.__version__, np.__version__).encode())
+    for source_file in source_files:
+        if os.path.exists(source_file):
+            digest.update(os.path.relpath(source_file, root_dir).replace(os.sep, "/").encode())
+            with open(source_file, 'rb') as file:
+                digest.update(file.read())
+    return digest.hexdigest()
+
+
+def get_cache_key(settings: Dict[str, Any], code_version: str) -> str:
+    """
+    Gets the key of the result of an experiment.
+
+    :param settings: All the settings that affect the result of the experiment, including the random seed.
+    :param code_version: The version stamp of the code of the model. See `get_code_version`.
+    :return: The key of the result of the experiment.
+    """
+    content = json.dumps({"settings": settings, "code_version": code_version}, sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Stores the model data of finished experiments in a directory, with one file per key.
+
+    When the total size of the cache exceeds its maximum size, the least recently used results are removed.
+    Multiple processes can safely share the same cache directory.
+    """
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_CACHE_SIZE):
+        """
+        :param directory: The directory to store the results in. It is created if it doesn't exist yet.
+        :param max_size: The maximum size of the cache in megabytes.
+        """
+        self.directory = directory.rstrip(os.sep)
+        self.max_size = max_size
+        os.makedirs(self.directory, exist_ok=True)
+
+    def __get_path(self, key: str) -> str:
+        """
+        Gets the path of the file of a result in the cache.
+
+        :param key: The key of the result. See `get_cache_key`.
+        :return: The path of the file of the result.
+        """
+        return self.directory + os.sep + key + CACHE_FILE_EXTENSION
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Gets the file of a result from the cache, if the cache contains it.
+
+        :param key: The key of the result. See `get_cache_key`.
+        :return: The path of the file containing the result, or None if the cache doesn't contain it.
+        """
+        path = self.__get_path(key)
+        try:
+            # Mark the result as recently used, so it's removed last.
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def copy_to(self, key: str, destination: str) -> bool:
+        """
+        Copies a result from the cache to a file, if the cache contains it. Unlike using the path returned by `get`,
+        this also handles another process removing the result in the meantime (see `evict`), as a miss.
+
+        :param key: The key of the result. See `get_cache_key`.
+        :param destination: The file to copy the result to. It is written atomically, so it is never left incomplete.
+        :return: True if the result was copied, False if the cache doesn't contain it.
+        """
+        path = self.__get_path(key)
+        try:
+            # Mark the result as recently used, so it's removed last.
+            os.utime(path)
+            write_atomically(destination, lambda temp_file: shutil.copyfile(path, temp_file))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put(self, key: str, file: str) -> None:
+        """
+        Stores a copy of a result in the cache and removes old results if the cache became too large.
+
+        :param key: The key of the result. See `get_cache_key`.
+        :param file: The file containing the result.
+        """
+        write_atomically(self.__get_path(key), lambda temp_file: shutil.copyfile(file, temp_file))
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used results until the size of the cache is no larger than its maximum size.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(CACHE_FILE_EXTENSION):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        max_size = self.max_size * 1024 * 1024
+        for _, size, path in sorted(entries):
+            if total_size <= max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Another process removed it already.
+                pass
+            total_size -= size
@@ -21,7 +21,7 @@ sys.path.insert(0, str(parent_dir.parent.parent))
 
 # from virus_model.util import get_directory
 from virus_model.util import get_directory
-from virus_model.noviz.constants import MODEL_DATA_PATH
+from virus_model.noviz.model_data import ModelData, load_model_data
 
 
 class Statistic:
@@ -33,15 +33,16 @@ class Statistic:
         """
         :param name: The name of this statistic. The name is used as the column name in the final CSV file.
         :param function: The function reference or lambda that can parse the data into a single value for the CSV file.
+        The data is given as `ModelData`, so only the columns that are actually used are read.
 
         Lambda example:
         Given a data set 'data':
-        => Statistic('name', lambda data: data[['infected']].max())
+        => Statistic('name', lambda data: data.get_column('infected').max())
 
         function ref example:
         Given a data set 'data' and the following method:
           def stat_method(data):
-              return data[['infected']].max()
+              return data.get_column('infected').max()
 
         => Statistic('name', stat_method)
         """
@@ -56,7 +57,7 @@ class Statistic:
         """
         return self.__name
 
-    def get_result(self, data: pd.DataFrame):
+    def get_result(self, data: ModelData):
         """
         Parses the data into a single entry for the CSV file.
 
@@ -81,16 +82,16 @@ class StatisticManager:
         """
         self.__statistics.append(statistic)
 
-    def parse_input(self, data: pd.DataFrame, file_name: str) -> None:
+    def parse_input(self, data: ModelData, file_name: str) -> None:
         """
         Parses the input using the list of registered statistics.
 
         :param data: The data of an experiment.
-        :param file_name: The name of the folder the pickle file was read from.
+        :param file_name: The name of the folder the model data was read from.
         This will be used as the value in the names column of the CSV file.
         """
         row = [file_name]
-        [row.extend(stat.get_result(data)) for stat in self.__statistics]
+        row.extend(stat.get_result(data) for stat in self.__statistics)
         self.__data.append(row)
 
     def write_csv(self, file: str) -> None:
@@ -118,37 +119,39 @@ def main(raw_args=None):
     directory = get_directory(args.input)
 
     statistics_manager = StatisticManager()
-    statistics_manager.register_statistic(Statistic("Death count", lambda data: data[['deaths']].iloc[-1]))
+    statistics_manager.register_statistic(Statistic("Death count", lambda data: data.get_last('deaths')))
     statistics_manager.register_statistic(Statistic("Total infected",
-                                                    lambda data: pd.DataFrame(data['deaths'] + data['infected'] +
-                                                                              data['recovered']).iloc[-1]))
-    statistics_manager.register_statistic(Statistic("Total tests", lambda data: data[['tested total']].iloc[-1]))
-    statistics_manager.register_statistic(Statistic("Positive Tests", lambda data: data[['tested positive']].iloc[-1]))
-    statistics_manager.register_statistic(Statistic("Negative Tests", lambda data: data[['tested negative']].iloc[-1]))
-    statistics_manager.register_statistic(Statistic("Peak Infected", lambda data: data[['infected']].max()))
-    statistics_manager.register_statistic(Statistic("Peak Quarantined", lambda data: data[['quarantined']].max()))
+                                                    lambda data: data.get_last('deaths') + data.get_last('infected') +
+                                                    data.get_last('recovered')))
+    statistics_manager.register_statistic(Statistic("Total tests", lambda data: data.get_last('tested total')))
+    statistics_manager.register_statistic(Statistic("Positive Tests", lambda data: data.get_last('tested positive')))
+    statistics_manager.register_statistic(Statistic("Negative Tests", lambda data: data.get_last('tested negative')))
+    statistics_manager.register_statistic(Statistic("Peak Infected", lambda data: data.get_column('infected').max()))
+    statistics_manager.register_statistic(Statistic("Peak Quarantined",
+                                                    lambda data: data.get_column('quarantined').max()))
 
     statistics_manager.register_statistic(
-        Statistic("Peak Infected Quarantined", lambda data: data[['quarantined: infected']].max()))
+        Statistic("Peak Infected Quarantined", lambda data: data.get_column('quarantined: infected').max()))
     statistics_manager.register_statistic(
-        Statistic("Peak Healthy Quarantined", lambda data: data[['quarantined: healthy']].max()))
+        Statistic("Peak Healthy Quarantined", lambda data: data.get_column('quarantined: healthy').max()))
     statistics_manager.register_statistic(
-        Statistic("Peak Infected Not Quarantined", lambda data: data[['not quarantined: infected']].max()))
+        Statistic("Peak Infected Not Quarantined", lambda data: data.get_column('not quarantined: infected').max()))
     statistics_manager.register_statistic(Statistic("Peak Difference Healthy to Infected Quarantined",
-                                                    lambda data: pd.DataFrame(data['quarantined: healthy'] - data[
-                                                        'quarantined: infected']).max()))
+                                                    lambda data: (data.get_column('quarantined: healthy') -
+                                                                  data.get_column('quarantined: infected')).max()))
 
     count = 0
     for entry in os.scandir(directory):
         if not entry.is_dir():
             continue
 
-        model_data = entry.path + os.sep + MODEL_DATA_PATH
-        if not os.path.exists(model_data):
+        model_data = load_model_data(entry.path)
+        if model_data is None:
             continue
 
         count += 1
-        statistics_manager.parse_input(pd.read_pickle(model_data), entry.name)
+        with model_data:
+            statistics_manager.parse_input(model_data, entry.name)
 
     # If no results were found at all, remind the user how to use this script and abort.
     if count == 0:
@@ -158,9 +161,9 @@ def main(raw_args=None):
 
       the_top_dir
       |- experiment_1
-      |  |- model.pickle
+      |  |- model.npz
       |- experiment_2
-      |  |- model.pickle
+      |  |- model.npz
     ''')
         exit(0)
 
@@ -4,15 +4,13 @@ import os
 import sys
 from pathlib import Path
 
-import pandas
-
 # Add the files from the super modules, so we can import get_directory from util.
 current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parent_dir = Path(current_dir)
 sys.path.insert(0, str(parent_dir.parent.parent))
 
 from virus_model import util
-from virus_model.noviz.constants import MODEL_DATA_PATH
+from virus_model.noviz.model_data import load_model_data
 from virus_model.noviz.visualize import Visualizer
 
 parser = argparse.ArgumentParser(description='Run the model using the provided parameters')
@@ -24,10 +22,14 @@ args = parser.parse_args()
 
 directory = util.get_directory(args.input)
 
-model_data_path = directory.rstrip(os.sep) + os.sep + MODEL_DATA_PATH
-model_data = pandas.read_pickle(model_data_path)
+# Also show the data of runs that didn't finish, so it's possible to see what happened before they crashed.
+model_data = load_model_data(directory, partial=True)
+if model_data is None:
+    raise FileNotFoundError("No model data found in: \"{}\"!".format(directory))
 
 if not args.write and not args.show:
     raise RuntimeError("Not showing or saving the plots... Please specify at least one action!")
 
-Visualizer(model_data, directory, save_file=args.write, show_file=args.show).visualize_all()
+with model_data:
+    data = model_data.to_dataframe()
+Visualizer(data, directory, save_file=args.write, show_file=args.show).visualize_all()
@@ -0,0 +1,320 @@
+"""
+This module allows you to describe a whole set of experiments (a 'sweep') in a single JSON file instead of writing every
+experiment by hand. See `Sweep` for the format of the file.
+"""
+
+import itertools
+import json
+import math
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+DESIGNS = ['grid', 'lhs', 'sobol']
+"""
+The supported designs. 'grid' runs every combination of the values of all parameters, 'lhs' samples the parameter space
+using a Latin hypercube and 'sobol' samples it using a Sobol sequence.
+"""
+
+SOBOL_BITS = 32
+"""
+The number of bits of precision of the Sobol sequence. This limits the number of points to 2^SOBOL_BITS.
+"""
+
+SOBOL_DIRECTIONS = [
+    (1, 0, [1]),
+    (2, 1, [1, 3]),
+    (3, 1, [1, 3, 1]),
+    (3, 2, [1, 1, 1]),
+    (4, 1, [1, 1, 3, 3]),
+    (4, 4, [1, 3, 5, 13]),
+    (5, 2, [1, 1, 5, 5, 17]),
+    (5, 4, [1, 1, 5, 5, 5]),
+    (5, 7, [1, 1, 7, 11, 19]),
+    (5, 11, [1, 1, 5, 1, 1]),
+    (5, 13, [1, 1, 1, 3, 11]),
+    (5, 14, [1, 3, 5, 5, 31]),
+    (6, 1, [1, 3, 3, 9, 7, 49]),
+    (6, 13, [1, 1, 1, 15, 21, 21]),
+    (6, 16, [1, 3, 1, 13, 27, 49]),
+]
+"""
+The (degree, coefficients, initial direction numbers) of the primitive polynomials used for the 2nd and further
+dimensions of the Sobol sequence, taken from the 'new-joe-kuo-6.21201' table by S. Joe and F. Y. Kuo.
+The first dimension doesn't need a polynomial.
+"""
+
+
+class Parameter:
+    """
+    Describes the values a single argument of `run_model_noviz` can take in a sweep.
+
+    A parameter is either a list of choices ({"values": [...]}) or a range ({"min": ..., "max": ...}). Ranges with a
+    "step" can be used in every design, ranges without a "step" only when sampling (LHS/Sobol). Ranges of integers
+    produce integers. Use {"type": "float"} to sample floats from a range of integers.
+    """
+
+    def __init__(self, name: str, spec: Dict[str, Any]):
+        """
+        :param name: The name of the argument of `run_model_noviz` (without the leading '--').
+        :param spec: The specification of the values of the parameter.
+        """
+        self.name = name
+
+        if "values" in spec:
+            self.values: List[Any] = list(spec["values"])
+            if len(self.values) == 0:
+                raise ValueError("Parameter '{}' does not have any values!".format(name))
+            self.min = self.max = None
+            self.is_int = False
+            return
+
+        if "min" not in spec or "max" not in spec:
+            raise ValueError("Parameter '{}' needs either a list of 'values' or a 'min' and 'max'!".format(name))
+
+        self.min = spec["min"]
+        self.max = spec["max"]
+        if self.min > self.max:
+            raise ValueError("Parameter '{}' has a 'min' that is larger than its 'max'!".format(name))
+
+        self.is_int = spec.get("type", "int" if all(isinstance(value, int) for value in (self.min, self.max)) else
+                               "float") == "int"
+
+        self.values = None
+        if "step" in spec:
+            count = int(math.floor((self.max - self.min) / spec["step"] + 1e-9)) + 1
+            self.values = [self.__convert(self.min + idx * spec["step"]) for idx in range(count)]
+
+    def __convert(self, value: float) -> Any:
+        """
+        Converts a value in the range of this parameter to the type of this parameter.
+
+        :param value: The value to convert.
+        :return: The value as int or float.
+        """
+        return int(round(value)) if self.is_int else float(value)
+
+    def get_grid_values(self) -> List[Any]:
+        """
+        Gets all the values of this parameter to use in a grid design.
+
+        :return: All the values of this parameter.
+        """
+        if self.values is None:
+            raise ValueError("Parameter '{}' needs a 'step' or a list of 'values' to be used in a grid!"
+                             .format(self.name))
+        return self.values
+
+    def get_sampled_value(self, unit: float) -> Any:
+        """
+        Gets the value of this parameter for a sample in the range [0, 1).
+
+        :param unit: The sampled value in the range [0, 1).
+        :return: The value of this parameter for the sample.
+        """
+        if self.values is not None:
+            return self.values[min(int(unit * len(self.values)), len(self.values) - 1)]
+        if self.is_int:
+            # Every integer in the range gets the same share of the unit interval.
+            return min(self.min + int(unit * (self.max - self.min + 1)), self.max)
+        return float(self.min + unit * (self.max - self.min))
+
+
+def latin_hypercube(count: int, dimensions: int, rand: np.random.Generator) -> Iterator[np.ndarray]:
+    """
+    Generates the points of a Latin hypercube sample. Every dimension is split into `count` equally sized strata and
+    every stratum of every dimension contains exactly one point.
+
+    Only the permutation of the strata is stored for every dimension; the points themselves are generated one by one.
+
+    :param count: The number of points.
+    :param dimensions: The number of dimensions of every point.
+    :param rand: The random generator to use.
+    :return: The points, each with values in the range [0, 1).
+    """
+    strata = np.stack([rand.permutation(count) for _ in range(dimensions)], axis=1) if dimensions > 0 else \
+        np.empty((count, 0), dtype=int)
+    for idx in range(count):
+        yield (strata[idx] + rand.random(dimensions)) / count
+
+
+def sobol_sequence(count: int, dimensions: int) -> Iterator[np.ndarray]:
+    """
+    Generates the first points of the (unscrambled) Sobol sequence, starting at the origin.
+
+    :param count: The number of points.
+    :param dimensions: The number of dimensions of every point.
+    :return: The points, each with values in the range [0, 1).
+    """
+    if dimensions > len(SOBOL_DIRECTIONS) + 1:
+        raise ValueError("Sobol designs support at most {} parameters!".format(len(SOBOL_DIRECTIONS) + 1))
+    if count > 2 ** SOBOL_BITS:
+        raise ValueError("Sobol designs support at most 2^{} points!".format(SOBOL_BITS))
+
+    directions = np.zeros((dimensions, SOBOL_BITS), dtype=np.uint64)
+    for dimension in range(dimensions):
+        if dimension == 0:
+            initial = [1] * SOBOL_BITS
+            degree = SOBOL_BITS
+            coefficients = 0
+        else:
+            degree, coefficients, initial = SOBOL_DIRECTIONS[dimension - 1]
+
+        values = [0] * SOBOL_BITS
+        for bit in range(SOBOL_BITS):
+            if bit < degree:
+                values[bit] = initial[bit] << (SOBOL_BITS - 1 - bit)
+            else:
+                value = values[bit - degree] ^ (values[bit - degree] >> degree)
+                for term in range(1, degree):
+                    if (coefficients >> (degree - 1 - term)) & 1:
+                        value ^= values[bit - term]
+                values[bit] = value
+        directions[dimension] = values
+
+    point = np.zeros(dimensions, dtype=np.uint64)
+    for idx in range(count):
+        yield point.astype(float) / 2 ** SOBOL_BITS
+        if idx + 1 < count:
+            # Gray code ordering: the next point only differs in the direction of the lowest zero bit of the index.
+            point ^= directions[:, ((idx + 1) & -(idx + 1)).bit_length() - 1]
+
+
+class Sweep:
+    """
+    Describes a set of experiments. A sweep is specified as a JSON object, e.g.:
+
+    {
+      "name": "Tracing",
+      "design": "grid",
+      "replicates": 10,
+      "seed": 42,
+      "fixed": {"stepCount": 2000, "mitigation": "contact_tracing", "write-plots": true},
+      "parameters": {
+        "participationTracing": {"min": 0, "max": 100, "step": 20},
+        "testDelay": {"values": [1, 2, 5]}
+      }
+    }
+
+    The keys are:
+    - name: The prefix of the names of the experiments. Every experiment gets the name '{name}{point}_{replicate}'.
+    - design: One of `DESIGNS`. Defaults to 'grid'.
+    - samples: The number of points to sample in the parameter space. Required for 'lhs' and 'sobol'.
+    - replicates: The number of times to run every point with a different random seed. Defaults to 1.
+    - seed: The random seed of replicate 0. Replicate r uses 'seed + r' for every point, so all points are compared
+      using the same random seeds. This seed is also used to generate the Latin hypercube. Defaults to 0.
+    - batch: When true, all the replicates of a point are run at once as a single experiment with '--replicates' (see
+      `VectorizedVirusModel`). This requires the 'vectorized' engine. Defaults to false.
+    - fixed: The arguments of `run_model_noviz` that are the same for every experiment. Use true to pass a flag and
+      false to leave it out.
+    - parameters: The arguments of `run_model_noviz` that vary between experiments. See `Parameter`.
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        """
+        :param spec: The specification of the sweep.
+        """
+        self.name: str = spec.get("name", "sweep")
+        if not self.name or any(character.isspace() for character in self.name):
+            raise ValueError("The name of a sweep cannot be empty or contain spaces: \"{}\"!".format(self.name))
+
+        self.design: str = spec.get("design", "grid")
+        if self.design not in DESIGNS:
+            raise ValueError("Unknown design '{}'! Please use one of: {}".format(self.design, DESIGNS))
+
+        self.replicates: int = spec.get("replicates", 1)
+        self.seed: int = spec.get("seed", 0)
+        # A single replicate is run on its own, so it gets the same name as it would without batching.
+        self.batch: bool = spec.get("batch", False) and self.replicates > 1
+        self.fixed: Dict[str, Any] = spec.get("fixed", {})
+        self.parameters = [Parameter(name, parameter) for name, parameter in spec.get("parameters", {}).items()]
+
+        if "random-seed" in self.fixed or any(parameter.name == "random-seed" for parameter in self.parameters):
+            raise ValueError("The random seed is set using 'seed' and 'replicates', not as an argument!")
+
+        if "replicates" in self.fixed or any(parameter.name == "replicates" for parameter in self.parameters):
+            raise ValueError("The number of replicates is set using 'replicates', not as an argument!")
+
+        if self.batch and self.fixed.get("engine") != "vectorized":
+            raise ValueError("Batching the replicates requires the 'vectorized' engine!")
+
+        if self.design == 'grid':
+            self.samples = int(np.prod([len(parameter.get_grid_values()) for parameter in self.parameters]))
+        elif "samples" not in spec:
+            raise ValueError("The '{}' design requires the number of 'samples'!".format(self.design))
+        else:
+            self.samples: int = spec["samples"]
+
+    @staticmethod
+    def load(file: str) -> 'Sweep':
+        """
+        Loads a sweep from a JSON file.
+
+        :param file: The JSON file containing the specification of the sweep.
+        :return: The loaded sweep.
+        """
+        with open(file, 'r') as spec_file:
+            return Sweep(json.load(spec_file))
+
+    def get_experiment_count(self) -> int:
+        """
+        Gets the total number of experiments in this sweep.
+
+        :return: The number of experiments.
+        """
+        return self.samples if self.batch else self.samples * self.replicates
+
+    def __get_points(self) -> Iterator[Tuple[Any, ...]]:
+        """
+        Gets the values of all the parameters for every point of the design.
+
+        :return: The values of the parameters for every point, in the same order as `self.parameters`.
+        """
+        if self.design == 'grid':
+            yield from itertools.product(*[parameter.get_grid_values() for parameter in self.parameters])
+            return
+
+        if self.design == 'lhs':
+            units = latin_hypercube(self.samples, len(self.parameters), np.random.default_rng(self.seed))
+        else:
+            units = sobol_sequence(self.samples, len(self.parameters))
+
+        for unit in units:
+            yield tuple(parameter.get_sampled_value(value) for parameter, value in zip(self.parameters, unit))
+
+    @staticmethod
+    def __format_arguments(arguments: Dict[str, Any]) -> List[str]:
+        """
+        Formats arguments as commandline arguments for `run_model_noviz`.
+
+        :param arguments: The arguments by name (without the leading '--').
+        :return: The commandline arguments.
+        """
+        formatted = []
+        for name, value in arguments.items():
+            if isinstance(value, bool):
+                if value:
+                    formatted.append("--" + name)
+                continue
+            formatted.extend(["--" + name, str(value)])
+        return formatted
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Lazily generates all the experiments in this sweep.
+
+        :return: The specification of every experiment, in the same format as the lines of an experiments file.
+        """
+        for point, values in enumerate(self.__get_points()):
+            arguments = dict(self.fixed)
+            arguments.update({parameter.name: value for parameter, value in zip(self.parameters, values)})
+            if self.batch:
+                # The replicates get the same names and seeds as they would get when running them separately.
+                arguments.update({"random-seed": self.seed, "replicates": self.replicates})
+                yield " ".join(["{}{}".format(self.name, point)] + self.__format_arguments(arguments))
+                continue
+
+            for replicate in range(self.replicates):
+                name = "{}{}_{}".format(self.name, point, replicate)
+                arguments["random-seed"] = self.seed + replicate
+                yield " ".join([name] + self.__format_arguments(arguments))
@@ -0,0 +1,199 @@
+"""
+Measures where the time of a run goes, per phase of a step and per simulated day.
+
+Profiling is opt-in: a model only measures its phases when its `profiler` is set. When it's None (the default), the only
+cost is a check of that attribute around every phase. Times are measured using `time.perf_counter_ns`, so the
+overhead of an enabled profiler is small as well.
+"""
+import time
+from typing import Dict, List, Optional
+
+PHASE_ROOSTER = "rooster"
+"""
+Making the rooster of the day. See `RoosterModel.make_day_rooster`.
+"""
+
+PHASE_DAY_ROLLOVER = "day rollover"
+"""
+The rest of the start of a new day, i.e. disease progression, testing, quarantines and pruning the contact ledger.
+"""
+
+PHASE_SEATING = "seating"
+"""
+Following the rooster: entering lecture rooms and taking a seat, or leaving them for a random position.
+"""
+
+PHASE_MOVEMENT = "movement"
+"""
+The random walks of the agents that are on a break.
+"""
+
+PHASE_TRANSMISSION = "transmission"
+"""
+The spread of the virus between the agents.
+"""
+
+PHASE_CONTACT_TRACING = "contact tracing"
+"""
+Registering the contacts of the infectious agents.
+"""
+
+PHASE_COLLECT = "data collection"
+"""
+Collecting the values of the reporters of the data collector.
+"""
+
+PHASE_OTHER = "other"
+"""
+The time spent in a step outside of all the other phases, e.g. the overhead of the scheduler.
+"""
+
+PHASES = [PHASE_ROOSTER, PHASE_DAY_ROLLOVER, PHASE_SEATING, PHASE_MOVEMENT, PHASE_TRANSMISSION, PHASE_CONTACT_TRACING,
+          PHASE_COLLECT, PHASE_OTHER]
+"""
+All the phases, in the order they are reported in.
+"""
+
+
+class PhaseProfiler:
+    """
+    Accumulates the wall time and the number of calls of every phase, per simulated day.
+
+    A phase is measured by getting the time at its start using `start` and passing it to `record` at its end. `record`
+    returns the current time, so consecutive phases can be chained without getting the time twice.
+    """
+
+    def __init__(self):
+        self.day = 0
+        """
+        The day that's being simulated. The times of the phases are recorded for this day. This is updated by the
+        model at the start of every day.
+        """
+
+        self.__times: Dict[int, Dict[str, List[int]]] = {}
+        """
+        The total time in nanoseconds and the number of calls of every phase, per day.
+        """
+
+        self.__total = 0
+        """
+        The total time of all the phases on all the days, in nanoseconds.
+        """
+
+    @staticmethod
+    def start() -> int:
+        """
+        Gets the time at the start of a phase.
+
+        :return: The current time in nanoseconds.
+        """
+        return time.perf_counter_ns()
+
+    def record(self, phase: str, start: int) -> int:
+        """
+        Records the time of a phase that has just ended.
+
+        :param phase: The name of the phase. See `PHASES`.
+        :param start: The time at the start of the phase. See `start`.
+        :return: The current time in nanoseconds, which can be used as the start of the next phase.
+        """
+        now = time.perf_counter_ns()
+        self.__add(phase, now - start)
+        return now
+
+    def record_step(self, start: int, recorded: int) -> None:
+        """
+        Records the end of a step. The time of the step that wasn't recorded in any phase is recorded as
+        `PHASE_OTHER`.
+
+        :param start: The time at the start of the step.
+        :param recorded: The total time recorded before the step. See `get_total_time`.
+        """
+        elapsed = time.perf_counter_ns() - start
+        self.__add(PHASE_OTHER, elapsed - (self.__total - recorded))
+
+    def __add(self, phase: str, elapsed: int) -> None:
+        """
+        Adds a call of a phase on the current day.
+
+        :param phase: The name of the phase.
+        :param elapsed: The time of the call in nanoseconds.
+        """
+        day_times = self.__times.get(self.day)
+        if day_times is None:
+            day_times = {}
+            self.__times[self.day] = day_times
+        times = day_times.get(phase)
+        if times is None:
+            day_times[phase] = [elapsed, 1]
+        else:
+            times[0] += elapsed
+            times[1] += 1
+        self.__total += elapsed
+
+    def get_total_time(self) -> int:
+        """
+        Gets the total time recorded so far.
+
+        :return: The total time of all the phases on all the days, in nanoseconds.
+        """
+        return self.__total
+
+    def get_days(self) -> List[int]:
+        """
+        Gets the days that have recorded times.
+
+        :return: The days, in ascending order.
+        """
+        return sorted(self.__times.keys())
+
+    def get_times(self, day: Optional[int] = None) -> Dict[str, List[int]]:
+        """
+        Gets the time and the number of calls of every phase.
+
+        :param day: The day to get the times of. When None, the times of all the days are added up.
+        :return: The total time in nanoseconds and the number of calls of every phase that has been recorded.
+        """
+        if day is not None:
+            return {phase: list(times) for phase, times in self.__times.get(day, {}).items()}
+
+        totals: Dict[str, List[int]] = {}
+        for day_times in self.__times.values():
+            for phase, (elapsed, calls) in day_times.items():
+                total = totals.setdefault(phase, [0, 0])
+                total[0] += elapsed
+                total[1] += calls
+        return totals
+
+    def format_summary(self) -> str:
+        """
+        Formats the totals of all the phases as a table.
+
+        :return: The table, with the total time, the share of the total time, the number of calls and the mean time
+        per call of every phase.
+        """
+        totals = self.get_times()
+        total_time = max(sum(elapsed for elapsed, _ in totals.values()), 1)
+        lines = ["{:<16} {:>12} {:>7} {:>10} {:>14}".format("phase", "time (s)", "share", "calls", "per call (us)")]
+        for phase in PHASES:
+            if phase not in totals:
+                continue
+            elapsed, calls = totals[phase]
+            lines.append("{:<16} {:>12.3f} {:>6.1f}% {:>10} {:>14.2f}".format(
+                phase, elapsed / 1e9, 100 * elapsed / total_time, calls, elapsed / calls / 1e3))
+        lines.append("{:<16} {:>12.3f}".format("total", total_time / 1e9))
+        return "\n".join(lines)
+
+    def write_trace(self, file: str) -> None:
+        """
+        Writes the time and the number of calls of every phase on every day to a CSV file.
+
+        :param file: The file to write the trace to.
+        """
+        with open(file, "w") as trace:
+            trace.write("day,phase,time_ns,calls\n")
+            for day in self.get_days():
+                day_times = self.get_times(day)
+                for phase in PHASES:
+                    if phase in day_times:
+                        trace.write("{},{},{},{}\n".format(day, phase, *day_times[phase]))
@@ -0,0 +1,104 @@
+"""
+Separate random number streams for the different parts of the model.
+
+When every part of the model draws from a single random generator, any change in the number of draws of one part (e.g.
+the draws for contact tracing, which only happen when it is enabled) shifts all the later draws of all the other parts.
+Two runs with the same seed but different mitigation measures then diverge immediately. By giving every part its own,
+independently seeded stream, runs with the same seed share as much of their randomness as possible (common random
+numbers), so the differences between paired runs are mostly caused by the measures themselves.
+"""
+
+import random
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from virus_model.work_counters import WorkCounters
+
+RANDOM_STREAMS = ['placement', 'rooster', 'movement', 'transmission', 'disease', 'testing', 'results', 'tracing']
+"""
+The names of the random streams:
+
+- placement: The initial positions and seats of the agents.
+- rooster: The generation of the daily schedules. See `RoosterModel`.
+- movement: The random walks in the break room, the positions after lectures and the seats in the lecture rooms.
+- transmission: The spread of the virus between agents. See `TransmissionKernel`.
+- disease: The progression of the disease, i.e. whether agents die or recover.
+- testing: Whether agents get a routine test.
+- results: The false negative and false positive results of tests. See `VirusTest`.
+- tracing: Whether traced contacts participate in contact tracing.
+"""
+
+
+class RandomStreams:
+    """
+    A set of independently seeded random streams, one for every name in `RANDOM_STREAMS`. Every stream is available
+    both as a `random.Random` (as an attribute with the name of the stream, for single draws) and as a NumPy
+    `Generator` (see `get_generator`, for drawing many values at once).
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        """
+        :param seed: The seed all the streams are derived from. None means that the streams will be random.
+        """
+        self.placement = random.Random()
+        self.rooster = random.Random()
+        self.movement = random.Random()
+        self.transmission = random.Random()
+        self.disease = random.Random()
+        self.testing = random.Random()
+        self.results = random.Random()
+        self.tracing = random.Random()
+        self.__generators: Dict[str, np.random.Generator] = {}
+        self.__counters: Optional['WorkCounters'] = None
+        """
+        Counts the values drawn from every stream when set. See `set_counters`.
+        """
+        self.seed(seed)
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__counters = None
+        self.__dict__.update(state)
+        # The counting of the draws is not part of the pickled state of the `random.Random` objects.
+        self.set_counters(self.__counters)
+
+    def seed(self, seed: Optional[int]) -> None:
+        """
+        Reseeds all the streams. The `random.Random` objects are reseeded in place, so any references to them remain
+        valid.
+
+        :param seed: The seed all the streams are derived from. None means that the streams will be random.
+        """
+        sequence = np.random.SeedSequence(seed)
+        for name, child in zip(RANDOM_STREAMS, sequence.spawn(len(RANDOM_STREAMS))):
+            random_sequence, generator_sequence = child.spawn(2)
+            getattr(self, name).seed(int.from_bytes(random_sequence.generate_state(4).tobytes(), 'little'))
+            self.__generators[name] = np.random.default_rng(generator_sequence)
+
+    def get_generator(self, name: str) -> np.random.Generator:
+        """
+        Gets the NumPy generator of a stream.
+
+        :param name: The name of the stream. See `RANDOM_STREAMS`.
+        :return: The NumPy generator of the stream.
+        """
+        if self.__counters is not None:
+            return self.__counters.count_generator_draws(name, self.__generators[name])
+        return self.__generators[name]
+
+    def set_counters(self, counters: Optional['WorkCounters']) -> None:
+        """
+        Starts or stops counting the values drawn from every stream. See `virus_model.work_counters`.
+
+        :param counters: The counters to add the draws to. None stops counting.
+        """
+        self.__counters = counters
+        for name in RANDOM_STREAMS:
+            stream = getattr(self, name)
+            if counters is not None:
+                counters.count_random_draws(name, stream)
+            else:
+                # Removes the counting methods added by `WorkCounters.count_random_draws`.
+                vars(stream).pop('random', None)
+                vars(stream).pop('getrandbits', None)
@@ -1,14 +1,16 @@
 import math
 from abc import ABC, abstractmethod
 from random import Random
-from typing import Iterator, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import typing
-from mesa.space import MultiGrid, Coordinate
+from mesa import Agent
+from mesa.space import MultiGrid, Coordinate, GridContent, accept_tuple_argument
 from enum import Enum
 import numpy as np
 
 from virus_model.util import *
+from virus_model.work_counters import WorkCounters, COUNTER_PATH_CHECKS, COUNTER_PATH_WALKS, COUNTER_PATH_CELLS
 
 SNUG_FIT_BUFFER = 5
 """
@@ -20,6 +22,49 @@ HALLWAY_WIDTH = 3
 The width of the hallway.
 """
 
+DEFAULT_OCCLUSION_RADIUS = 2
+"""
+The default maximum distance (in both directions) between two positions for which the result of
+`RoomGrid.is_path_obstructed` is precomputed.
+"""
+
+NO_ROOM_ID = -1
+"""
+The ID used in rasters for positions that aren't part of any room.
+"""
+
+
+def get_cell_buckets(cells: np.ndarray, agents: np.ndarray, cell_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sorts agents by their cell using a counting sort, so all the agents in a cell can be looked up at once.
+
+    :param cells: The index of the cell of every agent.
+    :param agents: The IDs of the agents.
+    :param cell_count: The total number of cells.
+    :return: The index of the first agent of every cell (with an extra entry at the end) and the sorted IDs. Agents in
+    the same cell keep their order.
+    """
+    counts = np.bincount(cells, minlength=cell_count)
+    return np.concatenate(([0], np.cumsum(counts))), agents[np.argsort(cells, kind='stable')]
+
+
+def get_cell_pairs(owners: np.ndarray, cells: np.ndarray,
+                   buckets: Tuple[np.ndarray, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pairs every owner with all the agents in a cell.
+
+    :param owners: The owners.
+    :param cells: For every owner, the index of the cell to pair it with.
+    :param buckets: The agents sorted by their cell. See `get_cell_buckets`.
+    :return: Two arrays (owners, targets), where targets[i] is an agent in the cell of owners[i]. The pairs of every
+    owner are consecutive.
+    """
+    starts, sorted_agents = buckets
+    # Every owner is repeated once for every agent in its cell, which are all the agents in the bucket of that cell.
+    counts = starts[cells + 1] - starts[cells]
+    member = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(owners, counts), sorted_agents[np.repeat(starts[cells], counts) + member]
+
 
 def get_square() -> typing.Dict[str, typing.Union[str, int, float]]:
     portrayal = {"Shape": "rect",
@@ -61,10 +106,31 @@ class Seat:
 
     A seat may be available or unavailable. It is up to the user of this class to respect this.
     """
-    def __init__(self, x: int, y: int):
+    def __init__(self, x: int, y: int, room: 'LectureRoom', index: int):
+        """
+        :param x: The x-coordinate of the seat.
+        :param y: The y-coordinate of the seat.
+        :param room: The `LectureRoom` this seat is in. The room keeps track of which of its seats are available.
+        :param index: The index of this seat in the list of seats of the room.
+        """
         self.x = x
         self.y = y
-        self.available = True
+        self.room = room
+        self.index = index
+
+    @property
+    def available(self) -> bool:
+        """
+        Whether this seat is available. See `LectureRoom.is_seat_available`.
+        """
+        return self.room.is_seat_available(self)
+
+    @available.setter
+    def available(self, available: bool) -> None:
+        if available:
+            self.room.release_seat(self)
+        else:
+            self.room.take_seat(self)
 
 
 class Room(ABC):
@@ -221,6 +287,27 @@ class LectureRoom(Room):
         self.seats: List[Seat] = []
         self.__populate_seats()
 
+        self.seats_by_position: Dict[Tuple[int, int], Seat] = {(seat.x, seat.y): seat for seat in self.seats}
+        """
+        All the seats in this room, indexed by their (x, y) position.
+        """
+
+        self.__seat_order: List[int] = list(range(len(self.seats)))
+        """
+        The indices of all the seats in this room. The first `__taken_count` seats in this list have been taken, the
+        others are available. Seats are swapped around in this list to take or release them.
+        """
+
+        self.__seat_positions: List[int] = list(range(len(self.seats)))
+        """
+        The position of every seat in `__seat_order`, indexed by the index of the seat.
+        """
+
+        self.__taken_count = 0
+        """
+        The number of seats that have been taken.
+        """
+
     # Override
     def get_room_type(self):
         return RoomType.LECTURE_ROOM
@@ -240,10 +327,79 @@ class LectureRoom(Room):
 
         :return: True if there are 1 or more available seats in this room.
         """
-        for seat in self.seats:
-            if seat.available:
-                return True
-        return False
+        return self.__taken_count < len(self.seats)
+
+    def get_available_seat_count(self) -> int:
+        """
+        Gets the number of seats in this room that are still available.
+
+        :return: The number of available seats in this room.
+        """
+        return len(self.seats) - self.__taken_count
+
+    def is_seat_available(self, seat: Seat) -> bool:
+        """
+        Checks if a seat in this room is available.
+
+        :param seat: The seat to check.
+        :return: True if the seat has not been taken.
+        """
+        return self.__seat_positions[seat.index] >= self.__taken_count
+
+    def __swap_seats(self, position_0: int, position_1: int) -> None:
+        """
+        Swaps two seats in `__seat_order`.
+
+        :param position_0: The position of the first seat in `__seat_order`.
+        :param position_1: The position of the second seat in `__seat_order`.
+        """
+        order = self.__seat_order
+        order[position_0], order[position_1] = order[position_1], order[position_0]
+        self.__seat_positions[order[position_0]] = position_0
+        self.__seat_positions[order[position_1]] = position_1
+
+    def take_seat(self, seat: Seat) -> None:
+        """
+        Marks a seat in this room as taken. Nothing happens if the seat has already been taken.
+
+        :param seat: The seat to take.
+        """
+        if self.is_seat_available(seat):
+            self.__swap_seats(self.__seat_positions[seat.index], self.__taken_count)
+            self.__taken_count += 1
+
+    def take_random_seat(self, rand: Optional[Random] = None) -> Optional[Seat]:
+        """
+        Takes one of the available seats in this room.
+
+        :param rand: The random instance used to pick a random seat. When None, any available seat is taken.
+        :return: The seat that was taken, or None if no seats are available.
+        """
+        if not self.room_available():
+            return None
+
+        position = self.__taken_count
+        if rand is not None:
+            position = rand.randrange(self.__taken_count, len(self.seats))
+        seat = self.seats[self.__seat_order[position]]
+        self.take_seat(seat)
+        return seat
+
+    def release_seat(self, seat: Seat) -> None:
+        """
+        Makes a seat in this room available again. Nothing happens if the seat is already available.
+
+        :param seat: The seat to release.
+        """
+        if not self.is_seat_available(seat):
+            self.__taken_count -= 1
+            self.__swap_seats(self.__seat_positions[seat.index], self.__taken_count)
+
+    def release_all_seats(self) -> None:
+        """
+        Makes all the seats in this room available again.
+        """
+        self.__taken_count = 0
 
     def __populate_seats(self) -> None:
         """
@@ -251,7 +407,7 @@ class LectureRoom(Room):
         """
         for x in range(self.x_min_seat, self.x_max_seat + 1):
             for y in range(self.y_min_seat, self.y_max_seat + 1):
-                self.seats.append(Seat(x, y))
+                self.seats.append(Seat(x, y, self, len(self.seats)))
 
     def is_lecturer_area(self, x: int, y: int) -> bool:
         """
@@ -293,10 +449,7 @@ class LectureRoom(Room):
         :param y: The y-coordinate.
         :return: The seat at the given position if it exists, otherwise None.
         """
-        for seat in self.seats:
-            if seat.x == x and seat.y == y:
-                return seat
-        return None
+        return self.seats_by_position.get((x, y))
 
     def get_portrayal(self, x: int, y: int) -> Optional[typing.Dict[str, typing.Union[str, int, float]]]:
         """
@@ -318,7 +471,8 @@ class LectureRoom(Room):
 
 class RoomGrid(MultiGrid):
     def __init__(self, width: int, height: int, torus: bool, room_count: int = 20, room_size: int = 15,
-                 snug_fit: bool = True, break_room_size: int = 22):
+                 snug_fit: bool = True, break_room_size: int = 22,
+                 occlusion_radius: int = DEFAULT_OCCLUSION_RADIUS, agent_capacity: Optional[int] = None):
         """
          :param width: The width of the grid.
          :param height: The height of the grid.
@@ -329,6 +483,12 @@ class RoomGrid(MultiGrid):
                     This describes the usable area of the each room, so walls are not included.
          :param snug_fit: Whether to trim the width/height of the grid to the required size.
          :param break_room_size: The size of the break room.
+         :param occlusion_radius: The maximum distance between two positions for which obstruction is precomputed.
+                    See `is_path_obstructed`.
+         :param agent_capacity: When set, the agents are stored in arrays indexed by their unique ID, which has to be
+                    in [0, agent_capacity), instead of in Mesa's list per cell. This allows the neighbors of many
+                    agents to be found at once, see `get_neighbor_pairs`. All the other methods of `MultiGrid` keep
+                    working as before. An agent can only be at a single position at a time.
         """
         self.room_count = room_count
         self.break_room: Optional[BreakRoom] = None
@@ -345,6 +505,354 @@ class RoomGrid(MultiGrid):
             width, height = self.get_total_dimensions()
         super().__init__(width, height, torus)
 
+        self.rooms_by_id: List[Room] = self.rooms_list + [self.break_room]
+        """
+        All the rooms (including the break room) indexed by their ID.
+        """
+        self.seats_list: List[Seat] = [seat for room in self.rooms_list for seat in room.seats]
+        """
+        All the seats of all the lecture rooms.
+        """
+        self.__build_rasters()
+        self.__build_break_neighbors()
+        self.__build_random_positions()
+
+        self.occlusion_radius = occlusion_radius
+        self.__build_occlusion_index()
+
+        self.counters: Optional[WorkCounters] = None
+        """
+        Counts the path checks when set. See `virus_model.work_counters`.
+        """
+
+        self.agent_capacity = agent_capacity
+        if agent_capacity is not None:
+            self.__init_agent_arrays(agent_capacity)
+
+    def __init_agent_arrays(self, capacity: int) -> None:
+        """
+        Replaces Mesa's list per cell by the arrays that store the agents. See `agent_capacity`.
+
+        :param capacity: The maximum number of agents, i.e. one more than the highest unique ID.
+        """
+        # Mesa's lists are never updated from now on, so make sure they can't be used by accident.
+        self.grid = None
+
+        self.agent_cells = np.full(capacity, -1, dtype=np.int64)
+        """
+        The cell (x * height + y) of every agent by their unique ID, or -1 for agents that aren't on this grid.
+        """
+        self.__agents_by_id: List[Optional[Agent]] = [None] * capacity
+        """
+        The agents on this grid by their unique ID.
+        """
+        self.__cell_counts: List[int] = [0] * (self.width * self.height)
+        """
+        The number of agents in every cell.
+        """
+        self.__buckets: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        """
+        The IDs of the agents sorted by their cell and the index of the first agent of every cell in them (with an
+        extra entry at the end). This is only rebuilt when it's needed after an agent has been placed or removed, so
+        moving many agents between two queries costs a single rebuild. See `__get_buckets`.
+        """
+
+    def __get_buckets(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gets the agents sorted by their cell using a counting sort, rebuilding them if any agent has been placed or
+        removed since the last call.
+
+        :return: The index of the first agent of every cell (with an extra entry at the end) and the sorted IDs.
+        """
+        if self.__buckets is None:
+            present = np.flatnonzero(self.agent_cells >= 0)
+            self.__buckets = get_cell_buckets(self.agent_cells[present], present, self.width * self.height)
+        return self.__buckets
+
+    def __get_cell_agents(self, x: int, y: int) -> List[Agent]:
+        """
+        Gets the agents in a cell when the agents are stored in arrays.
+
+        :param x: The x-coordinate of the cell.
+        :param y: The y-coordinate of the cell.
+        :return: The agents in the cell, in the order of their unique IDs.
+        """
+        cell = x * self.height + y
+        if self.__cell_counts[cell] == 0:
+            return []
+        starts, agents = self.__get_buckets()
+        return [self.__agents_by_id[uid] for uid in agents[starts[cell]:starts[cell + 1]].tolist()]
+
+    def __getitem__(self, index: int) -> List[GridContent]:
+        if self.agent_capacity is None:
+            return super().__getitem__(index)
+        return [self.__get_cell_agents(index, y) for y in range(self.height)]
+
+    def __iter__(self) -> Iterator[GridContent]:
+        if self.agent_capacity is None:
+            return super().__iter__()
+        return (self.__get_cell_agents(x, y) for x in range(self.width) for y in range(self.height))
+
+    def coord_iter(self) -> Iterator[Tuple[GridContent, int, int]]:
+        if self.agent_capacity is None:
+            return super().coord_iter()
+        return ((self.__get_cell_agents(x, y), x, y) for x in range(self.width) for y in range(self.height))
+
+    def _place_agent(self, pos: Coordinate, agent: Agent) -> None:
+        if self.agent_capacity is None:
+            super()._place_agent(pos, agent)
+            return
+
+        uid = agent.unique_id
+        if self.agent_cells[uid] >= 0:
+            raise ValueError("Agent {} is already on the grid!".format(uid))
+        x, y = pos
+        cell = x * self.height + y
+        self.agent_cells[uid] = cell
+        self.__agents_by_id[uid] = agent
+        self.__cell_counts[cell] += 1
+        if self.__cell_counts[cell] == 1:
+            self.empties.discard(pos)
+        self.__buckets = None
+
+    def _remove_agent(self, pos: Coordinate, agent: Agent) -> None:
+        if self.agent_capacity is None:
+            super()._remove_agent(pos, agent)
+            return
+
+        uid = agent.unique_id
+        x, y = pos
+        cell = x * self.height + y
+        if self.agent_cells[uid] != cell:
+            raise ValueError("Agent {} is not at position {}!".format(uid, pos))
+        self.agent_cells[uid] = -1
+        self.__agents_by_id[uid] = None
+        self.__cell_counts[cell] -= 1
+        if self.__cell_counts[cell] == 0:
+            self.empties.add(pos)
+        self.__buckets = None
+
+    def is_cell_empty(self, pos: Coordinate) -> bool:
+        if self.agent_capacity is None:
+            return super().is_cell_empty(pos)
+        x, y = pos
+        return self.__cell_counts[x * self.height + y] == 0
+
+    @accept_tuple_argument
+    def iter_cell_list_contents(self, cell_list: Iterable[Coordinate]) -> Iterator[GridContent]:
+        if self.agent_capacity is None:
+            return super().iter_cell_list_contents(cell_list)
+        return (agent for x, y in cell_list for agent in self.__get_cell_agents(x, y))
+
+    def get_neighbor_pairs(self, agents: np.ndarray, radius: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the neighbors of many agents at once. The neighbors of an agent are the same as those of
+        `get_neighbors` with `moore=True`: all the agents in the available positions within `radius` of the agent,
+        except for the agent's own position. Requires the agents to be stored in arrays (see `agent_capacity`).
+
+        :param agents: The unique IDs of the agents to find the neighbors of. All of them have to be on this grid.
+        :param radius: The (Chebyshev) radius of the neighborhood.
+        :return: Two arrays (owners, neighbors), where neighbors[i] is a neighbor of agent owners[i].
+        """
+        if self.agent_capacity is None:
+            raise ValueError("Finding the neighbors of many agents at once requires an agent capacity!")
+        if self.torus:
+            raise ValueError("Finding the neighbors of many agents at once isn't supported on a torus!")
+
+        buckets = self.__get_buckets()
+        cells = self.agent_cells[agents]
+        x, y = cells // self.height, cells % self.height
+
+        owners = [np.empty(0, dtype=int)]
+        neighbors = [np.empty(0, dtype=int)]
+        for dx in range(-radius, radius + 1):
+            for dy in range(-radius, radius + 1):
+                if dx == 0 and dy == 0:
+                    continue
+                target_x, target_y = x + dx, y + dy
+                valid = (target_x >= 0) & (target_x < self.width) & (target_y >= 0) & (target_y < self.height)
+                valid[valid] = self.walkable_mask[target_x[valid], target_y[valid]]
+                pair_owners, pair_neighbors = get_cell_pairs(agents[valid],
+                                                             target_x[valid] * self.height + target_y[valid], buckets)
+                owners.append(pair_owners)
+                neighbors.append(pair_neighbors)
+        return np.concatenate(owners), np.concatenate(neighbors)
+
+    def __build_rasters(self) -> None:
+        """
+        Precomputes the layout of the grid as arrays indexed by [x, y], so that looking up what's at a given position
+        doesn't require searching through the rooms. The layout never changes, so this only has to be done once.
+        """
+        x, y = np.meshgrid(np.arange(self.width), np.arange(self.height), indexing='ij')
+
+        self.room_raster = self.__find_room_ids(x, y)
+        """
+        The ID of the room at a given [x, y] position (including its walls) or `NO_ROOM_ID`. See `get_room`.
+        """
+
+        edge = (x == 0) | (y == 0) | (x == self.width - 1) | (y == self.height - 1)
+        self.wall_mask = edge.copy()
+        """
+        Whether there is a wall at a given [x, y] position. See `is_wall`.
+        """
+        self.walkable_mask = ~edge & (self.room_raster == NO_ROOM_ID)
+        """
+        Whether a given [x, y] position is available. I.e. it's not a wall or a seat. See `is_available`.
+        """
+        self.break_walkable_mask = self.walkable_mask.copy()
+        """
+        Whether a given [x, y] position is available for agents that are not in a lecture. This is the break room and
+        the hallways. See `is_available` with `break_room_required`.
+        """
+
+        for room in self.rooms_by_id:
+            if room.get_room_type() == RoomType.BREAK_ROOM:
+                # The break room can own positions outside of its own walls (see `get_room`), which are available.
+                area = (slice(None), slice(None))
+            else:
+                area = (slice(room.x_min, room.x_max + 1), slice(room.y_min, room.y_max + 1))
+            owned = self.room_raster[area] == room.room_id
+            room_x, room_y = x[area], y[area]
+
+            in_walls = (room.x_min <= room_x) & (room_x <= room.x_max) & (room.y_min <= room_y) & (room_y <= room.y_max)
+            wall = (owned & in_walls & ((room_x == room.x_min) | (room_x == room.x_max) |
+                                        (room_y == room.y_min) | (room_y == room.y_max)) &
+                    ~((room_x == room.x_entry) & (room_y == room.y_entry)))
+            self.wall_mask[area] |= wall
+
+            if room.get_room_type() == RoomType.BREAK_ROOM:
+                available = owned & ~wall
+                self.break_walkable_mask[area] |= available & ~edge[area]
+            else:
+                room = typing.cast(LectureRoom, room)
+                lecturer_area = ((room.x_min_lecturer_area <= room_x) & (room_x <= room.x_max_lecturer_area) &
+                                 (room.y_min_lecturer_area <= room_y) & (room_y <= room.y_max_lecturer_area))
+                entry = (room_x == room.x_entry) & (room_y == room.y_entry)
+                available = owned & ~wall & (entry | lecturer_area)
+            self.walkable_mask[area] |= available & ~edge[area]
+
+        self.break_room_mask = (self.room_raster == self.break_room.room_id) & ~self.wall_mask
+        """
+        Whether a given [x, y] position lies inside the break room (excluding its walls).
+        """
+
+        self.seat_raster = np.full((self.width, self.height), -1, dtype=int)
+        """
+        The index in `seats_list` of the seat at a given [x, y] position, or -1 if there is no seat there.
+        """
+        for idx, seat in enumerate(self.seats_list):
+            self.seat_raster[seat.x, seat.y] = idx
+
+    def __find_room_ids(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        Finds the ID of the room at each of the given positions by searching through the rows and columns of rooms.
+        This is only used to build `room_raster`; use `get_room` instead.
+
+        :param x: The x-coordinates.
+        :param y: The y-coordinates.
+        :return: The ID of the room at each position (including its walls) or `NO_ROOM_ID`.
+        """
+        id_table = np.array([[NO_ROOM_ID if room is None else room.room_id for room in row] for row in self.rooms],
+                            dtype=int)
+
+        col = np.ceil(x / self.room_size).astype(int) - 1
+
+        # When rows share a wall, the wall belongs to the first row, so go through the rows backwards.
+        row = np.full(x.shape, -1, dtype=int)
+        for row_idx in reversed(range(self.vertical_room_count + 1)):
+            row_coordinates = self.rows[row_idx]
+            row[(row_coordinates[0] <= y) & (y <= row_coordinates[1])] = row_idx
+
+        break_row = self.rows[self.vertical_room_count]
+        in_break_room = ((break_row[0] <= y) & (y <= break_row[1]) &
+                         (self.break_room.x_min <= x) & (x <= self.break_room.x_max))
+
+        room_ids = np.where(row == -1, NO_ROOM_ID, id_table[np.maximum(row, 0), np.minimum(col, self.room_row_size - 1)])
+        room_ids[(row == self.vertical_room_count) & in_break_room] = self.break_room.room_id
+
+        outside_columns = col > (self.room_row_size - 1)
+        room_ids[outside_columns] = np.where(in_break_room, self.break_room.room_id, NO_ROOM_ID)[outside_columns]
+        return room_ids
+
+    def __build_break_neighbors(self) -> None:
+        """
+        Precomputes the neighboring positions agents on a break can walk to from every position on the grid.
+        See `get_neighborhood` with `in_break_room`.
+        """
+        x, y = np.meshgrid(np.arange(self.width), np.arange(self.height), indexing='ij')
+        x, y = x.ravel(), y.ravel()
+
+        # Use the same order as iter_neighborhood, so picking a neighbor gives the same result.
+        offsets = [(dx, dy) for dy in range(-1, 2) for dx in range(-1, 2) if dx != 0 or dy != 0]
+        target_x = x[:, None] + np.array([dx for dx, _ in offsets])
+        target_y = y[:, None] + np.array([dy for _, dy in offsets])
+        if self.torus:
+            target_x %= self.width
+            target_y %= self.height
+        valid = (target_x >= 0) & (target_x < self.width) & (target_y >= 0) & (target_y < self.height)
+        valid[valid] = self.break_walkable_mask[target_x[valid], target_y[valid]]
+
+        self.break_neighbor_starts = np.concatenate(([0], np.cumsum(valid.sum(axis=1))))
+        """
+        For the position with index (x * height + y), its neighbors are stored in `break_neighbor_cells` from index
+        `break_neighbor_starts[idx]` up to (but excluding) `break_neighbor_starts[idx + 1]`.
+        """
+
+        self.break_neighbor_cells = (target_x * self.height + target_y)[valid]
+        """
+        The indices (x * height + y) of the neighbors of all positions. See `break_neighbor_starts`.
+        """
+
+    def __build_random_positions(self) -> None:
+        """
+        Precomputes all the positions `get_random_pos` can return.
+        """
+        inner = np.zeros((self.width, self.height), dtype=bool)
+        inner[1:self.width - 1, 1:self.height - 1] = True
+        self.random_positions = np.argwhere(self.walkable_mask & inner)
+        """
+        All the available positions agents can be placed at, excluding the edge of the grid, as rows of (x, y).
+        """
+
+        break_room = self.break_room
+        in_break_room = np.zeros((self.width, self.height), dtype=bool)
+        in_break_room[break_room.x_min + 1:break_room.x_max - 1, break_room.y_min + 1:break_room.y_max - 1] = True
+        self.random_break_positions = np.argwhere(self.walkable_mask & in_break_room)
+        """
+        All the available positions in the break room agents can be placed at, as rows of (x, y).
+        """
+
+        if len(self.random_positions) == 0 or len(self.random_break_positions) == 0:
+            raise ValueError("The layout of the grid does not leave any positions to place agents at!")
+
+    def __build_occlusion_index(self) -> None:
+        """
+        Precomputes which positions can see each other. The layout never changes, so this only has to be done once.
+        """
+        self.interior_raster = np.full((self.width, self.height), NO_ROOM_ID, dtype=int)
+        """
+        The ID of the room whose interior (so excluding its walls) contains a given [x, y] position.
+        Rooms are rectangles, so the line between two positions in the interior of the same room is never obstructed.
+        """
+        for room in self.rooms_list + [self.break_room]:
+            self.interior_raster[room.x_min + 1:room.x_max, room.y_min + 1:room.y_max] = room.room_id
+        # The edge of the grid can cut off part of a room (e.g. the top of the break room).
+        self.interior_raster[self.wall_mask] = NO_ROOM_ID
+
+        radius = self.occlusion_radius
+        self.occlusion_index = np.zeros((self.width, self.height, 2 * radius + 1, 2 * radius + 1), dtype=bool)
+        """
+        Whether the line between [x, y] and [x + dx, y + dy] is obstructed, stored at [x, y, dx + radius, dy + radius].
+        Lines that leave the grid are considered obstructed.
+        """
+        # Bresenham lines only depend on the offset between the points, so each offset can be done for all positions
+        # at once by shifting the wall mask along the line.
+        for dx in range(-radius, radius + 1):
+            for dy in range(-radius, radius + 1):
+                obstructed = self.occlusion_index[:, :, dx + radius, dy + radius]
+                for (line_x, line_y) in get_line_between_points(0, 0, dx, dy):
+                    obstructed |= shift_mask(self.wall_mask, line_x, line_y, fill=True)
+
     def get_total_dimensions(self) -> [int, int]:
         """
         Returns the total dimensions being used by all the rooms together (including the buffer: `SNUG_FIT_BUFFER`).
@@ -458,6 +966,9 @@ class RoomGrid(MultiGrid):
         :param y: The y-coordinate.
         :return: True if there is a wall at the given position, otherwise False.
         """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return bool(self.wall_mask[x, y])
+
         if self.is_edge(x, y):
             return True
 
@@ -475,6 +986,11 @@ class RoomGrid(MultiGrid):
         :param break_room_required: Whether or not the position has to be inside a break room.
         :return: True if the position is available.
         """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            if break_room_required:
+                return bool(self.break_walkable_mask[x, y])
+            return bool(self.walkable_mask[x, y])
+
         if self.is_edge(x, y):
             return False
 
@@ -542,6 +1058,10 @@ class RoomGrid(MultiGrid):
         :param y: The y-coordinate to check.
         :return: The room at the given coordinates, if one such room could be found. Otherwise None.
         """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            room_id = self.room_raster[x, y]
+            return None if room_id == NO_ROOM_ID else self.rooms_by_id[room_id]
+
         col = math.ceil(x / self.room_size) - 1
         if col > (self.room_row_size - 1):
             return self.get_break_room(x, y)
@@ -570,7 +1090,63 @@ class RoomGrid(MultiGrid):
         :param y_1: The y-coordinate of the second positions.
         :return: True if there is a wall between the two given positions, otherwise False.
         """
-        for coord in get_line_between_points(x_0, y_0, x_1, y_1):
+        if self.counters is not None:
+            self.counters.add(COUNTER_PATH_CHECKS)
+
+        radius = self.occlusion_radius
+        dx = x_1 - x_0
+        dy = y_1 - y_0
+        if abs(dx) <= radius and abs(dy) <= radius and not self.out_of_bounds((x_0, y_0)):
+            return bool(self.occlusion_index[x_0, y_0, dx + radius, dy + radius])
+
+        if self.out_of_bounds((x_0, y_0)) or self.out_of_bounds((x_1, y_1)):
+            return self.__walk_path(x_0, y_0, x_1, y_1)
+
+        room_id = self.interior_raster[x_0, y_0]
+        if room_id != NO_ROOM_ID and room_id == self.interior_raster[x_1, y_1]:
+            return False
+        return self.__walk_path(x_0, y_0, x_1, y_1)
+
+    def are_paths_obstructed(self, x_0: np.ndarray, y_0: np.ndarray, x_1: np.ndarray, y_1: np.ndarray) -> np.ndarray:
+        """
+        Checks for every pair of positions if the path between them is obstructed by any walls.
+        See `is_path_obstructed`. All positions have to be on the grid.
+
+        :param x_0: The x-coordinates of the first positions.
+        :param y_0: The y-coordinates of the first positions.
+        :param x_1: The x-coordinates of the second positions.
+        :param y_1: The y-coordinates of the second positions.
+        :return: For every pair, True if there is a wall between the two positions, otherwise False.
+        """
+        if self.counters is not None:
+            self.counters.add(COUNTER_PATH_CHECKS, len(x_0))
+
+        radius = self.occlusion_radius
+        dx = x_1 - x_0
+        dy = y_1 - y_0
+        obstructed = np.zeros(len(x_0), dtype=bool)
+
+        indexed = (np.abs(dx) <= radius) & (np.abs(dy) <= radius)
+        obstructed[indexed] = self.occlusion_index[x_0[indexed], y_0[indexed],
+                                                   dx[indexed] + radius, dy[indexed] + radius]
+
+        room_ids = self.interior_raster[x_0, y_0]
+        same_room = (room_ids != NO_ROOM_ID) & (room_ids == self.interior_raster[x_1, y_1])
+        for idx in np.flatnonzero(~indexed & ~same_room):
+            obstructed[idx] = self.__walk_path(int(x_0[idx]), int(y_0[idx]), int(x_1[idx]), int(y_1[idx]))
+        return obstructed
+
+    def __walk_path(self, x_0: int, y_0: int, x_1: int, y_1: int) -> bool:
+        """
+        Checks if the path between two positions is obstructed by walking along the line between them.
+        See `is_path_obstructed`.
+        """
+        line = get_line_between_points(x_0, y_0, x_1, y_1)
+        if self.counters is not None:
+            self.counters.add(COUNTER_PATH_WALKS)
+            self.counters.add(COUNTER_PATH_CELLS, len(line))
+
+        for coord in line:
             if self.is_wall(coord[0], coord[1]):
                 return True
         return False
@@ -583,22 +1159,74 @@ class RoomGrid(MultiGrid):
         :param in_break_room: When true, only positions inside the break room are considered.
         :return: A random available position on this grid.
         """
-        if in_break_room:
-            x_min = self.break_room.x_min + 1
-            x_max = self.break_room.x_max - 1
-            y_min = self.break_room.y_min + 1
-            y_max = self.break_room.y_max - 1
-        else:
-            x_min = 1
-            x_max = self.width - 1
-            y_min = 1
-            y_max = self.height - 1
-
-        pos_x = pos_y = 0
-        while not self.is_available(pos_x, pos_y):
-            pos_x = random.randrange(x_min, x_max)
-            pos_y = random.randrange(y_min, y_max)
-        return pos_x, pos_y
+        positions = self.random_break_positions if in_break_room else self.random_positions
+        pos_x, pos_y = positions[random.randrange(len(positions))]
+        return int(pos_x), int(pos_y)
+
+    def get_random_positions(self, count: int, random: np.random.Generator,
+                             in_break_room: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gets random available positions on this grid. See `get_random_pos`.
+
+        :param count: The number of positions to get.
+        :param random: The random generator to use to pick the positions.
+        :param in_break_room: When true, only positions inside the break room are considered.
+        :return: The x-coordinates and y-coordinates of the random positions.
+        """
+        positions = self.random_break_positions if in_break_room else self.random_positions
+        picks = random.integers(len(positions), size=count)
+        return positions[picks, 0], positions[picks, 1]
+
+    def get_random_break_neighbor(self, pos: Coordinate, random: Random) -> Optional[Coordinate]:
+        """
+        Gets a random neighboring position an agent on a break can walk to. This is the same as picking a random
+        position from `get_neighborhood` with radius 1, moore and in_break_room, but without building the neighborhood.
+
+        :param pos: The current position of the agent.
+        :param random: The random object to use to pick a position.
+        :return: A random neighboring position or None if the agent cannot move anywhere.
+        """
+        cell = pos[0] * self.height + pos[1]
+        start = self.break_neighbor_starts[cell]
+        count = self.break_neighbor_starts[cell + 1] - start
+        if count == 0:
+            return None
+
+        target = int(self.break_neighbor_cells[start + random.randrange(count)])
+        return target // self.height, target % self.height
+
+    def get_random_break_neighbors(self, x: np.ndarray, y: np.ndarray,
+                                   random: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gets a random neighboring position for every agent on a break. See `get_random_break_neighbor`.
+
+        :param x: The x-coordinates of the agents.
+        :param y: The y-coordinates of the agents.
+        :param random: The random generator to use to pick the positions.
+        :return: The new x-coordinates and y-coordinates. Agents that cannot move anywhere keep their position.
+        """
+        return self.pick_break_neighbors(x, y, random.random(len(x)))
+
+    def pick_break_neighbors(self, x: np.ndarray, y: np.ndarray,
+                             draws: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Picks a neighboring position for every agent on a break using a given random value. See
+        `get_random_break_neighbors`.
+
+        :param x: The x-coordinates of the agents.
+        :param y: The y-coordinates of the agents.
+        :param draws: A random value in [0, 1) for every agent that decides which neighbor they move to.
+        :return: The new x-coordinates and y-coordinates. Agents that cannot move anywhere keep their position.
+        """
+        cells = x * self.height + y
+        starts = self.break_neighbor_starts[cells]
+        counts = self.break_neighbor_starts[cells + 1] - starts
+        picks = starts + (draws * counts).astype(int)
+
+        can_move = counts > 0
+        targets = cells.copy()
+        targets[can_move] = self.break_neighbor_cells[picks[can_move]]
+        return targets // self.height, targets % self.height
 
     def get_neighborhood(
             self,
@@ -32,10 +32,16 @@ class RoosterAgent:
         """
         self.agent_id = agent.agent_id
         self.model = model
-        self.rooster = self.model.rooster_model.rooster[:, self.agent_id]
+
+    @property
+    def rooster(self) -> np.ndarray:
         """
         The map containing the room this agent should be in for each step in the day.
+
+        This is looked up every time rather than stored as a view of `RoosterModel.rooster`, because views don't survive
+        pickling (see `virus_model.snapshot`).
         """
+        return self.model.rooster_model.rooster[:, self.agent_id]
 
 
 class RoosterModel:
@@ -53,48 +59,77 @@ class RoosterModel:
         Defaults to the break room.
         """
 
-    def get_random_room_id(self) -> Tuple[int, Optional[LectureRoom]]:
+        self.capacities = np.array([room.get_capacity() for room in self.model.grid.rooms_list])
+        """
+        The number of seats in every lecture room, indexed by room ID.
         """
-        Gets a random room id and room tuple from the rooms generated by `RoomGrid`.
 
-        If the random module selects a value less than `PERCENTAGE_BREAKS`, it will return `self.break_room_id` and no
-        room at all; they agent gets a break.
+        self.occupancy = np.zeros((LECTURES_PER_DAY, self.model.grid.room_count), dtype=int)
+        """
+        The number of agents scheduled in every lecture room for every lecture of the current day.
+        """
 
-        :return: A randomly selected room_id/LectureRoom pair.
+    def get_available_room_ids(self) -> np.ndarray:
         """
-        if self.model.random.randrange(100) < PERCENTAGE_BREAKS:
-            return self.break_room_id, None
+        Gets the IDs of all the lecture rooms that have at least 1 seat available. See `LectureRoom.room_available`.
 
-        room_id = self.model.random.randrange(self.model.grid.room_count)
-        room = self.model.grid.rooms_list[room_id]
+        :return: The IDs of all the lecture rooms agents can be scheduled in.
+        """
+        return np.array([room_id for room_id, room in enumerate(self.model.grid.rooms_list) if room.room_available()],
+                        dtype=int)
 
-        if not room.room_available():
-            return self.get_random_room_id()
+    def draw_room_ids(self, room_ids: np.ndarray) -> np.ndarray:
+        """
+        Draws a random room for every agent for a single lecture.
 
-        return room_id, room
+        Every agent has a `PERCENTAGE_BREAKS` chance of getting a break, in which case they get `self.break_room_id`.
+        All other agents get one of the given rooms, each with the same chance.
 
-    def __space_available_in_room(self, timeslot: int, room: LectureRoom, room_id: int) -> bool:
+        :param room_ids: The IDs of the rooms to choose from.
+        :return: The ID of the randomly selected room for every agent.
         """
-        Checks if there is any space available in a room.
+        rand = self.model.streams.get_generator('rooster')
+        if len(room_ids) == 0:
+            return np.full(self.model.num_agents, self.break_room_id)
+
+        breaks = rand.integers(100, size=self.model.num_agents) < PERCENTAGE_BREAKS
+        rooms = room_ids[rand.integers(len(room_ids), size=self.model.num_agents)]
+        return np.where(breaks, self.break_room_id, rooms)
 
-        :return: True if at least 1 seat is still available in the room.
+    def fill_rooms(self, requested: np.ndarray, occupancy: np.ndarray) -> np.ndarray:
         """
-        return (self.rooster[timeslot, :] == room_id).sum() < room.get_capacity()
+        Assigns the agents to the rooms they requested until those rooms are full. Rooms are filled in order of agent
+        ID; the agents that don't fit in their room anymore get a break instead.
+
+        :param requested: The ID of the room requested by every agent. See `draw_room_ids`.
+        :param occupancy: The number of agents assigned to each lecture room. This is updated in-place.
+        :return: The ID of the room assigned to every agent.
+        """
+        order = np.argsort(requested, kind='stable')
+        sorted_rooms = requested[order]
+        group_starts = np.searchsorted(sorted_rooms, sorted_rooms)
+        rank = np.empty(len(requested), dtype=int)
+        rank[order] = np.arange(len(requested)) - group_starts
+        """
+        The number of agents with a lower ID that requested the same room.
+        """
+
+        in_lecture = requested != self.break_room_id
+        lecture_rooms = requested[in_lecture]
+        fits = rank[in_lecture] < self.capacities[lecture_rooms] - occupancy[lecture_rooms]
+
+        assigned = np.full(len(requested), self.break_room_id)
+        assigned[np.flatnonzero(in_lecture)[fits]] = lecture_rooms[fits]
+        occupancy += np.bincount(lecture_rooms[fits], minlength=len(occupancy))
+        return assigned
 
     def make_day_rooster(self) -> None:
         """
         Schedules the agents to specific rooms at specific times through the day.
         """
-        for agent_id in range(self.model.num_agents):
-            for timeslot in range(0, DAY_DURATION, LECTURE_DURATION):
-                room_id, room = self.get_random_room_id()
-
-                if room is None or not self.__space_available_in_room(timeslot, room, room_id):
-                    # If room is None, either the schedule room is the break room,
-                    # Or no room could be found for whatever reason, so just dump
-                    # the agent in the break room.
-                    # Also, if the room is full, we
-                    self.rooster[timeslot:timeslot + LECTURE_DURATION, agent_id] = self.break_room_id
-                    continue
+        room_ids = self.get_available_room_ids()
+        self.occupancy[:] = 0
 
-                self.rooster[timeslot:timeslot + LECTURE_DURATION, agent_id] = room_id
+        for lecture, timeslot in enumerate(range(0, DAY_DURATION, LECTURE_DURATION)):
+            assigned = self.fill_rooms(self.draw_room_ids(room_ids), self.occupancy[lecture])
+            self.rooster[timeslot:timeslot + LECTURE_DURATION, :] = assigned
@@ -0,0 +1,139 @@
+"""
+This module allows the complete state of a model to be saved at any step and restored later, so a run can be continued
+from that step instead of being simulated from the start again.
+
+A snapshot contains everything the model needs to continue: the agents, the states of their diseases and tests, the
+contact ledger, the rooster, the positions on the grid, the state of the random generators and all the counters and
+collected data. Continuing a restored model gives exactly the same results as continuing the original model.
+
+A snapshot can also be forked into multiple continuations with different mitigation parameters (see
+`FORKABLE_PARAMETERS`), so the shared warm-up period of a set of experiments only needs to be simulated once.
+
+Snapshots are pickled, so only restore snapshots from trusted sources.
+"""
+
+import os
+import pickle
+from typing import Any, Optional, Union
+
+from mesa import Model
+
+from virus_model.streaming_collector import StreamingDataCollector
+from virus_model.util import write_atomically
+
+SNAPSHOT_FORMAT = 9
+"""
+The version of the format of the snapshots. Snapshots of other versions cannot be restored.
+"""
+
+FORKABLE_PARAMETERS = ['choice_of_measure', 'participation_tracing', 'daily_testing_chance', 'spread_chance']
+"""
+The parameters of a model that can be changed when forking it. These are only used while the model is running, so
+changing them doesn't invalidate the state of the model.
+
+Note that contacts are only recorded while contact tracing is enabled, so a fork that enables contact tracing starts
+without any earlier contacts, as if the app was introduced on the day of the fork.
+"""
+
+
+def take_snapshot(model: Model) -> bytes:
+    """
+    Takes a snapshot of the complete state of a model.
+
+    :param model: The model to take a snapshot of. This is either a `VirusModel` or a `VectorizedVirusModel`.
+    :return: The snapshot.
+    """
+    return pickle.dumps({"format": SNAPSHOT_FORMAT, "model": model}, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_snapshot_model(snapshot: bytes) -> Model:
+    """
+    Loads the model of a snapshot, without updating the file of its `StreamingDataCollector` (if any). Use
+    `restore_snapshot` to continue running the model.
+
+    :param snapshot: The snapshot to load. See `take_snapshot`.
+    :return: The model of the snapshot.
+    """
+    content = pickle.loads(snapshot)
+    if not isinstance(content, dict) or content.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError("Unsupported snapshot format! Expected format {}.".format(SNAPSHOT_FORMAT))
+    return content["model"]
+
+
+def restore_snapshot(snapshot: bytes, data_file: Optional[str] = None) -> Model:
+    """
+    Restores a model from a snapshot. See `take_snapshot`.
+
+    :param snapshot: The snapshot to restore.
+    :param data_file: The file the `StreamingDataCollector` of the restored model should continue writing to. The steps
+    collected before the snapshot was taken are written to it. When None, it continues writing to its original file,
+    replacing any steps that were written after the snapshot was taken. Ignored for models without a streaming
+    collector.
+    :return: The restored model.
+    """
+    model = load_snapshot_model(snapshot)
+    if isinstance(model.datacollector, StreamingDataCollector):
+        model.datacollector.move_to(model.datacollector.file if data_file is None else data_file)
+    return model
+
+
+def fork_model(source: Union[Model, bytes], data_file: Optional[str] = None, seed: Optional[int] = None,
+               **parameters: Any) -> Model:
+    """
+    Creates an independent copy of a model that continues from its current state with different parameters. The
+    source is not affected by any changes to the fork.
+
+    :param source: The model to fork or a snapshot of it. See `take_snapshot`.
+    :param data_file: The file the `StreamingDataCollector` of the fork should write to. This is required if the
+    source uses a streaming collector and it must differ from the file of the source.
+    :param seed: The new seed of the random streams of the fork (see `RandomStreams`). When None, the fork continues
+    with the same random sequences as the source, so the differences between forks are only caused by their
+    parameters.
+    :param parameters: The new values of any of the `FORKABLE_PARAMETERS`.
+    :return: The fork.
+    """
+    for name in parameters:
+        if name not in FORKABLE_PARAMETERS:
+            raise ValueError("Parameter \"{}\" cannot be changed when forking! Valid parameters are: {}"
+                             .format(name, ", ".join(FORKABLE_PARAMETERS)))
+
+    model = load_snapshot_model(source if isinstance(source, bytes) else take_snapshot(source))
+    if isinstance(model.datacollector, StreamingDataCollector):
+        if data_file is None or os.path.abspath(data_file) == os.path.abspath(model.datacollector.file):
+            raise ValueError("A separate data file is required to fork a model with a streaming data collector!")
+        model.datacollector.move_to(data_file)
+
+    for name, value in parameters.items():
+        setattr(model, name, value)
+
+    if seed is not None:
+        model.random.seed(seed)
+        model.streams.seed(seed)
+    return model
+
+
+def write_snapshot(model: Model, file: str) -> None:
+    """
+    Writes a snapshot of a model to a file. See `take_snapshot`.
+
+    :param model: The model to take a snapshot of.
+    :param file: The file to write the snapshot to.
+    """
+    snapshot = take_snapshot(model)
+
+    def write(temp_file: str) -> None:
+        with open(temp_file, 'wb') as output:
+            output.write(snapshot)
+    write_atomically(file, write)
+
+
+def read_snapshot(file: str, data_file: Optional[str] = None) -> Model:
+    """
+    Restores a model from a snapshot file. See `restore_snapshot`.
+
+    :param file: The file containing the snapshot. See `write_snapshot`.
+    :param data_file: The file the `StreamingDataCollector` of the restored model should continue writing to.
+    :return: The restored model.
+    """
+    with open(file, 'rb') as snapshot:
+        return restore_snapshot(snapshot.read(), data_file)
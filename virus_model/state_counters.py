@@ -0,0 +1,89 @@
+from typing import List
+
+from virus_model.virus import DiseaseState
+
+INFECTED_STATES = [state for state in DiseaseState if state >= DiseaseState.INFECTED]
+"""
+All the states in which an agent is considered infected. See `Virus.is_infected`.
+"""
+
+NOT_INFECTED_STATES = [state for state in DiseaseState if state < DiseaseState.INFECTED]
+"""
+All the states in which an agent is not considered infected. See `Virus.is_infected`.
+"""
+
+
+class StateCounters:
+    """
+    Keeps track of the number of agents in every combination of `DiseaseState` and quarantine status.
+
+    Instead of counting all the agents whenever the numbers are needed, the counters are updated whenever an agent
+    changes state, so reading them is O(1).
+    """
+
+    def __init__(self):
+        self.__counts: List[List[int]] = [[0, 0] for _ in range(len(DiseaseState) + 1)]
+        """
+        The number of agents for each [DiseaseState.value][quarantined].
+        """
+
+    def add(self, state: DiseaseState, quarantined: bool) -> None:
+        """
+        Registers a new agent.
+
+        :param state: The `DiseaseState` of the agent.
+        :param quarantined: Whether the agent is quarantined.
+        """
+        self.__counts[state.value][quarantined] += 1
+
+    def move(self, old_state: DiseaseState, old_quarantined: bool, new_state: DiseaseState,
+             new_quarantined: bool) -> None:
+        """
+        Registers that an agent changed its state.
+
+        :param old_state: The `DiseaseState` of the agent before the change.
+        :param old_quarantined: Whether the agent was quarantined before the change.
+        :param new_state: The `DiseaseState` of the agent after the change.
+        :param new_quarantined: Whether the agent is quarantined after the change.
+        """
+        self.__counts[old_state.value][old_quarantined] -= 1
+        self.__counts[new_state.value][new_quarantined] += 1
+
+    def count(self, state: DiseaseState, quarantined: bool = None) -> int:
+        """
+        Gets the number of agents in a given `DiseaseState`.
+
+        :param state: The `DiseaseState` to count.
+        :param quarantined: True/False to only count agents that are/aren't quarantined. None to count both.
+        :return: The number of agents in the given state.
+        """
+        counts = self.__counts[state.value]
+        if quarantined is None:
+            return counts[False] + counts[True]
+        return counts[quarantined]
+
+    def count_infected(self, quarantined: bool = None) -> int:
+        """
+        Gets the number of infected agents. See `Virus.is_infected`.
+
+        :param quarantined: True/False to only count agents that are/aren't quarantined. None to count both.
+        :return: The number of infected agents.
+        """
+        return sum(self.count(state, quarantined) for state in INFECTED_STATES)
+
+    def count_not_infected(self, quarantined: bool = None) -> int:
+        """
+        Gets the number of agents that are not infected. See `Virus.is_infected`.
+
+        :param quarantined: True/False to only count agents that are/aren't quarantined. None to count both.
+        :return: The number of agents that aren't infected.
+        """
+        return sum(self.count(state, quarantined) for state in NOT_INFECTED_STATES)
+
+    def count_quarantined(self) -> int:
+        """
+        Gets the number of quarantined agents.
+
+        :return: The number of quarantined agents.
+        """
+        return sum(counts[True] for counts in self.__counts)
@@ -0,0 +1,215 @@
+"""
+A data collector that writes the collected data to a file while the model is running, instead of keeping all of it in
+memory until the end of the run like Mesa's `DataCollector`.
+
+The values of the last few steps are buffered in a preallocated NumPy array, which is appended to the file every time
+it is full. The memory used by the collector is therefore the same for runs of any length, and when a run crashes, all
+the steps up to the last flush can still be read from the file. See `read_stream`.
+
+The file starts with a single line of JSON containing the names of the columns, followed by the rows of values as
+raw little-endian 64-bit floats. The reporters of the models only return integers, which are stored exactly.
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from mesa import Model
+
+DEFAULT_CHUNK_SIZE = 256
+"""
+The default number of steps that are buffered before they are written to the file.
+"""
+
+STREAM_DTYPE = np.dtype('<f8')
+"""
+The type of the values stored in the file.
+"""
+
+
+def read_stream(file: str) -> Tuple[List[str], np.ndarray]:
+    """
+    Reads the data written by a `StreamingDataCollector`. The rows are memory mapped, so only the parts that are used
+    are actually read. When the file ends with an incomplete row (e.g. because the run crashed while writing), that row
+    is ignored.
+
+    :param file: The file to read.
+    :return: The names of the columns and the array with the values, with shape (steps, columns).
+    """
+    with open(file, 'rb') as stream:
+        header = stream.readline()
+    columns = json.loads(header)["columns"]
+
+    row_count = 0
+    if len(columns) > 0:
+        with open(file, 'rb') as stream:
+            stream.seek(0, 2)
+            row_count = (stream.tell() - len(header)) // (STREAM_DTYPE.itemsize * len(columns))
+    if row_count == 0:
+        return columns, np.zeros((0, len(columns)), dtype=STREAM_DTYPE)
+    return columns, np.memmap(file, dtype=STREAM_DTYPE, mode='r', offset=len(header), shape=(row_count, len(columns)))
+
+
+class StreamingDataCollector:
+    """
+    Collects the values of a set of model reporters every step and streams them to a file. It can be used instead of
+    a Mesa `DataCollector` with only model reporters.
+    """
+
+    def __init__(self, model_reporters: Mapping[str, Union[str, Callable[[Model], Any]]], file: str,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        :param model_reporters: The reporters by the names of their columns. Every reporter is either a function that
+        gets the value from the model or the name of an attribute of the model.
+        :param file: The file to write the data to. Any existing file is overwritten.
+        :param chunk_size: The number of steps to buffer before writing them to the file.
+        """
+        if chunk_size < 1:
+            raise ValueError("The chunk size must be at least 1, but got {}!".format(chunk_size))
+
+        self.model_reporters: Dict[str, Union[str, Callable[[Model], Any]]] = dict(model_reporters)
+        self.file = file
+        self.__buffer = np.empty((chunk_size, len(self.model_reporters)), dtype=STREAM_DTYPE)
+        """
+        The values of the steps that haven't been written to the file yet.
+        """
+        self.__buffered = 0
+        self.__written = 0
+        """
+        The number of steps that have been written to the file.
+        """
+        self.__written_data: Optional[bytes] = None
+        """
+        The values of the written steps of a restored collector, until they are written to its file. See `move_to`.
+        """
+
+        with open(self.file, 'wb') as stream:
+            stream.write(self.__get_header())
+
+    def __get_header(self) -> bytes:
+        """
+        Gets the header of the file, which contains the names of the columns.
+
+        :return: The header of the file.
+        """
+        return (json.dumps({"columns": list(self.model_reporters.keys())}) + "\n").encode()
+
+    def get_step_count(self) -> int:
+        """
+        Gets the number of steps that have been collected so far, including the steps that are still buffered.
+
+        :return: The number of collected steps.
+        """
+        return self.__written + self.__buffered
+
+    def __get_written_data(self) -> bytes:
+        """
+        Gets the raw values of all the steps that have been written to the file.
+
+        :return: The values of the written steps.
+        """
+        if self.__written_data is not None:
+            return self.__written_data
+        with open(self.file, 'rb') as stream:
+            stream.seek(len(self.__get_header()))
+            return stream.read(self.__written * self.__buffer.itemsize * self.__buffer.shape[1])
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Include the steps that were already written, so a pickled collector (see `virus_model.snapshot`) doesn't
+        # depend on its file, which may be gone or contain steps collected later by the time it's restored.
+        state = self.__dict__.copy()
+        state["_StreamingDataCollector__written_data"] = self.__get_written_data()
+        return state
+
+    def move_to(self, file: str) -> None:
+        """
+        Continues writing to another file. The steps that were collected so far are written to the new file first.
+
+        :param file: The file to continue writing to. This can also be the current file, in which case any steps
+        written to it by other collectors (e.g. the original of a restored collector) are discarded.
+        """
+        data = self.__get_written_data()
+        with open(file, 'wb') as stream:
+            stream.write(self.__get_header())
+            stream.write(data)
+        self.file = file
+        self.__written_data = None
+
+    def collect(self, model: Model) -> None:
+        """
+        Collects the values of all the reporters for the current step of the model.
+
+        :param model: The model to collect the values from.
+        """
+        self.__get_values(model, self.__buffer[self.__buffered])
+
+        self.__buffered += 1
+        if self.__buffered == len(self.__buffer):
+            self.flush()
+
+    def collect_repeated(self, model: Model, count: int) -> None:
+        """
+        Collects the values of all the reporters for the current step of the model and stores them for this step and
+        the next `count - 1` steps as well, as if `collect` was called `count` times without the model changing. This
+        is used to fill the remaining steps of a run once its values can no longer change (see
+        `VirusModel.has_died_out`). All the steps are written to the file in bulk, without ever buffering more than a
+        single chunk.
+
+        :param model: The model to collect the values from.
+        :param count: The number of steps to store the values for.
+        """
+        if count <= 0:
+            return
+
+        self.flush()
+        self.__get_values(model, self.__buffer[0])
+        self.__buffer[1:] = self.__buffer[0]
+
+        full_chunks, remainder = divmod(count, len(self.__buffer))
+        with open(self.file, 'ab') as stream:
+            chunk = self.__buffer.tobytes()
+            for _ in range(full_chunks):
+                stream.write(chunk)
+            stream.write(self.__buffer[:remainder].tobytes())
+        self.__written += count
+
+    def __get_values(self, model: Model, row: np.ndarray) -> None:
+        """
+        Gets the values of all the reporters for the current step of the model.
+
+        :param model: The model to get the values from.
+        :param row: The array to store the values in, in the order of the reporters.
+        """
+        for idx, reporter in enumerate(self.model_reporters.values()):
+            row[idx] = getattr(model, reporter) if isinstance(reporter, str) else reporter(model)
+
+    def flush(self) -> None:
+        """
+        Writes all the buffered steps to the file.
+        """
+        if self.__written_data is not None:
+            self.move_to(self.file)
+        if self.__buffered == 0:
+            return
+        # The file is only opened while writing, so the collector (and the model) can still be pickled.
+        with open(self.file, 'ab') as stream:
+            stream.write(self.__buffer[:self.__buffered].tobytes())
+        self.__written += self.__buffered
+        self.__buffered = 0
+
+    def get_model_vars_dataframe(self) -> pd.DataFrame:
+        """
+        Reads all the collected data into a DataFrame. Columns that only contain whole numbers are returned as integers.
+        See `DataCollector.get_model_vars_dataframe`.
+
+        :return: The DataFrame with the values of every step.
+        """
+        self.flush()
+        columns, values = read_stream(self.file)
+        data = {}
+        for idx, column in enumerate(columns):
+            data[column] = np.array(values[:, idx])
+            if np.all(np.mod(data[column], 1) == 0):
+                data[column] = data[column].astype(np.int64)
+        return pd.DataFrame(data, columns=columns)
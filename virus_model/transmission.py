@@ -0,0 +1,137 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from virus_model.room_grid import RoomGrid, NO_ROOM_ID
+from virus_model.work_counters import WorkCounters, COUNTER_CANDIDATE_PAIRS
+
+
+class TransmissionKernel:
+    """
+    Finds all the pairs of agents that are close enough to spread the virus and draws all the infections of a tick at
+    once.
+
+    Walls stop the virus, so agents can only infect each other when they are in the same zone: the same lecture room
+    or the 'open area' consisting of the hallways and the break room. The only exception is a pair of agents on
+    opposite sides of the door of a lecture room, so agents close to a door are also compared across zones.
+
+    This means that every zone can be handled as a small bucket of agents instead of comparing all agents with each
+    other.
+    """
+
+    def __init__(self, grid: RoomGrid, spread_distance: int):
+        """
+        :param grid: The grid the agents live on.
+        :param spread_distance: The maximum (Chebyshev) distance the virus can spread.
+        """
+        self.grid = grid
+        self.spread_distance = spread_distance
+
+        self.zone_raster = grid.room_raster.copy()
+        """
+        The zone of every [x, y] position. This is the room ID for lecture rooms and `NO_ROOM_ID` for the open area.
+        """
+        self.zone_raster[self.zone_raster == grid.break_room.room_id] = NO_ROOM_ID
+
+        self.door_mask = np.zeros((grid.width, grid.height), dtype=bool)
+        """
+        Whether a given [x, y] position lies within `spread_distance` of the door of a lecture room. Any line between
+        two zones has to go through a door, so only agents in these positions can infect agents in another zone.
+        """
+        for room in grid.rooms_list:
+            self.door_mask[max(0, room.x_entry - spread_distance):room.x_entry + spread_distance + 1,
+                           max(0, room.y_entry - spread_distance):room.y_entry + spread_distance + 1] = True
+
+        self.counters: Optional[WorkCounters] = None
+        """
+        Counts the candidate pairs when set. See `virus_model.work_counters`.
+        """
+
+    def __find_close_pairs(self, x: np.ndarray, y: np.ndarray, sources: np.ndarray,
+                           targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds all the pairs of sources and targets whose distance is at least 1 and at most `spread_distance`.
+
+        :param x: The x-coordinate of every agent.
+        :param y: The y-coordinate of every agent.
+        :param sources: The indices of the source agents.
+        :param targets: The indices of the target agents.
+        :return: The indices of the source and the target of every pair.
+        """
+        if self.counters is not None:
+            self.counters.add(COUNTER_CANDIDATE_PAIRS, len(sources) * len(targets))
+
+        distance = np.maximum(np.abs(x[sources, None] - x[targets]), np.abs(y[sources, None] - y[targets]))
+        source_idx, target_idx = np.nonzero((distance > 0) & (distance <= self.spread_distance))
+        return sources[source_idx], targets[target_idx]
+
+    def find_pairs(self, x: np.ndarray, y: np.ndarray, sources: np.ndarray,
+                   targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds all the pairs of sources and targets where the source can spread the virus to the target: the target is
+        within `spread_distance` (but not in the same position) and there are no walls between them.
+        See `RoomGrid.is_path_obstructed`.
+
+        :param x: The x-coordinate of every agent.
+        :param y: The y-coordinate of every agent.
+        :param sources: The indices of the source agents.
+        :param targets: The indices of the target agents.
+        :return: The indices of the source and the target of every pair.
+        """
+        source_zones = self.zone_raster[x[sources], y[sources]]
+        target_zones = self.zone_raster[x[targets], y[targets]]
+        sources = sources[np.argsort(source_zones, kind='stable')]
+        targets = targets[np.argsort(target_zones, kind='stable')]
+        source_zones = np.sort(source_zones)
+        target_zones = np.sort(target_zones)
+
+        pair_sources: List[np.ndarray] = []
+        pair_targets: List[np.ndarray] = []
+        for zone in np.unique(source_zones):
+            zone_sources = sources[np.searchsorted(source_zones, zone):np.searchsorted(source_zones, zone, 'right')]
+            zone_targets = targets[np.searchsorted(target_zones, zone):np.searchsorted(target_zones, zone, 'right')]
+            if len(zone_targets) > 0:
+                found_sources, found_targets = self.__find_close_pairs(x, y, zone_sources, zone_targets)
+                pair_sources.append(found_sources)
+                pair_targets.append(found_targets)
+
+        door_sources = sources[self.door_mask[x[sources], y[sources]]]
+        door_targets = targets[self.door_mask[x[targets], y[targets]]]
+        if len(door_sources) > 0 and len(door_targets) > 0:
+            found_sources, found_targets = self.__find_close_pairs(x, y, door_sources, door_targets)
+            other_zone = (self.zone_raster[x[found_sources], y[found_sources]] !=
+                          self.zone_raster[x[found_targets], y[found_targets]])
+            pair_sources.append(found_sources[other_zone])
+            pair_targets.append(found_targets[other_zone])
+
+        if len(pair_sources) == 0:
+            return np.empty(0, dtype=int), np.empty(0, dtype=int)
+
+        pair_sources = np.concatenate(pair_sources)
+        pair_targets = np.concatenate(pair_targets)
+        visible = ~self.grid.are_paths_obstructed(x[pair_sources], y[pair_sources], x[pair_targets], y[pair_targets])
+        return pair_sources[visible], pair_targets[visible]
+
+    def spread(self, x: np.ndarray, y: np.ndarray, infectious: np.ndarray, susceptible: np.ndarray,
+               spread_chance: int, rand: np.random.Generator) -> np.ndarray:
+        """
+        Gives every infectious agent a chance to infect each susceptible agent it can reach. See `find_pairs`.
+
+        :param x: The x-coordinate of every agent.
+        :param y: The y-coordinate of every agent.
+        :param infectious: The indices of the agents that can spread the virus.
+        :param susceptible: The indices of the agents that can be infected.
+        :param spread_chance: The chance (0 - 100) of the virus spreading for every pair of agents.
+        :param rand: The random generator to use. Exactly one value is drawn for every agent, no matter how many agents
+        are infectious or susceptible, so every agent always uses the same part of the random stream.
+        :return: The sorted indices of the agents that got infected.
+        """
+        draws = rand.random(len(x))
+        if len(infectious) == 0 or len(susceptible) == 0:
+            return np.empty(0, dtype=int)
+
+        # Every infectious agent that can reach a susceptible agent gets a separate chance of infecting them.
+        _, targets = self.find_pairs(x, y, infectious, susceptible)
+        attempts = np.bincount(targets, minlength=len(x))
+        infection_chance = 1 - (1 - spread_chance / 100) ** attempts
+        return np.flatnonzero((attempts > 0) & (draws < infection_chance))
@@ -0,0 +1,74 @@
+import random
+from unittest import TestCase
+
+from mesa import Agent, Model
+
+from virus_model.active_activation import ActiveRandomActivation
+from virus_model.model import DAY_DURATION
+from virus_model.unittest.util import create_model
+from virus_model.virus import DiseaseState
+
+
+class CountingAgent(Agent):
+    def __init__(self, unique_id: int, model: Model):
+        super().__init__(unique_id, model)
+        self.steps = 0
+
+    def step(self) -> None:
+        self.steps += 1
+        self.model.order.append(self.unique_id)
+
+
+class TestActiveRandomActivation(TestCase):
+    def create_schedule(self, seed: int) -> ActiveRandomActivation:
+        model = Model()
+        model.random = random.Random(seed)
+        model.order = []
+        schedule = ActiveRandomActivation(model)
+        for uid in range(10):
+            schedule.add(CountingAgent(uid, model))
+        return schedule
+
+    def test_step(self):
+        schedule = self.create_schedule(1)
+        reference = self.create_schedule(1)
+        agents = schedule.agents
+        schedule.deactivate(agents[3])
+        schedule.deactivate(agents[7])
+        assert not schedule.is_active(agents[3])
+        assert schedule.get_active_count() == 8
+
+        for _ in range(3):
+            schedule.step()
+            reference.step()
+        assert agents[3].steps == agents[7].steps == 0
+        assert all(agent.steps == 3 for agent in schedule.active_agents)
+        # The inactive agents don't change the order in which the active agents are activated.
+        assert schedule.model.order == [uid for uid in reference.model.order if uid not in (3, 7)]
+
+        schedule.activate(agents[3])
+        schedule.step()
+        assert agents[3].steps == 1
+        assert schedule.steps == 4
+
+    def test_model(self):
+        model = create_model()
+        agent = model.agents_by_id[0]
+        pos = agent.pos
+        agent.enforce_quarantine(1)
+        assert agent.pos is None
+        assert not model.schedule.is_active(agent)
+        assert agent not in model.grid.get_cell_list_contents([pos])
+
+        # The agent returns to where they were when their quarantine ends.
+        agent.quarantine = False
+        assert model.schedule.is_active(agent)
+        assert agent.pos == pos
+        for _ in range(DAY_DURATION):
+            model.step()
+
+        old_state = agent.virus.disease_state
+        agent.virus.disease_state = DiseaseState.DECEASED
+        agent.on_state_change(old_state, DiseaseState.DECEASED)
+        assert agent.pos is None
+        assert not model.schedule.is_active(agent)
@@ -0,0 +1,40 @@
+from unittest import TestCase
+
+from virus_model.batched_model import *
+from virus_model.unittest.util import create_model
+from virus_model.vectorized_model import *
+
+
+class TestReplicates(TestCase):
+    def test_replicates(self):
+        """
+        Make sure that every replicate produces exactly the same data as a model of a single replicate with its seed.
+        """
+        for measure in ['no_measures', 'contact_tracing']:
+            seeds = [3, 42]
+            model = create_model(VectorizedVirusModel, choice_of_measure=measure, seed=None, seeds=seeds)
+            singles = [create_model(VectorizedVirusModel, choice_of_measure=measure, seed=seed) for seed in seeds]
+            for _ in range(6 * DAY_DURATION):
+                model.step()
+                for single in singles:
+                    single.step()
+
+            for single, data in zip(singles, model.get_model_vars_dataframes()):
+                assert single.datacollector.get_model_vars_dataframe().equals(data)
+
+    def test_single_replicate(self):
+        model = create_model(VectorizedVirusModel, seed=None, seeds=[1, 2])
+        with self.assertRaises(ValueError):
+            model.datacollector
+        with self.assertRaises(ValueError):
+            create_model(VectorizedVirusModel, seed=1, seeds=[1, 2])
+        assert create_model(VectorizedVirusModel, seed=1).num_replicates == 1
+
+    def test_aggregate(self):
+        model = create_model(VectorizedVirusModel, seed=None, seeds=[1, 2, 3])
+        for _ in range(5):
+            model.step()
+
+        aggregate = aggregate_replicates(model.get_model_vars_dataframes(), quantiles=[0.5])
+        assert aggregate.shape == (5, 2 * len(MODEL_REPORTERS))
+        assert list(aggregate.columns[:2]) == ["infected (mean)", "infected (q0.5)"]
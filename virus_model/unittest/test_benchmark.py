@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+from unittest import TestCase
+
+from virus_model.benchmark import *
+
+
+class TestBenchmark(TestCase):
+    def test_run_benchmarks(self):
+        benchmarks = [benchmark for benchmark in BENCHMARKS if benchmark.name in ('model_step', 'is_path_obstructed')]
+        results = run_benchmarks(benchmarks, [50], [(4, 10)], repeat=2)
+
+        assert [get_result_key(result) for result in results["results"]] == \
+               [('model_step', 50, 4, 10), ('is_path_obstructed', None, 4, 10)]
+        assert results["results"][0]["number"] == DAY_DURATION
+        assert all(len(result["times"]) == 2 for result in results["results"])
+
+    def test_changes_state(self):
+        steps = []
+
+        def setup(configuration):
+            model = SimpleNamespace(step=0)
+            steps.append(model)
+
+            def step():
+                model.step += 1
+            return step
+
+        result = Benchmark("step", "", setup, number=3, changes_state=True).run(Configuration(50, 4, 10), repeat=2)
+        # Every repeat starts from a new model, so they all do the same work.
+        assert len(result["times"]) == 2
+        assert [model.step for model in steps] == [3, 3]
+
+        with self.assertRaises(ValueError):
+            Benchmark("step", "", setup, changes_state=True)
+
+    def test_compare_results(self):
+        def create_results(*medians):
+            return {"format": RESULTS_FORMAT, "results": [
+                {"benchmark": "step", "num_agents": num_agents, "room_count": 10, "room_size": 15, "median": median}
+                for num_agents, median in zip([100, 1000, 5000], medians)]}
+
+        comparisons = compare_results(create_results(1.0, 2.0, 3.0), create_results(1.0, 1.5), threshold=0.25)
+        assert [comparison["regression"] for comparison in comparisons] == [False, True]
+        assert comparisons[1]["ratio"] == 2.0 / 1.5
+
+        with self.assertRaises(ValueError):
+            compare_results(create_results(1.0), {"format": RESULTS_FORMAT + 1, "results": []})
@@ -0,0 +1,58 @@
+from unittest import TestCase
+
+from virus_model.contact_ledger import *
+
+
+class TestDenseContactLedger(TestCase):
+    """
+    The base class for testing the different ContactLedger implementations.
+    """
+    def create_ledger(self, num_agents: int) -> ContactLedger:
+        return DenseContactLedger(num_agents)
+
+    def setUp(self):
+        self.ledger = self.create_ledger(10)
+        self.ledger.add_contact(1, 2, 3)
+        self.ledger.add_contact(1, 5, 7)
+        self.ledger.add_contacts(np.array([4, 1]), np.array([1, 8]), 9)
+
+    def test_symmetric(self):
+        """
+        Make sure that contacts are registered for both agents.
+        """
+        assert list(self.ledger.get_contacts(2, 0)) == [1]
+        assert list(self.ledger.get_contacts(8, 0)) == [1]
+
+    def test_since_day(self):
+        """
+        Make sure that contacts from before the requested day are ignored, but contacts on that day are not.
+        """
+        assert list(self.ledger.get_contacts(1, 0)) == [2, 4, 5, 8]
+        assert list(self.ledger.get_contacts(1, 7)) == [4, 5, 8]
+        assert list(self.ledger.get_contacts(1, 10)) == []
+
+    def test_last_contact(self):
+        """
+        Make sure that a repeated contact moves the last contact day forward.
+        """
+        self.ledger.add_contact(2, 1, 12)
+        assert list(self.ledger.get_contacts(1, 10)) == [2]
+
+    def test_contact_pairs(self):
+        """
+        Make sure that the batch query returns the same contacts as the single queries.
+        """
+        owners, contacts = self.ledger.get_contact_pairs(np.array([1, 2]), np.array([7, 0]))
+        assert sorted(zip(owners.tolist(), contacts.tolist())) == [(1, 4), (1, 5), (1, 8), (2, 1)]
+
+    def test_prune(self):
+        """
+        Make sure that pruning never affects contacts that can still be requested.
+        """
+        self.ledger.prune(7)
+        assert list(self.ledger.get_contacts(1, 7)) == [4, 5, 8]
+
+
+class TestSparseContactLedger(TestDenseContactLedger):
+    def create_ledger(self, num_agents: int) -> ContactLedger:
+        return SparseContactLedger(num_agents)
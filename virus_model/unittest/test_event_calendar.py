@@ -0,0 +1,39 @@
+from unittest import TestCase
+
+from virus_model.event_calendar import EventCalendar
+
+
+class TestEventCalendar(TestCase):
+    def test_start_day(self):
+        calendar = EventCalendar()
+        calendar.schedule(3, 5)
+        calendar.schedule(3, 1)
+        calendar.schedule(3, 5)
+        calendar.schedule(2, 4)
+        calendar.schedule(6, 2)
+
+        assert list(calendar.start_day(1)) == []
+        # Days that were skipped are handled on the next day.
+        assert list(calendar.start_day(3, [7, 1])) == [1, 4, 5, 7]
+        assert calendar.get_scheduled_count() == 1
+        assert list(calendar.start_day(6)) == [2]
+
+    def test_schedule_current_day(self):
+        """
+        Make sure that agents that get scheduled on the current day are only handled if they haven't been handled yet.
+        """
+        calendar = EventCalendar()
+        handled = []
+        for agent_id in calendar.start_day(0, [2, 5]):
+            handled.append(agent_id)
+            if agent_id == 2:
+                assert calendar.is_handled(1)
+                assert not calendar.is_handled(2)
+                assert not calendar.is_handled(3)
+                calendar.schedule(0, 1)
+                calendar.schedule(0, 3)
+                calendar.schedule(1, 0)
+
+        assert handled == [2, 3, 5]
+        assert calendar.is_handled(3)
+        assert list(calendar.start_day(1)) == [0]
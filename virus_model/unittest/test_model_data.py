@@ -0,0 +1,63 @@
+import os
+import tempfile
+import weakref
+from types import SimpleNamespace
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from virus_model.noviz.model_data import *
+from virus_model.streaming_collector import StreamingDataCollector, read_stream
+
+
+class TestModelData(TestCase):
+    def setUp(self):
+        self.data = pd.DataFrame({"infected": [1, 3, 2], "deaths": [0.0, 1.0, 1.0], "R": [0.5, 1.25, 2.0]},
+                                 columns=["infected", "deaths", "R"])
+
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            ModelData.from_dataframe(self.data, {"seed": 42}).write(directory + os.sep + MODEL_DATA_PATH)
+
+            with load_model_data(directory) as model_data:
+                assert model_data.columns == ["infected", "deaths", "R"]
+                assert model_data.settings == {"seed": 42}
+                assert model_data.get_last("deaths") == 1
+                assert model_data.get_column("infected").max() == 3
+                assert model_data.get_column("deaths").dtype == np.int32
+                assert model_data.get_column("R").dtype == np.float64
+                pd.testing.assert_frame_equal(model_data.to_dataframe(), self.data, check_dtype=False)
+
+            # The files should also be readable by NumPy itself.
+            with np.load(directory + os.sep + MODEL_DATA_PATH, allow_pickle=False) as arrays:
+                assert list(arrays["column_0"]) == [1, 3, 2]
+
+    def test_legacy(self):
+        with tempfile.TemporaryDirectory() as directory:
+            assert load_model_data(directory) is None
+
+            self.data.to_pickle(directory + os.sep + LEGACY_MODEL_DATA_PATH)
+            model_data = load_model_data(directory)
+            assert model_data.get_last("infected") == 2
+            assert model_data.settings == {}
+
+    def test_stream(self):
+        with tempfile.TemporaryDirectory() as directory:
+            stream_data_path = directory + os.sep + STREAM_DATA_PATH
+            collector = StreamingDataCollector({"step": "step"}, stream_data_path)
+            for step in range(3):
+                collector.collect(SimpleNamespace(step=step))
+            collector.flush()
+
+            with load_model_data(directory, partial=True) as model_data:
+                assert model_data.get_column("step").tolist() == [0, 1, 2]
+
+            columns, values = read_stream(stream_data_path)
+            mapping = weakref.ref(values)
+            model_data = ModelData(columns, StreamColumns(values), [2], {})
+            del values
+            # Closing the model data releases the memory map, so the file can be removed on every platform.
+            model_data.close()
+            assert mapping() is None
+            os.remove(stream_data_path)
@@ -0,0 +1,37 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from virus_model.model import DAY_DURATION
+from virus_model.profiler import *
+from virus_model.unittest.util import create_model
+
+
+class TestPhaseProfiler(TestCase):
+    def test_model(self):
+        model = create_model()
+        model.profiler = PhaseProfiler()
+        for _ in range(2 * DAY_DURATION):
+            model.step()
+
+        totals = model.profiler.get_times()
+        assert totals[PHASE_COLLECT][1] == totals[PHASE_OTHER][1] == 2 * DAY_DURATION
+        assert totals[PHASE_ROOSTER][1] == totals[PHASE_DAY_ROLLOVER][1] == 2
+        assert model.profiler.get_days() == [0, 1]
+        # The time of every step is split over the phases, so the phases add up to the total time.
+        assert sum(elapsed for elapsed, _ in totals.values()) == model.profiler.get_total_time()
+        assert all(phase in model.profiler.format_summary() for phase in totals)
+
+    def test_write_trace(self):
+        profiler = PhaseProfiler()
+        profiler.record(PHASE_MOVEMENT, profiler.start())
+        profiler.day = 3
+        start = profiler.record(PHASE_MOVEMENT, profiler.start())
+        profiler.record(PHASE_TRANSMISSION, start)
+
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, "trace.csv")
+            profiler.write_trace(file)
+            with open(file) as trace:
+                rows = [line.split(",")[:2] for line in trace.read().splitlines()]
+        assert rows == [["day", "phase"], ["0", PHASE_MOVEMENT], ["3", PHASE_MOVEMENT], ["3", PHASE_TRANSMISSION]]
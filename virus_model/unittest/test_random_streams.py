@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from virus_model.model import VirusModel, DAY_DURATION
+from virus_model.random_streams import *
+from virus_model.unittest.util import create_model
+from virus_model.vectorized_model import VectorizedVirusModel
+
+
+class TestRandomStreams(TestCase):
+    def test_seed(self):
+        streams = RandomStreams(42)
+        testing = streams.testing
+        values = [testing.random(), streams.movement.random(), streams.get_generator('movement').random()]
+        assert len(set(values)) == 3
+
+        # Reseeding restores the same sequences, without replacing the random objects.
+        streams.seed(42)
+        assert streams.testing is testing
+        assert [testing.random(), streams.movement.random(), streams.get_generator('movement').random()] == values
+
+    def test_common_random_numbers(self):
+        """
+        Contact tracing without any participation only draws from the tracing stream, so it shouldn't affect any of
+        the other parts of the model.
+        """
+        for model_class in [VirusModel, VectorizedVirusModel]:
+            data = []
+            for measure in ['no_measures', 'contact_tracing']:
+                model = create_model(model_class, daily_testing_chance=50, choice_of_measure=measure, test_delay=1,
+                                     participation_tracing=0)
+                for _ in range(5 * DAY_DURATION):
+                    model.step()
+                data.append(model.datacollector.get_model_vars_dataframe())
+            assert data[0]["tested positive"].iloc[-1] > 0
+            assert data[0].equals(data[1])
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+from virus_model.noviz.result_cache import *
+
+
+class TestResultCache(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(os.path.join(self.temp_dir.name, "cache"), max_size=1)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_result(self, size: int) -> str:
+        """
+        Writes a result file of a given size.
+
+        :param size: The size of the file in bytes.
+        :return: The path of the file.
+        """
+        path = os.path.join(self.temp_dir.name, "model.pickle")
+        with open(path, 'wb') as file:
+            file.write(b'0' * size)
+        return path
+
+    def test_key(self):
+        version = get_code_version()
+        assert version == get_code_version()
+        assert get_cache_key({'seed': 1, 'num_agents': 10}, version) == \
+               get_cache_key({'num_agents': 10, 'seed': 1}, version)
+        assert get_cache_key({'seed': 1}, version) != get_cache_key({'seed': 2}, version)
+        assert get_cache_key({'seed': 1}, version) != get_cache_key({'seed': 1}, "other version")
+
+    def test_get_put(self):
+        assert self.cache.get("key") is None
+        self.cache.put("key", self.write_result(10))
+        with open(self.cache.get("key"), 'rb') as file:
+            assert file.read() == b'0' * 10
+
+    def test_copy_to(self):
+        destination = os.path.join(self.temp_dir.name, "copy.pickle")
+        assert not self.cache.copy_to("key", destination)
+        self.cache.put("key", self.write_result(10))
+        assert self.cache.copy_to("key", destination)
+        with open(destination, 'rb') as file:
+            assert file.read() == b'0' * 10
+
+        # Another process may remove the result at any time, which makes it a miss.
+        os.remove(destination)
+        os.remove(self.cache.get("key"))
+        assert not self.cache.copy_to("key", destination)
+        assert not os.path.exists(destination)
+
+    def test_evict(self):
+        size = 400 * 1024
+        for key in ["a", "b"]:
+            self.cache.put(key, self.write_result(size))
+            time.sleep(0.01)
+        # Using 'a' makes 'b' the least recently used result.
+        assert self.cache.get("a") is not None
+        time.sleep(0.01)
+        self.cache.put("c", self.write_result(size))
+
+        assert self.cache.get("a") is not None
+        assert self.cache.get("b") is None
+        assert self.cache.get("c") is not None
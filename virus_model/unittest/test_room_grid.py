@@ -0,0 +1,207 @@
+from random import Random
+from unittest import TestCase
+
+from mesa import Agent, Model
+
+from virus_model.room_grid import *
+
+
+class TestRoomGrid(TestCase):
+    """
+    The base class for testing the RoomGrid class.
+    """
+    def setUp(self):
+        self.grid = RoomGrid(100, 100, False, room_count=7, room_size=9, break_room_size=15, occlusion_radius=2)
+        self.random = Random(1)
+
+    def random_pairs(self, count: int, max_distance: int) -> np.ndarray:
+        """
+        Creates random pairs of positions on the grid.
+
+        :param count: The number of pairs to create.
+        :param max_distance: The maximum distance between the positions in each pair along either axis.
+        :return: An array with a row (x_0, y_0, x_1, y_1) for every pair.
+        """
+        pairs = []
+        for _ in range(count):
+            x_0 = self.random.randrange(self.grid.width)
+            y_0 = self.random.randrange(self.grid.height)
+            x_1 = min(max(x_0 + self.random.randint(-max_distance, max_distance), 0), self.grid.width - 1)
+            y_1 = min(max(y_0 + self.random.randint(-max_distance, max_distance), 0), self.grid.height - 1)
+            pairs.append((x_0, y_0, x_1, y_1))
+        return np.array(pairs)
+
+
+def walk_path(grid: RoomGrid, x_0: int, y_0: int, x_1: int, y_1: int) -> bool:
+    """
+    The reference implementation of `RoomGrid.is_path_obstructed`.
+    """
+    return any(grid.is_wall(x, y) for (x, y) in get_line_between_points(x_0, y_0, x_1, y_1))
+
+
+class TestOcclusion(TestRoomGrid):
+    """
+    Make sure that the occlusion index gives the same results as walking along the path between two positions.
+    """
+    def test_indexed(self):
+        for x_0, y_0, x_1, y_1 in self.random_pairs(5000, self.grid.occlusion_radius):
+            assert self.grid.is_path_obstructed(x_0, y_0, x_1, y_1) == walk_path(self.grid, x_0, y_0, x_1, y_1)
+
+    def test_not_indexed(self):
+        for x_0, y_0, x_1, y_1 in self.random_pairs(2000, 20):
+            assert self.grid.is_path_obstructed(x_0, y_0, x_1, y_1) == walk_path(self.grid, x_0, y_0, x_1, y_1)
+
+    def test_batch(self):
+        pairs = self.random_pairs(2000, 6)
+        expected = [walk_path(self.grid, *pair) for pair in pairs]
+        assert list(self.grid.are_paths_obstructed(pairs[:, 0], pairs[:, 1], pairs[:, 2], pairs[:, 3])) == expected
+
+
+class TestRasters(TestRoomGrid):
+    """
+    Make sure that the rasters describe the same layout as the rooms themselves.
+    """
+    def test_rooms(self):
+        for room in self.grid.rooms_by_id:
+            for x in range(room.x_min + 1, room.x_max):
+                for y in range(room.y_min + 1, min(room.y_max, self.grid.height - 1)):
+                    assert self.grid.get_room(x, y) is room
+                    assert not self.grid.is_wall(x, y)
+
+    def test_seats(self):
+        for room in self.grid.rooms_list:
+            for seat in room.seats:
+                assert self.grid.seats_list[self.grid.seat_raster[seat.x, seat.y]] is seat
+                assert not self.grid.is_available(seat.x, seat.y)
+        assert (self.grid.seat_raster >= 0).sum() == len(self.grid.seats_list)
+
+    def test_break_room(self):
+        """
+        Make sure that agents on a break can walk anywhere in the break room, but never into a lecture room.
+        """
+        break_room = self.grid.break_room
+        for x, y in zip(*np.nonzero(self.grid.break_walkable_mask)):
+            assert self.grid.get_room(x, y) in (None, break_room)
+        assert self.grid.break_walkable_mask[self.grid.break_room_mask].all()
+        assert self.grid.is_available(break_room.x_entry, break_room.y_entry, True)
+
+
+class TestSeatPool(TestRoomGrid):
+    """
+    Make sure that the rooms keep track of their available seats.
+    """
+    def setUp(self):
+        super().setUp()
+        self.room = self.grid.rooms_list[0]
+
+    def test_take_and_release(self):
+        taken = [self.room.take_random_seat(self.random) for _ in range(self.room.get_capacity())]
+        assert len(set(taken)) == self.room.get_capacity()
+        assert not self.room.room_available()
+        assert self.room.take_random_seat(self.random) is None
+
+        self.room.release_seat(taken[3])
+        self.room.release_seat(taken[3])
+        assert self.room.get_available_seat_count() == 1
+        assert taken[3].available
+        assert self.room.take_random_seat(self.random) is taken[3]
+
+        taken[5].available = True
+        assert [seat.available for seat in self.room.seats].count(True) == 1
+
+        self.room.release_all_seats()
+        assert all(seat.available for seat in self.room.seats)
+
+    def test_get_seat(self):
+        for seat in self.room.seats:
+            assert self.room.get_seat(seat.x, seat.y) is seat
+        assert self.room.get_seat(self.room.x_min, self.room.y_min) is None
+
+
+class TestBreakNeighbors(TestRoomGrid):
+    """
+    Make sure that the neighbor table contains the same positions as the neighborhood of the grid.
+    """
+    def test_table(self):
+        for x in range(self.grid.width):
+            for y in range(self.grid.height):
+                cell = x * self.grid.height + y
+                cells = self.grid.break_neighbor_cells[self.grid.break_neighbor_starts[cell]:
+                                                       self.grid.break_neighbor_starts[cell + 1]]
+                neighbors = [(c // self.grid.height, c % self.grid.height) for c in cells]
+                assert neighbors == self.grid.get_neighborhood((x, y), True, in_break_room=True)
+
+    def test_batch(self):
+        walkable = np.argwhere(self.grid.break_walkable_mask)
+        x, y = walkable[:, 0], walkable[:, 1]
+        new_x, new_y = self.grid.get_random_break_neighbors(x, y, np.random.default_rng(1))
+        assert (np.maximum(np.abs(new_x - x), np.abs(new_y - y)) == 1).all()
+        assert self.grid.break_walkable_mask[new_x, new_y].all()
+
+
+class TestRandomPositions(TestRoomGrid):
+    """
+    Make sure that random positions are only picked from the positions the rejection sampling used to accept.
+    """
+    def test_positions(self):
+        expected = {(x, y) for x in range(1, self.grid.width - 1) for y in range(1, self.grid.height - 1)
+                    if self.grid.is_available(x, y)}
+        assert set(map(tuple, self.grid.random_positions.tolist())) == expected
+
+        break_room = self.grid.break_room
+        expected = {(x, y) for x in range(break_room.x_min + 1, break_room.x_max - 1)
+                    for y in range(break_room.y_min + 1, break_room.y_max - 1) if self.grid.is_available(x, y)}
+        assert set(map(tuple, self.grid.random_break_positions.tolist())) == expected
+
+    def test_batch(self):
+        x, y = self.grid.get_random_positions(1000, np.random.default_rng(1), in_break_room=True)
+        assert len(x) == len(y) == 1000
+        assert all(self.grid.get_room(pos_x, pos_y) is self.grid.break_room for pos_x, pos_y in zip(x, y))
+
+
+class TestAgentArrays(TestRoomGrid):
+    """
+    Make sure that storing the agents in arrays behaves like Mesa's list per cell.
+    """
+    def setUp(self):
+        super().setUp()
+        self.grids = [RoomGrid(100, 100, False, room_count=7, room_size=9, break_room_size=15),
+                      RoomGrid(100, 100, False, room_count=7, room_size=9, break_room_size=15, agent_capacity=300)]
+        model = Model()
+        self.agents = [[Agent(uid, model) for uid in range(300)] for _ in self.grids]
+        for grid, agents in zip(self.grids, self.agents):
+            rand = Random(1)
+            for agent in agents:
+                grid.place_agent(agent, grid.get_random_pos(rand))
+            for agent in agents[::3]:
+                grid.move_agent(agent, grid.get_random_pos(rand))
+            for agent in agents[::7]:
+                grid.remove_agent(agent)
+
+    def get_ids(self, agents) -> List[int]:
+        return sorted(agent.unique_id for agent in agents)
+
+    def test_contents(self):
+        lists, arrays = self.grids
+        assert lists.empties == arrays.empties
+        for x in range(lists.width):
+            for y in range(lists.height):
+                assert lists.is_cell_empty((x, y)) == arrays.is_cell_empty((x, y))
+                assert self.get_ids(lists[x][y]) == self.get_ids(arrays[x][y])
+        assert self.agents[1][7].pos is None
+
+    def test_neighbors(self):
+        lists, arrays = self.grids
+        present = [agent for agent in self.agents[1] if agent.pos is not None]
+        owners, neighbors = arrays.get_neighbor_pairs(np.array([agent.unique_id for agent in present]), 2)
+        for agent in present:
+            expected = self.get_ids(lists.get_neighbors(agent.pos, moore=True, radius=2))
+            assert self.get_ids(arrays.get_neighbors(agent.pos, moore=True, radius=2)) == expected
+            assert sorted(neighbors[owners == agent.unique_id].tolist()) == expected
+
+    def test_errors(self):
+        lists, arrays = self.grids
+        with self.assertRaises(ValueError):
+            arrays.place_agent(self.agents[1][1], (1, 1))
+        with self.assertRaises(ValueError):
+            lists.get_neighbor_pairs(np.array([1]), 2)
@@ -0,0 +1,46 @@
+import contextlib
+import io
+from unittest import TestCase
+
+from virus_model.model import *
+from virus_model.unittest import util
+
+
+def create_model() -> VirusModel:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return util.create_model(num_agents=800, choice_of_measure='no_measures')
+
+
+class TestRoosterModel(TestCase):
+    def setUp(self):
+        self.model = create_model()
+        self.rooster_model = self.model.rooster_model
+
+    def test_fill_rooms(self):
+        """
+        Make sure that filling the rooms gives the same result as assigning the agents one by one.
+        """
+        requested = self.rooster_model.draw_room_ids(self.rooster_model.get_available_room_ids())
+        occupancy = np.zeros(self.model.grid.room_count, dtype=int)
+        assigned = self.rooster_model.fill_rooms(requested, occupancy)
+
+        expected_occupancy = [0] * self.model.grid.room_count
+        for agent_id, room_id in enumerate(requested):
+            if room_id != self.rooster_model.break_room_id and \
+                    expected_occupancy[room_id] < self.model.grid.rooms_list[room_id].get_capacity():
+                expected_occupancy[room_id] += 1
+                assert assigned[agent_id] == room_id
+            else:
+                assert assigned[agent_id] == self.rooster_model.break_room_id
+        assert list(occupancy) == expected_occupancy
+
+    def test_rooster(self):
+        rooster = self.rooster_model.rooster
+        for lecture, timeslot in enumerate(range(0, DAY_DURATION, LECTURE_DURATION)):
+            assert (rooster[timeslot:timeslot + LECTURE_DURATION] == rooster[timeslot]).all()
+            counts = np.bincount(rooster[timeslot], minlength=self.model.grid.room_count + 1)
+            assert (counts[:-1] == self.rooster_model.occupancy[lecture]).all()
+            assert (counts[:-1] <= self.rooster_model.capacities).all()
+
+    def test_seed(self):
+        assert (create_model().rooster_model.rooster == self.rooster_model.rooster).all()
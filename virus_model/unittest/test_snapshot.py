@@ -0,0 +1,51 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from virus_model.model import VirusModel, DAY_DURATION
+from virus_model.snapshot import *
+from virus_model.unittest.util import create_model
+from virus_model.vectorized_model import VectorizedVirusModel
+
+
+def run(model, steps: int):
+    for _ in range(steps):
+        model.step()
+    return model.datacollector.get_model_vars_dataframe()
+
+
+class TestSnapshot(TestCase):
+    def test_restore(self):
+        """
+        Make sure that continuing a restored model gives exactly the same results as continuing the original model.
+        """
+        for model_class in [VirusModel, VectorizedVirusModel]:
+            reference = run(create_model(model_class, choice_of_measure='no_measures'), 4 * DAY_DURATION)
+
+            model = create_model(model_class, choice_of_measure='no_measures')
+            run(model, 2 * DAY_DURATION + 5)
+            restored = restore_snapshot(take_snapshot(model))
+            assert run(restored, 2 * DAY_DURATION - 5).equals(reference)
+
+    def test_fork(self):
+        with tempfile.TemporaryDirectory() as directory:
+            model = create_model(choice_of_measure='no_measures', data_file=directory + os.sep + "source.stream")
+            run(model, DAY_DURATION)
+            snapshot = take_snapshot(model)
+            reference = run(model, DAY_DURATION)
+
+            fork = fork_model(snapshot, directory + os.sep + "fork.stream", choice_of_measure='contact_tracing',
+                              participation_tracing=100)
+            assert fork.choice_of_measure == 'contact_tracing'
+            data = run(fork, DAY_DURATION)
+            assert len(data) == 2 * DAY_DURATION
+            assert data.iloc[:DAY_DURATION].equals(reference.iloc[:DAY_DURATION])
+
+            # The fork doesn't affect the source or its data.
+            assert model.choice_of_measure == 'no_measures'
+            assert model.datacollector.get_model_vars_dataframe().equals(reference)
+
+            with self.assertRaises(ValueError):
+                fork_model(snapshot)
+            with self.assertRaises(ValueError):
+                fork_model(snapshot, directory + os.sep + "fork.stream", num_agents=10)
@@ -0,0 +1,45 @@
+import contextlib
+import io
+from unittest import TestCase
+
+from virus_model.model import *
+from virus_model.state_counters import StateCounters
+from virus_model.unittest.util import create_model
+
+
+class TestStateCounters(TestCase):
+    def test_counts(self):
+        counters = StateCounters()
+        counters.add(DiseaseState.HEALTHY, False)
+        counters.add(DiseaseState.HEALTHY, False)
+        counters.add(DiseaseState.INFECTIOUS, False)
+
+        counters.move(DiseaseState.HEALTHY, False, DiseaseState.INFECTED, False)
+        counters.move(DiseaseState.INFECTIOUS, False, DiseaseState.INFECTIOUS, True)
+
+        assert counters.count(DiseaseState.HEALTHY) == 1
+        assert counters.count(DiseaseState.INFECTED, False) == 1
+        assert counters.count(DiseaseState.INFECTIOUS, False) == 0
+        assert counters.count_infected() == 2
+        assert counters.count_infected(True) == 1
+        assert counters.count_not_infected(True) == 0
+        assert counters.count_quarantined() == 1
+
+    def test_model(self):
+        """
+        Make sure that the counters of the model match counting all the agents.
+        """
+        with contextlib.redirect_stdout(io.StringIO()):
+            model = create_model(num_agents=150, seed=3)
+            for _ in range(5 * DAY_DURATION):
+                model.step()
+
+        agents = model.schedule.agents
+        for state in DiseaseState:
+            for quarantined in (False, True):
+                assert model.state_counters.count(state, quarantined) == \
+                       sum(agent.virus.disease_state is state and agent.quarantine is quarantined for agent in agents)
+        assert model.test_stats.get_total_count() == \
+               sum(agent.virus_test.get_test_stats().get_total_count() for agent in agents)
+        assert model.test_stats.get_positive_count() == \
+               sum(agent.virus_test.get_test_stats().get_positive_count() for agent in agents)
@@ -0,0 +1,64 @@
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest import TestCase
+
+from mesa.datacollection import DataCollector
+
+from virus_model.streaming_collector import *
+
+
+class TestStreamingDataCollector(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = self.directory.name + os.sep + "model.stream"
+        self.reporters = {"step": "step", "half": lambda model: model.step / 2}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_collect(self):
+        collector = StreamingDataCollector(self.reporters, self.file, chunk_size=3)
+        reference = DataCollector(model_reporters=self.reporters)
+        for step in range(7):
+            model = SimpleNamespace(step=step)
+            collector.collect(model)
+            reference.collect(model)
+
+            # Only complete chunks are written to the file.
+            assert len(read_stream(self.file)[1]) == (step + 1) // 3 * 3
+
+        data = collector.get_model_vars_dataframe()
+        assert data.equals(reference.get_model_vars_dataframe())
+        assert data["step"].dtype == np.int64
+
+    def test_incomplete_row(self):
+        collector = StreamingDataCollector(self.reporters, self.file, chunk_size=1)
+        for step in range(4):
+            collector.collect(SimpleNamespace(step=step))
+
+        # Simulate a crash while writing the last row.
+        with open(self.file, 'ab') as stream:
+            stream.write(b"\0" * 5)
+
+        columns, values = read_stream(self.file)
+        assert columns == ["step", "half"]
+        assert values[:, 0].tolist() == [0, 1, 2, 3]
+
+    def test_collect_repeated(self):
+        collector = StreamingDataCollector(self.reporters, self.file, chunk_size=3)
+        reference = DataCollector(model_reporters=self.reporters)
+        for step in range(2):
+            model = SimpleNamespace(step=step)
+            collector.collect(model)
+            reference.collect(model)
+
+        model = SimpleNamespace(step=5)
+        collector.collect_repeated(model, 8)
+        for _ in range(8):
+            reference.collect(model)
+        collector.collect(SimpleNamespace(step=6))
+        reference.collect(SimpleNamespace(step=6))
+
+        assert collector.get_step_count() == 11
+        assert collector.get_model_vars_dataframe().equals(reference.get_model_vars_dataframe())
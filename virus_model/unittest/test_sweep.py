@@ -0,0 +1,51 @@
+from unittest import TestCase
+
+from virus_model.noviz.sweep import *
+
+
+class TestSweep(TestCase):
+    def test_grid(self):
+        sweep = Sweep({"name": "Tracing", "replicates": 3, "seed": 10,
+                       "fixed": {"stepCount": 2000, "mitigation": "contact_tracing", "write-plots": True,
+                                 "show-plots": False},
+                       "parameters": {"participationTracing": {"min": 0, "max": 100, "step": 20},
+                                      "testDelay": {"values": [1, 5]}}})
+        experiments = list(sweep)
+        assert len(experiments) == sweep.get_experiment_count() == 6 * 2 * 3
+        assert len(set(experiment.split()[0] for experiment in experiments)) == len(experiments)
+        assert experiments[0] == "Tracing0_0 --stepCount 2000 --mitigation contact_tracing --write-plots " \
+                                 "--participationTracing 0 --testDelay 1 --random-seed 10"
+        assert experiments[-1].endswith("--participationTracing 100 --testDelay 5 --random-seed 12")
+
+    def test_batch(self):
+        sweep = Sweep({"name": "Batch", "replicates": 4, "seed": 10, "batch": True,
+                       "fixed": {"engine": "vectorized"},
+                       "parameters": {"testDelay": {"values": [1, 5]}}})
+        experiments = list(sweep)
+        assert len(experiments) == sweep.get_experiment_count() == 2
+        assert experiments[0] == "Batch0 --engine vectorized --testDelay 1 --random-seed 10 --replicates 4"
+
+    def test_sampled(self):
+        for design in ['lhs', 'sobol']:
+            sweep = Sweep({"design": design, "samples": 64,
+                           "parameters": {"baseInfection": {"min": 0.0, "max": 10.0},
+                                          "spreadChance": {"min": 0, "max": 63}}})
+            experiments = [experiment.split() for experiment in sweep]
+            assert len(experiments) == 64
+
+            # Every stratum of every parameter should get exactly 1 point.
+            spread_chances = [int(experiment[experiment.index("--spreadChance") + 1]) for experiment in experiments]
+            assert sorted(spread_chances) == list(range(64))
+            base_infections = [float(experiment[experiment.index("--baseInfection") + 1])
+                               for experiment in experiments]
+            assert sorted(int(value / 10 * 64) for value in base_infections) == list(range(64))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Sweep({"design": "lhs", "parameters": {"spreadChance": {"min": 0, "max": 10}}})
+        with self.assertRaises(ValueError):
+            Sweep({"parameters": {"spreadChance": {"min": 0, "max": 10}}})
+        with self.assertRaises(ValueError):
+            Sweep({"fixed": {"random-seed": 1}})
+        with self.assertRaises(ValueError):
+            Sweep({"replicates": 2, "batch": True})
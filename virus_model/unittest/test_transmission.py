@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+from virus_model.room_grid import *
+from virus_model.transmission import TransmissionKernel
+
+
+class TestTransmissionKernel(TestCase):
+    def setUp(self):
+        self.spread_distance = 5
+        self.grid = RoomGrid(100, 100, False, room_count=7, room_size=9, break_room_size=15,
+                             occlusion_radius=self.spread_distance)
+        self.kernel = TransmissionKernel(self.grid, self.spread_distance)
+        self.rand = np.random.default_rng(1)
+
+        # Put agents in all the positions agents can be in: seats, the hallways, and the break room.
+        seats = np.array([(seat.x, seat.y) for seat in self.grid.seats_list])
+        walkable = np.argwhere(self.grid.walkable_mask)
+        positions = np.concatenate((seats[self.rand.choice(len(seats), 150)],
+                                    walkable[self.rand.choice(len(walkable), 400)]))
+        self.x = positions[:, 0]
+        self.y = positions[:, 1]
+
+    def test_find_pairs(self):
+        """
+        Make sure that the kernel finds exactly the same pairs as comparing every pair of agents.
+        """
+        agents = np.arange(len(self.x))
+        sources = agents[self.rand.random(len(agents)) < 0.3]
+        targets = np.setdiff1d(agents, sources)
+
+        expected = set()
+        for source in sources:
+            for target in targets:
+                distance = max(abs(self.x[source] - self.x[target]), abs(self.y[source] - self.y[target]))
+                if 0 < distance <= self.spread_distance and not self.grid.is_path_obstructed(
+                        self.x[source], self.y[source], self.x[target], self.y[target]):
+                    expected.add((source, target))
+
+        found_sources, found_targets = self.kernel.find_pairs(self.x, self.y, sources, targets)
+        found = list(zip(found_sources.tolist(), found_targets.tolist()))
+        assert len(found) == len(set(found))
+        assert set(found) == expected
+
+    def test_spread(self):
+        """
+        Make sure that only targets can get infected and that a chance of 0 never infects anyone.
+        """
+        agents = np.arange(len(self.x))
+        sources, targets = agents[:200], agents[200:]
+
+        assert len(self.kernel.spread(self.x, self.y, sources, targets, 0, self.rand)) == 0
+        infected = self.kernel.spread(self.x, self.y, sources, targets, 100, self.rand)
+        assert len(infected) > 0
+        assert set(infected.tolist()) == set(self.kernel.find_pairs(self.x, self.y, sources, targets)[1].tolist())
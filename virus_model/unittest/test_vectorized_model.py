@@ -0,0 +1,114 @@
+from unittest import TestCase
+
+from virus_model.model import VirusModel
+from virus_model.unittest.util import create_model
+from virus_model.vectorized_model import *
+
+
+class TestVectorizedVirusModel(TestCase):
+    def setUp(self):
+        self.model = create_model(VectorizedVirusModel)
+
+    def test_columns(self):
+        """
+        Make sure that the vectorized model collects exactly the same data as the object model.
+        """
+        reference = create_model(VirusModel)
+        reference.step()
+        self.model.step()
+
+        assert list(self.model.datacollector.get_model_vars_dataframe().columns) == \
+               list(reference.datacollector.get_model_vars_dataframe().columns)
+
+    def test_positions(self):
+        """
+        Make sure that agents only ever stand on their seat or on positions they are allowed to walk on.
+        """
+        seats = set(zip(self.model.layout.seat_x, self.model.layout.seat_y))
+        for _ in range(3 * DAY_DURATION):
+            self.model.step()
+            for x, y, room in zip(self.model.pos_x[0], self.model.pos_y[0], self.model.room[0]):
+                if room != NO_ROOM:
+                    assert (x, y) in seats
+                else:
+                    assert self.model.layout.break_walkable[x, y]
+
+    def test_population(self):
+        """
+        Make sure that the disease state counts always add up to the total number of agents.
+        """
+        for _ in range(10 * DAY_DURATION):
+            self.model.step()
+
+        data = self.model.datacollector.get_model_vars_dataframe()
+        total = data[['deaths', 'healthy', 'just infected', 'testable', 'infectious', 'symptomatic', 'recovered']]
+        assert (total.sum(axis=1) == self.model.num_agents).all()
+        assert (data['tested total'] == data['tested pending'] + data['tested positive'] +
+                data['tested negative']).all()
+
+    def test_seed(self):
+        """
+        Make sure that two models with the same seed produce the same results.
+        """
+        other = create_model(VectorizedVirusModel)
+        for _ in range(5 * DAY_DURATION):
+            self.model.step()
+            other.step()
+
+        assert self.model.datacollector.get_model_vars_dataframe().equals(
+            other.datacollector.get_model_vars_dataframe())
+
+    def test_has_died_out(self):
+        """
+        Make sure that the collected values no longer change once the epidemic has died out.
+        """
+        for model_class in [VirusModel, VectorizedVirusModel]:
+            model = create_model(model_class, base_infection_rate=5, spread_chance=1, daily_testing_chance=50,
+                                 participation_tracing=100, seed=1)
+            steps = 0
+            while not model.has_died_out():
+                assert steps < 100 * DAY_DURATION
+                model.step()
+                steps += 1
+
+            for _ in range(14 * DAY_DURATION):
+                model.step()
+            data = model.datacollector.get_model_vars_dataframe()
+            assert steps > 0
+            assert (data.iloc[steps:] == data.iloc[steps]).all().all()
+
+    def test_quarantine_end_day(self):
+        """
+        Make sure that traced contacts are released on the same day as in the object model. A contact with a lower ID
+        than the agent that traced it has already been handled on that day, so its quarantine lasts a day longer.
+        """
+        positive_agent, lower_contact, higher_contact = 3, 1, 5
+        released = {}
+        for model_class in [VirusModel, VectorizedVirusModel]:
+            model = create_model(model_class, spread_chance=0, daily_testing_chance=-1, choice_of_measure='no_measures',
+                                 participation_tracing=100)
+            if model_class is VirusModel:
+                ledger = model.contact_ledger
+                model.agents_by_id[positive_agent].testing(reason="risk_contact")
+            else:
+                ledger = model.replicates[0].contact_ledger
+                tested = np.zeros_like(model.quarantine)
+                tested[0, positive_agent] = True
+                model.perform_tests(tested)
+            for contact in [lower_contact, higher_contact]:
+                ledger.add_contact(positive_agent, contact, 0)
+
+            # The day on which each agent is first released from its quarantine.
+            released[model_class] = {}
+            quarantined = set()
+            while model.day < 13:
+                model.step()
+                for agent in [positive_agent, lower_contact, higher_contact]:
+                    if (model.agents_by_id[agent].quarantine if model_class is VirusModel
+                            else model.quarantine[0, agent]):
+                        quarantined.add(agent)
+                    elif agent in quarantined:
+                        released[model_class].setdefault(agent, model.day)
+
+        assert released[VirusModel] == released[VectorizedVirusModel]
+        assert released[VirusModel][lower_contact] == released[VirusModel][higher_contact] + 1
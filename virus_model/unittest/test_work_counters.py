@@ -0,0 +1,64 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from virus_model.model import VirusModel, DAY_DURATION
+from virus_model.unittest.util import create_model
+from virus_model.vectorized_model import VectorizedVirusModel
+from virus_model.work_counters import *
+
+
+class TestWorkCounters(TestCase):
+    def run_model(self, model_class, counters=None):
+        model = create_model(model_class, num_agents=200)
+        model.set_counters(counters)
+        for _ in range(2 * DAY_DURATION):
+            model.step()
+        return model.datacollector.get_model_vars_dataframe()
+
+    def test_counting_does_not_change_results(self):
+        for model_class in (VirusModel, VectorizedVirusModel):
+            counters = WorkCounters()
+            assert self.run_model(model_class, counters).equals(self.run_model(model_class))
+
+            steps = counters.get_steps()
+            assert len(steps) == 2 * DAY_DURATION
+            totals = counters.get_totals()
+            assert totals[COUNTER_CANDIDATE_PAIRS] > 0
+            assert totals[COUNTER_SEAT_PICKS] > 0
+            assert totals[get_draw_counter('transmission')] == 2 * DAY_DURATION * 200
+            # The routine tests are drawn once per day, at the start of the day.
+            assert steps[0][get_draw_counter('testing')] == steps[DAY_DURATION][get_draw_counter('testing')] == 200
+
+    def test_path_checks(self):
+        model = create_model(num_agents=200)
+        counters = WorkCounters()
+        model.set_counters(counters)
+        model.grid.is_path_obstructed(0, 0, 10, 0)
+        model.grid.is_path_obstructed(0, 0, 1, 1)
+        counters.record_step()
+        counts = counters.get_steps()[0]
+        assert counts[COUNTER_PATH_CHECKS] == 2
+        assert counts[COUNTER_PATH_WALKS] == 1
+        assert counts[COUNTER_PATH_CELLS] == 11
+
+        model.set_counters(None)
+        model.grid.is_path_obstructed(0, 0, 10, 0)
+        model.streams.movement.randrange(100)
+        counters.record_step()
+        assert all(count == 0 for count in counters.get_steps()[1].values())
+
+    def test_write_csv(self):
+        counters = WorkCounters(first_step=5)
+        counters.add(COUNTER_CONTACTS, 3)
+        counters.record_step()
+        counters.record_step()
+
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, "counters.csv")
+            counters.write_csv(file)
+            with open(file) as output:
+                rows = [line.split(",") for line in output.read().splitlines()]
+        assert rows[0] == ["step"] + ALL_COUNTERS
+        assert [row[0] for row in rows[1:]] == ["5", "6"]
+        assert rows[1][1 + ALL_COUNTERS.index(COUNTER_CONTACTS)] == "3"
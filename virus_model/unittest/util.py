@@ -0,0 +1,29 @@
+"""
+Creates the models that are used by the tests.
+"""
+from typing import Any, Dict, Type
+
+from mesa import Model
+
+from virus_model.model import VirusModel
+
+TEST_PARAMETERS: Dict[str, Any] = dict(num_agents=100, grid_width=100, grid_height=100, base_infection_rate=10,
+                                       spread_distance=2, spread_chance=8, daily_testing_chance=5,
+                                       choice_of_measure='contact_tracing', test_delay=2, participation_tracing=40,
+                                       last_contact_days=14, distance_tracking=2, seed=42, room_count=4, room_size=10,
+                                       break_room_size=15)
+"""
+The parameters of the models of the tests, unless a test overrides them. These describe a small building, so the tests
+run quickly.
+"""
+
+
+def create_model(model_class: Type[Model] = VirusModel, **parameters: Any) -> Model:
+    """
+    Creates a model for a test.
+
+    :param model_class: The model implementation to create.
+    :param parameters: The parameters that differ from `TEST_PARAMETERS`, by name.
+    :return: The new model.
+    """
+    return model_class(**{**TEST_PARAMETERS, **parameters})
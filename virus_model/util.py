@@ -1,5 +1,7 @@
 import os
-from typing import Set, Tuple
+from typing import Callable, Set, Tuple
+
+import numpy as np
 
 
 def get_line_between_points(x_0: int, y_0: int, x_1: int, y_1: int) -> Set[Tuple[int, int]]:
@@ -43,6 +45,25 @@ def get_line_between_points(x_0: int, y_0: int, x_1: int, y_1: int) -> Set[Tuple
     return coordinates
 
 
+def shift_mask(mask: np.ndarray, dx: int, dy: int, fill: bool = False) -> np.ndarray:
+    """
+    Shifts a 2d mask so that out[x, y] = mask[x + dx, y + dy].
+
+    :param mask: The mask to shift, indexed as [x, y].
+    :param dx: The x offset.
+    :param dy: The y offset.
+    :param fill: The value to use for positions that fall outside of the mask.
+    :return: The shifted mask.
+    """
+    width, height = mask.shape
+    out = np.full(mask.shape, fill, dtype=mask.dtype)
+    x_from, x_to = max(0, -dx), min(width, width - dx)
+    y_from, y_to = max(0, -dy), min(height, height - dy)
+    if x_from < x_to and y_from < y_to:
+        out[x_from:x_to, y_from:y_to] = mask[x_from + dx:x_to + dx, y_from + dy:y_to + dy]
+    return out
+
+
 def get_directory(file: str) -> str:
     """
     Parses a directory from a string. Note that it checks the path relative to the current directory.
@@ -59,3 +80,20 @@ def get_directory(file: str) -> str:
     if not os.path.isdir(directory):
         raise NotADirectoryError("Path is not a directory: \"{}\"!".format(directory))
     return directory
+
+
+def write_atomically(file: str, write: Callable[[str], None]) -> None:
+    """
+    Writes a file in such a way that the file either contains all the data or does not exist/keeps its old contents.
+    The data is first written to a temporary file in the same directory, which then replaces the actual file.
+
+    :param file: The path of the file to write.
+    :param write: The function that writes the data to the path it is given.
+    """
+    temp_file = "{}.{}.tmp".format(file, os.getpid())
+    try:
+        write(temp_file)
+        os.replace(temp_file, file)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
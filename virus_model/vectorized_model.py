@@ -0,0 +1,967 @@
+"""
+A struct-of-arrays implementation of the `VirusModel`.
+
+Instead of stepping every `VirusAgent` object individually, the `VectorizedVirusModel` stores the state of all the agents
+(positions, disease states, quarantine flags, rooms, tests, etc.) in NumPy arrays and advances all of them at once using
+a few vectorized passes per tick. The object model in `virus_model.model` remains the reference implementation; this
+model follows the same rules and produces the same DataCollector columns, but it does not reproduce its exact random
+sequence.
+
+Every array has a leading replicate axis, so the same passes can also advance several replicates of an experiment at
+once. A single run is a model with one replicate. See `VectorizedVirusModel`.
+"""
+import functools
+import random
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+import pandas as pd
+from mesa import Model
+from mesa.datacollection import DataCollector
+
+from virus_model.batched_model import Replicate
+from virus_model.model import DAY_DURATION, NIGHT_DURATION, QUARANTINE_DURATION
+from virus_model.profiler import *
+from virus_model.random_streams import RandomStreams
+from virus_model.room_grid import get_cell_buckets, get_cell_pairs
+from virus_model.rooster import *
+from virus_model.streaming_collector import StreamingDataCollector, DEFAULT_CHUNK_SIZE
+from virus_model.virus import *
+from virus_model.virus_test import RESULT_ACTIVE_DAY
+from virus_model.work_counters import *
+
+UNTESTED, POSITIVE, NEGATIVE = 0, 1, 2
+"""
+The codes used to store a `TestOutcome` in an array.
+"""
+
+NO_ROOM = -1
+"""
+The room ID used for agents that are not in any lecture room.
+"""
+
+DISEASE_PROGRESSION = {
+    DiseaseState.INFECTED.value: DISEASE_PROGRESSION_TO_TESTABLE,
+    DiseaseState.TESTABLE.value: DISEASE_PROGRESSION_TO_INFECTIOUS,
+    DiseaseState.INFECTIOUS.value: DISEASE_PROGRESSION_TO_SYMPTOMATIC,
+    DiseaseState.SYMPTOMATIC.value: DISEASE_PROGRESSION_TO_OUTCOME,
+    DiseaseState.RECOVERED.value: RECOVERY_COOLDOWN,
+}
+"""
+The number of days an agent stays in a given `DiseaseState` (by value). See `Virus.__get_next_update`.
+"""
+
+
+STATE_COUNT = max(state.value for state in DiseaseState) + 1
+"""
+The number of possible values of a `DiseaseState`, i.e. the number of states that are counted. See `count_states`.
+"""
+
+
+def get_offsets(radius: int) -> np.ndarray:
+    """
+    Gets the x/y offsets of all the cells in a Moore neighborhood with the given radius, excluding the center.
+
+    :param radius: The radius of the neighborhood.
+    :return: An array of shape (n, 2) with the x/y offsets.
+    """
+    return np.array([(dx, dy) for dx in range(-radius, radius + 1) for dy in range(-radius, radius + 1)
+                     if dx != 0 or dy != 0], dtype=int).reshape(-1, 2)
+
+
+class GridLayout:
+    """
+    The static information about the layout of a `RoomGrid` that's used by the vectorized passes. The layout never
+    changes, so this is only computed once per model.
+    """
+
+    def __init__(self, grid: RoomGrid, spread_distance: int, distance_tracking: int):
+        """
+        :param grid: The grid to compute the layout of. Its occlusion radius must be at least the spread distance.
+        :param spread_distance: The maximum distance between two agents for them to be able to infect each other.
+        :param distance_tracking: The radius within which contacts are traced.
+        """
+        width, height = grid.width, grid.height
+        self.walkable = grid.walkable_mask
+        """
+        Whether agents at a given [x, y] position can be reached by others. See `RoomGrid.is_available`.
+        """
+
+        self.break_walkable = grid.break_walkable_mask
+        """
+        Whether agents on a break can walk to a given [x, y] position.
+        """
+
+        self.spread_offsets = get_offsets(spread_distance)
+        self.spread_visible = np.empty((width, height, len(self.spread_offsets)), dtype=bool)
+        """
+        Whether an agent at [x, y] can infect an agent at [x + dx, y + dy] for the offset with the index of the last
+        dimension of this array. This means that the target position has to be reachable and that there must not be
+        any walls on the line between the two positions. See `RoomGrid.is_path_obstructed`.
+        """
+        radius = grid.occlusion_radius
+        for idx, (dx, dy) in enumerate(self.spread_offsets):
+            obstructed = grid.occlusion_index[:, :, dx + radius, dy + radius]
+            self.spread_visible[:, :, idx] = shift_mask(self.walkable, dx, dy) & ~obstructed
+
+        self.tracking_offsets = get_offsets(distance_tracking)
+
+        rooms = grid.rooms_list
+        self.seat_counts = np.array([room.get_capacity() for room in rooms], dtype=int)
+        self.seat_starts = np.concatenate(([0], np.cumsum(self.seat_counts)[:-1])).astype(int)
+        seats = [seat for room in rooms for seat in room.seats]
+        self.seat_x = np.array([seat.x for seat in seats], dtype=int)
+        self.seat_y = np.array([seat.y for seat in seats], dtype=int)
+        self.seat_room = np.repeat(np.arange(len(rooms)), self.seat_counts)
+
+
+class VectorizedVirusModel(Model):
+    """
+    A vectorized version of `VirusModel`. It accepts the same parameters and exposes the same `datacollector` columns.
+
+    The model can also run several replicates of the same experiment at once, which only differ in their random seed.
+    The state of the agents is stored in arrays of shape (replicates, agents), so all the replicates are advanced by
+    the same vectorized passes, while the rest of the state of every replicate is kept in a `Replicate`. Every
+    replicate draws its random values from its own streams, in exactly the same order as a model that only runs that
+    replicate, so it produces exactly the same results as a single run with its seed. A model that is created with a
+    single seed runs a single replicate.
+    """
+
+    def __init__(self, num_agents: int, grid_width: int, grid_height: int, base_infection_rate: float,
+                 spread_distance: int, spread_chance: int, daily_testing_chance: int, choice_of_measure: str,
+                 test_delay: int, participation_tracing: int, last_contact_days: int, distance_tracking: int,
+                 seed: int = None, grid_canvas=None, server=None,
+                 room_count: int = 10, room_size: int = 15, break_room_size: int = 20,
+                 data_file: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 seeds: Optional[Sequence[Optional[int]]] = None, data_files: Optional[Sequence[str]] = None,
+                 *args, **kwargs):
+        """
+        Initializes a new vectorized Virus Model. See `VirusModel` for a description of the parameters.
+
+        `grid_canvas` and `server` are only accepted for compatibility with `VirusModel`; this model cannot be
+        visualized.
+
+        :param seeds: The seed of every replicate, when running multiple replicates at once. The number of seeds is the
+        number of replicates. When None, a single replicate is run with `seed`.
+        :param data_files: The file to stream the collected data of every replicate to, when running multiple
+        replicates at once. When None, the data of the replicates is kept in memory instead. See
+        `get_model_vars_dataframes`.
+        """
+        super().__init__(*args, **kwargs)
+        if seeds is None:
+            seeds = [seed]
+            data_files = None if data_file is None else [data_file]
+        elif seed is not None or data_file is not None:
+            raise ValueError("Either give a single seed and data file or the seeds and data files of every replicate!")
+        if len(seeds) == 0:
+            raise ValueError("At least one replicate is required!")
+        if data_files is not None and len(data_files) != len(seeds):
+            raise ValueError("Expected {} data files, but got {}!".format(len(seeds), len(data_files)))
+        if seed is not None:
+            self.random = random.Random(seed)
+
+        self.num_agents = num_agents
+        self.num_replicates = len(seeds)
+        self.base_infection_rate = base_infection_rate
+        self.test_delay = test_delay
+        self.spread_distance = spread_distance
+        self.spread_chance = spread_chance
+        self.participation_tracing = participation_tracing
+        self.last_contact_days = last_contact_days
+        self.daily_testing_chance = daily_testing_chance
+        self.choice_of_measure = choice_of_measure
+        self.distance_tracking = distance_tracking
+
+        self.grid = RoomGrid(grid_width, grid_height, False, room_count=room_count,
+                             room_size=room_size, break_room_size=break_room_size,
+                             occlusion_radius=spread_distance)
+
+        self.running = True
+        self.profiler: Optional[PhaseProfiler] = None
+        """
+        Measures the time of the phases of every step when set. See `virus_model.profiler`.
+        """
+        self.counters: Optional[WorkCounters] = None
+        """
+        Counts the work done in every step when set. See `set_counters`.
+        """
+        self.day = 0
+        self.steps = 0
+        """
+        The number of steps taken by the model, including the skipped weekend steps. See `RandomActivation.steps`.
+        """
+        self.total_steps = 0
+        self.day_step = 0
+        self.virtual_steps = 0
+
+        self.replicates: List[Replicate] = [
+            Replicate(self, index, replicate_seed, list(MODEL_REPORTERS),
+                      None if data_files is None else data_files[index], chunk_size)
+            for index, replicate_seed in enumerate(seeds)]
+        """
+        The replicates of this model, in the order of their seeds.
+        """
+        self.__make_day_roosters()
+
+        self.layout = GridLayout(self.grid, self.spread_distance, self.distance_tracking)
+        """
+        The static information about the layout of the grid. This is shared by all the replicates. See `GridLayout`.
+        """
+        self.__init_agents()
+
+    def __init_agents(self) -> None:
+        """
+        Creates the arrays that describe the state of all the agents of all the replicates. The first axis of every
+        array is the replicate, the second one the agent.
+        """
+        shape = (self.num_replicates, self.num_agents)
+        uid = np.arange(self.num_agents)
+
+        disease_state = np.full(self.num_agents, DiseaseState.HEALTHY.value, dtype=np.int8)
+        infected = (uid / self.num_agents) <= (self.base_infection_rate / 100)
+        disease_state[infected] = DiseaseState.INFECTED.value + uid[infected] % 4
+        self.disease_state = np.tile(disease_state, (self.num_replicates, 1))
+
+        self.next_disease_update = np.full(shape, 9999, dtype=np.int64)
+        for state, days in DISEASE_PROGRESSION.items():
+            self.next_disease_update[self.disease_state == state] = days
+
+        self.quarantine = np.zeros(shape, dtype=bool)
+        self.quarantine_end_day = np.zeros(shape, dtype=np.int64)
+        """
+        The day on which the quarantine of every agent ends. See `VirusAgent.quarantine_end_day`.
+        """
+        self.day_tested = np.full(shape, -1, dtype=np.int64)
+
+        self.last_result_day = np.full(shape, -(RESULT_ACTIVE_DAY + 1), dtype=np.int64)
+        self.last_result_outcome = np.full(shape, UNTESTED, dtype=np.int8)
+        self.pending_agent = np.empty(0, dtype=np.int64)
+        """
+        The agents with a pending test, as an index into the flattened state arrays (replicate * agents + agent).
+        """
+        self.pending_day = np.empty(0, dtype=np.int64)
+        self.pending_outcome = np.empty(0, dtype=np.int8)
+        self.test_counts: Dict[str, np.ndarray] = {outcome: np.zeros(self.num_replicates, dtype=np.int64)
+                                                   for outcome in ("total", "pending", "positive", "negative")}
+
+        self.pos_x = np.zeros(shape, dtype=np.int64)
+        self.pos_y = np.zeros(shape, dtype=np.int64)
+        self.move_to_random_position(np.ones(shape, dtype=bool), 'placement')
+
+        self.room = np.full(shape, NO_ROOM, dtype=np.int64)
+        self.in_lecture = np.zeros(shape, dtype=bool)
+
+        first_rooms = self.rooster[:, 0]
+        in_room = first_rooms != self.break_room_id
+        self.room[in_room] = first_rooms[in_room]
+        self.set_seats(in_room, 'placement')
+
+    def __get_single_replicate(self) -> Replicate:
+        """
+        Gets the only replicate of this model.
+
+        :return: The replicate.
+        """
+        if self.num_replicates != 1:
+            raise ValueError("This model runs {} replicates, use `replicates` to access them!"
+                             .format(self.num_replicates))
+        return self.replicates[0]
+
+    @property
+    def streams(self) -> RandomStreams:
+        """
+        The random streams of a model that runs a single replicate. See `VirusModel.streams`.
+        """
+        return self.__get_single_replicate().streams
+
+    @property
+    def datacollector(self) -> Union[DataCollector, StreamingDataCollector]:
+        """
+        The data collector of a model that runs a single replicate. See `get_model_vars_dataframes` for the data of
+        multiple replicates.
+        """
+        return self.__get_single_replicate().datacollector
+
+    @property
+    def break_room_id(self) -> int:
+        """
+        The ID of the 'break' room. See `RoosterModel.break_room_id`.
+        """
+        return self.grid.room_count
+
+    def __make_day_roosters(self) -> None:
+        """
+        Makes the rooster of the day for every replicate. See `RoosterModel.make_day_rooster`.
+        """
+        for replicate in self.replicates:
+            replicate.rooster_model.make_day_rooster()
+        self.rooster = np.stack([replicate.rooster_model.rooster for replicate in self.replicates])
+        """
+        The rooster of every replicate, with shape (replicates, steps, agents).
+        """
+
+    def __draw(self, stream: str, counts: Sequence[int],
+               draw: Callable[[np.random.Generator, int], np.ndarray]) -> np.ndarray:
+        """
+        Draws random values from a stream of every replicate and concatenates them in the order of the replicates.
+
+        :param stream: The name of the random stream to draw from. See `RANDOM_STREAMS`.
+        :param counts: The number of values to draw for every replicate.
+        :param draw: The function that draws a given number of values from a generator.
+        :return: The values drawn for all the replicates.
+        """
+        return np.concatenate([draw(replicate.streams.get_generator(stream), count)
+                               for replicate, count in zip(self.replicates, counts)])
+
+    def __draw_all(self, stream: str, draw: Callable[[np.random.Generator, int], np.ndarray]) -> np.ndarray:
+        """
+        Draws a random value for every agent of every replicate. See `__draw`.
+
+        :return: The values drawn, with shape (replicates, agents).
+        """
+        return self.__draw(stream, [self.num_agents] * self.num_replicates, draw).reshape(self.num_replicates, -1)
+
+    def __count_per_replicate(self, replicates: np.ndarray) -> np.ndarray:
+        """
+        Counts the number of occurrences of every replicate.
+
+        :param replicates: The replicate indices to count.
+        :return: The number of occurrences of every replicate.
+        """
+        return np.bincount(replicates, minlength=self.num_replicates)
+
+    def move_to_random_position(self, agents: np.ndarray, stream: str = 'movement') -> None:
+        """
+        Moves the given agents to random positions in the break room.
+
+        :param agents: The boolean mask of the agents to move.
+        :param stream: The name of the random stream used to pick the positions. See `RANDOM_STREAMS`.
+        """
+        replicates, agents = np.nonzero(agents)
+        positions = [self.grid.get_random_positions(count, replicate.streams.get_generator(stream), in_break_room=True)
+                     for replicate, count in zip(self.replicates, self.__count_per_replicate(replicates))]
+        self.pos_x[replicates, agents] = np.concatenate([x for x, _ in positions])
+        self.pos_y[replicates, agents] = np.concatenate([y for _, y in positions])
+        if self.counters is not None:
+            self.counters.add(COUNTER_POSITION_PICKS, len(agents))
+
+    def set_seats(self, agents: np.ndarray, stream: str = 'movement') -> None:
+        """
+        Moves the given agents to a random free seat in their current room. All seats are considered free at the start
+        of every step, so the only requirement is that no two of these agents get the same seat.
+
+        :param agents: The boolean mask of the agents to seat.
+        :param stream: The name of the random stream used to pick the seats. See `RANDOM_STREAMS`.
+        """
+        replicates, agents = np.nonzero(agents)
+        if len(agents) == 0:
+            return
+        if self.counters is not None:
+            self.counters.add(COUNTER_SEAT_PICKS, len(agents))
+
+        # Only the replicates with agents to seat draw any values, just like a model of a single replicate would.
+        counts = self.__count_per_replicate(replicates)
+        active = np.flatnonzero(counts)
+        seat_keys = []
+        agent_keys = []
+        for index in active:
+            rand = self.replicates[index].streams.get_generator(stream)
+            seat_keys.append(rand.random(len(self.layout.seat_room)))
+            agent_keys.append(rand.random(counts[index]))
+
+        # Shuffle the seats within every room of every replicate, then hand them out in order.
+        seat_room = np.broadcast_to(self.layout.seat_room, (len(active), len(self.layout.seat_room)))
+        seat_order = np.lexsort((np.stack(seat_keys), seat_room))
+        order_row = np.zeros(self.num_replicates, dtype=int)
+        order_row[active] = np.arange(len(active))
+
+        rooms = self.room[replicates, agents]
+        agent_order = np.lexsort((np.concatenate(agent_keys), rooms, replicates))
+        sorted_replicates, sorted_rooms = replicates[agent_order], rooms[agent_order]
+        groups = sorted_replicates * self.grid.room_count + sorted_rooms
+        first = np.searchsorted(groups, groups, side='left')
+        rank = np.arange(len(agents)) - first
+
+        seated = rank < self.layout.seat_counts[sorted_rooms]
+        for replicate, agent, room in zip(sorted_replicates[~seated], agents[agent_order[~seated]],
+                                          sorted_rooms[~seated]):
+            print("Failed to find a seat for agent {} in room {} of replicate {}!".format(agent, room, replicate))
+
+        seated_replicates = sorted_replicates[seated]
+        seats = seat_order[order_row[seated_replicates], self.layout.seat_starts[sorted_rooms[seated]] + rank[seated]]
+        seated_agents = agents[agent_order[seated]]
+        self.pos_x[seated_replicates, seated_agents] = self.layout.seat_x[seats]
+        self.pos_y[seated_replicates, seated_agents] = self.layout.seat_y[seats]
+
+    def get_test_results(self) -> np.ndarray:
+        """
+        Gets the current test result for every agent. See `VirusTest.get_result`.
+
+        :return: The value of the `TestOutcome` of every agent.
+        """
+        valid = (self.last_result_day <= self.day) & (self.day <= self.last_result_day + RESULT_ACTIVE_DAY)
+        return np.where(valid, self.last_result_outcome, UNTESTED)
+
+    def perform_tests(self, agents: np.ndarray) -> None:
+        """
+        Performs a test for each of the given agents. See `VirusTest.perform_test`.
+
+        :param agents: The boolean mask of the agents to test.
+        """
+        replicates, agents = np.nonzero(agents)
+        if len(agents) == 0:
+            return
+
+        outcome = np.where(self.disease_state[replicates, agents] >= DiseaseState.INFECTED.value,
+                           POSITIVE, NEGATIVE)
+        self.day_tested[replicates, agents] = self.day
+        counts = self.__count_per_replicate(replicates)
+        self.test_counts["total"] += counts
+        self.test_counts["pending"] += counts
+
+        self.pending_agent = np.concatenate((self.pending_agent, replicates * self.num_agents + agents))
+        self.pending_day = np.concatenate((self.pending_day, np.full(len(agents), self.day + self.test_delay)))
+        self.pending_outcome = np.concatenate((self.pending_outcome, outcome.astype(np.int8)))
+        if self.test_delay == 0:
+            self.release_test_results()
+
+    def release_test_results(self) -> None:
+        """
+        Publishes the results of all the pending tests whose result day has arrived.
+        """
+        released = self.pending_day <= self.day
+        if not released.any():
+            return
+
+        outcome = self.pending_outcome[released]
+        replicates, agents = np.divmod(self.pending_agent[released], self.num_agents)
+        positive = self.__count_per_replicate(replicates[outcome == POSITIVE])
+        released_counts = self.__count_per_replicate(replicates)
+        self.test_counts["positive"] += positive
+        self.test_counts["negative"] += released_counts - positive
+        self.test_counts["pending"] -= released_counts
+
+        # Pending tests are stored in the order they were performed, so the latest result of every agent wins.
+        self.last_result_day[replicates, agents] = self.pending_day[released]
+        self.last_result_outcome[replicates, agents] = outcome
+
+        self.pending_agent = self.pending_agent[~released]
+        self.pending_day = self.pending_day[~released]
+        self.pending_outcome = self.pending_outcome[~released]
+
+    def handle_disease_progression(self) -> None:
+        """
+        Advances the disease of every infected agent whose next update is due. See `Virus.handle_disease_progression`.
+        """
+        due = (self.disease_state >= DiseaseState.INFECTED.value) & (self.day >= self.next_disease_update)
+
+        symptomatic = due & (self.disease_state == DiseaseState.SYMPTOMATIC.value)
+        outcomes = self.__draw_all('disease', lambda rand, count: rand.integers(0, 100, count))
+        dies = symptomatic & (outcomes < DISEASE_LETHALITY)
+        recovers = symptomatic & ~dies
+
+        advances = due & ~symptomatic
+        self.disease_state[advances] += 1
+        self.disease_state[dies] = DiseaseState.DECEASED.value
+        self.disease_state[recovers] = DiseaseState.RECOVERED.value
+
+        for state, days in DISEASE_PROGRESSION.items():
+            changed = (advances | recovers) & (self.disease_state == state)
+            self.next_disease_update[changed] = self.day + days
+
+    def testing(self) -> None:
+        """
+        Performs the routine tests of the day. See `VirusAgent.testing`.
+        """
+        chances = self.__draw_all('testing', lambda rand, count: rand.integers(0, 100, count))
+        self.perform_tests(~self.quarantine & (self.disease_state >= DiseaseState.INFECTED.value) &
+                           (chances <= self.daily_testing_chance))
+
+    def get_traced_contacts(self, positive: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gets the contacts of the agents with a positive test result that are reached by contact tracing. See
+        `VirusAgent.quarantine_agents`.
+
+        :param positive: The boolean mask of the agents with a positive test result.
+        :return: Two arrays (owners, contacts), where contacts[i] is a contact of owners[i] that was reached. Both are
+        indices into the flattened state arrays (replicate * agents + agent).
+        """
+        owners = []
+        contacts = []
+        # The contacts are stored per replicate, so they are traced per replicate as well.
+        for replicate in self.replicates:
+            positive_agents = np.flatnonzero(positive[replicate.index])
+            if len(positive_agents) == 0:
+                continue
+
+            replicate_owners, replicate_contacts = replicate.contact_ledger.get_contact_pairs(
+                positive_agents, self.day_tested[replicate.index, positive_agents] - self.last_contact_days)
+            if len(replicate_contacts) == 0:
+                continue
+
+            # Every positive agent gets a separate chance of reaching each of its contacts.
+            reached = (replicate.streams.get_generator('tracing').random(len(replicate_contacts)) <
+                       self.participation_tracing / 100)
+            offset = replicate.index * self.num_agents
+            owners.append(replicate_owners[reached] + offset)
+            contacts.append(replicate_contacts[reached] + offset)
+
+        if len(contacts) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(owners), np.concatenate(contacts)
+
+    def quarantine_contacts(self, contacts: np.ndarray, handled: bool) -> None:
+        """
+        Tests and quarantines the given traced contacts, unless they are quarantined already.
+
+        :param contacts: The contacts, as indices into the flattened state arrays (replicate * agents + agent).
+        :param handled: Whether the start of the day of the contacts has been handled already. See
+        `enforce_quarantine`.
+        """
+        traced = np.zeros(self.quarantine.size, dtype=bool)
+        traced[contacts] = True
+        traced = traced.reshape(self.quarantine.shape) & ~self.quarantine
+
+        self.perform_tests(traced & (self.disease_state != DiseaseState.DECEASED.value))
+        self.enforce_quarantine(traced, handled)
+
+    def enforce_quarantine(self, agents: np.ndarray, handled: bool) -> None:
+        """
+        Places the given agents under quarantine. See `VirusAgent.enforce_quarantine`.
+
+        :param agents: The boolean mask of the agents to quarantine.
+        :param handled: Whether the start of the day of the agents has been handled already. If not, the current day
+        counts as the first day of the quarantine.
+        """
+        self.quarantine[agents] = True
+        self.quarantine_end_day[agents] = self.day + QUARANTINE_DURATION - (0 if handled else 1)
+
+    def next_day(self) -> None:
+        """
+        Handles the start of a new day. See `VirusModel.next_day` and `VirusAgent.new_day`.
+        """
+        profiler = self.profiler
+        if profiler is not None:
+            start = profiler.start()
+
+        self.__make_day_roosters()
+        self.day = int(self.steps / DAY_DURATION)
+        if profiler is not None:
+            profiler.day = self.day
+            start = profiler.record(PHASE_ROOSTER, start)
+
+        self.handle_disease_progression()
+        self.release_test_results()
+
+        results = self.get_test_results()
+        owners, contacts = self.get_traced_contacts(results == POSITIVE)
+
+        # The `VirusModel` handles the start of the day of the agents in the order of their IDs, so a contact that is
+        # traced by an agent with a lower ID is quarantined before its own start of the day is handled, and any other
+        # contact after it. See `VirusAgent.new_day`.
+        traced_before = contacts > owners
+        self.quarantine_contacts(contacts[traced_before], handled=False)
+
+        self.quarantine_end_day[results == NEGATIVE] = self.day
+        self.testing()
+        self.enforce_quarantine((results == POSITIVE) & ~self.quarantine, handled=False)
+        self.quarantine[self.quarantine_end_day <= self.day] = False
+
+        self.quarantine_contacts(contacts[~traced_before], handled=True)
+        # Contacts from before this day can no longer be traced, as every positive result has expired by then.
+        for replicate in self.replicates:
+            replicate.contact_ledger.prune(self.day - self.test_delay - RESULT_ACTIVE_DAY - self.last_contact_days)
+
+        self.virtual_steps = self.day * NIGHT_DURATION
+        print("NEXT DAY: {}".format(self.day))
+        if profiler is not None:
+            profiler.record(PHASE_DAY_ROLLOVER, start)
+
+    def set_counters(self, counters: Optional[WorkCounters]) -> None:
+        """
+        Starts or stops counting the work done in every step. The work of all the replicates is added to the same
+        counters. See `VirusModel.set_counters`.
+
+        :param counters: The counters to add the work to. None stops counting.
+        """
+        self.counters = counters
+        self.grid.counters = counters
+        for replicate in self.replicates:
+            replicate.streams.set_counters(counters)
+
+    def get_died_out(self) -> np.ndarray:
+        """
+        Checks for every replicate whether its epidemic has died out. See `VirusModel.has_died_out`.
+
+        :return: Whether the values collected for every replicate will remain the same forever.
+        """
+        pending = self.__count_per_replicate(self.pending_agent // self.num_agents) > 0
+        active_positive = ((self.last_result_outcome == POSITIVE) &
+                           (self.last_result_day + RESULT_ACTIVE_DAY >= self.day)).any(axis=1)
+        return ~(pending | self.quarantine.any(axis=1) |
+                 (self.disease_state >= DiseaseState.INFECTED.value).any(axis=1) | active_positive)
+
+    def has_died_out(self) -> bool:
+        """
+        Checks whether the epidemic has died out in every replicate. See `get_died_out`.
+
+        :return: True if the values collected by this model will remain the same forever.
+        """
+        return bool(self.get_died_out().all())
+
+    def do_rooster_step(self, active: np.ndarray) -> None:
+        """
+        Moves all the active agents to wherever their rooster says they should be. See `VirusAgent.do_rooster_step`.
+
+        :param active: The boolean mask of the active agents.
+        """
+        rooster_room = self.rooster[:, self.day_step]
+        next_in_lecture = rooster_room != self.break_room_id
+
+        entering = active & next_in_lecture & (self.room != rooster_room)
+        leaving = active & ~next_in_lecture & self.in_lecture & ~entering
+
+        self.room[entering] = rooster_room[entering]
+        self.set_seats(entering)
+
+        self.room[leaving] = NO_ROOM
+        self.move_to_random_position(leaving)
+
+        self.in_lecture[active] = next_in_lecture[active]
+
+    def move(self, agents: np.ndarray) -> None:
+        """
+        Moves the given agents to a random neighboring position in the break room or the hallway. See `VirusAgent.move`.
+
+        :param agents: The boolean mask of the agents to move.
+        """
+        replicates, agents = np.nonzero(agents)
+        if len(agents) == 0:
+            return
+
+        draws = self.__draw('movement', self.__count_per_replicate(replicates), lambda rand, count: rand.random(count))
+        self.pos_x[replicates, agents], self.pos_y[replicates, agents] = self.grid.pick_break_neighbors(
+            self.pos_x[replicates, agents], self.pos_y[replicates, agents], draws)
+
+    def get_susceptible(self) -> np.ndarray:
+        """
+        Gets the agents that can get infected. See `Virus.is_susceptible`.
+
+        :return: The boolean mask of the susceptible agents.
+        """
+        recovered = ((self.disease_state == DiseaseState.RECOVERED.value) &
+                     (self.day >= self.next_disease_update))
+        return (self.disease_state == DiseaseState.HEALTHY.value) | recovered
+
+    def __get_cells(self, replicates: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        Gets the index of the given cells in the flattened grids of all the replicates.
+
+        :param replicates: The replicates of the cells.
+        :param x: The x-coordinates of the cells.
+        :param y: The y-coordinates of the cells.
+        :return: The index of every cell.
+        """
+        return (replicates * self.grid.width + x) * self.grid.height + y
+
+    def spread_virus(self, infectious: np.ndarray) -> None:
+        """
+        Gives every susceptible agent in range of an infectious agent a chance to get infected. Every infectious agent
+        that can reach the position of a susceptible agent (see `spread_visible`) gets a separate chance of infecting
+        them. See `VirusAgent.handle_contact`.
+
+        :param infectious: The boolean mask of the infectious agents.
+        """
+        replicates, sources = np.nonzero(infectious)
+        if self.counters is not None:
+            self.counters.add(COUNTER_CANDIDATE_PAIRS, len(sources) * len(self.layout.spread_offsets))
+
+        # The cells around all the sources are found at once, with a row per source and a column per offset.
+        source_x, source_y = self.pos_x[replicates, sources], self.pos_y[replicates, sources]
+        visible = self.layout.spread_visible[source_x, source_y]
+        offsets = self.layout.spread_offsets
+        exposed_cells = self.__get_cells(replicates[:, None], source_x[:, None] + offsets[:, 0],
+                                         source_y[:, None] + offsets[:, 1])[visible]
+        exposure = np.bincount(exposed_cells, minlength=self.num_replicates * self.grid.width * self.grid.height)
+
+        # Draw a value for every agent, so every agent always uses the same part of the random stream.
+        draws = self.__draw_all('transmission', lambda rand, count: rand.random(count))
+        replicates, targets = np.nonzero(self.get_susceptible() & ~self.quarantine)
+        attempts = exposure[self.__get_cells(replicates, self.pos_x[replicates, targets],
+                                             self.pos_y[replicates, targets])]
+        exposed = attempts > 0
+        replicates, targets, attempts = replicates[exposed], targets[exposed], attempts[exposed]
+
+        infection_chance = 1 - (1 - self.spread_chance / 100) ** attempts
+        infected = draws[replicates, targets] < infection_chance
+        self.disease_state[replicates[infected], targets[infected]] = DiseaseState.INFECTED.value
+        self.next_disease_update[replicates[infected], targets[infected]] = self.day + DISEASE_PROGRESSION_TO_TESTABLE
+
+    def trace_contacts(self, infectious: np.ndarray) -> None:
+        """
+        Registers the contacts between the infectious agents and all the other agents around them that aren't
+        quarantined or deceased. See `VirusModel.trace_contacts`.
+
+        :param infectious: The boolean mask of the infectious agents.
+        """
+        width, height = self.grid.width, self.grid.height
+        present_replicates, present = np.nonzero(~self.quarantine & (self.disease_state != DiseaseState.DECEASED.value))
+        present_cells = self.__get_cells(present_replicates, self.pos_x[present_replicates, present],
+                                         self.pos_y[present_replicates, present])
+        buckets = get_cell_buckets(present_cells, present, self.num_replicates * width * height)
+
+        # The cells around all the sources are found at once, with a row per offset and a column per source.
+        source_replicates, infectious = np.nonzero(infectious)
+        source_x, source_y = self.pos_x[source_replicates, infectious], self.pos_y[source_replicates, infectious]
+        offsets = self.layout.tracking_offsets
+        target_x, target_y = source_x + offsets[:, :1], source_y + offsets[:, 1:]
+        valid = (target_x >= 0) & (target_x < width) & (target_y >= 0) & (target_y < height)
+        valid[valid] = self.layout.walkable[target_x[valid], target_y[valid]]
+        source_replicates = np.broadcast_to(source_replicates, valid.shape)[valid]
+        infectious = np.broadcast_to(infectious, valid.shape)[valid]
+        cells = self.__get_cells(source_replicates, target_x[valid], target_y[valid])
+
+        # The cells of all the replicates are distinct, so the sources are only paired with agents of their replicate.
+        sources, targets = get_cell_pairs(source_replicates * self.num_agents + infectious, cells, buckets)
+        source_replicates, sources = np.divmod(sources, self.num_agents)
+
+        # Every replicate has its own contact ledger, so split the contacts by the replicate of their source.
+        order = np.argsort(source_replicates, kind='stable')
+        counts = self.__count_per_replicate(source_replicates)
+        ends = np.cumsum(counts)
+        for replicate, start, end in zip(self.replicates, ends - counts, ends):
+            if start < end:
+                selected = order[start:end]
+                replicate.contact_ledger.add_contacts(sources[selected], targets[selected], self.day)
+        if self.counters is not None:
+            # Only the agents that are present are examined, so every examined agent is a contact.
+            self.counters.add(COUNTER_TRACED_NEIGHBORS, len(targets))
+            self.counters.add(COUNTER_CONTACTS, len(targets))
+
+    def step_agents(self) -> None:
+        """
+        Executes a single step for all the agents of all the replicates at once. See `VirusAgent.step`.
+        """
+        profiler = self.profiler
+        if profiler is not None:
+            start = profiler.start()
+
+        # No zombies allowed
+        active = ~self.quarantine & (self.disease_state != DiseaseState.DECEASED.value)
+
+        self.do_rooster_step(active)
+        if profiler is not None:
+            start = profiler.record(PHASE_SEATING, start)
+        self.move(active & ~self.in_lecture)
+        if profiler is not None:
+            start = profiler.record(PHASE_MOVEMENT, start)
+
+        infectious = active & (self.disease_state >= DiseaseState.INFECTIOUS.value)
+        self.spread_virus(infectious)
+        if profiler is not None:
+            start = profiler.record(PHASE_TRANSMISSION, start)
+        if infectious.any() and self.choice_of_measure == 'contact_tracing':
+            self.trace_contacts(infectious)
+            if profiler is not None:
+                profiler.record(PHASE_CONTACT_TRACING, start)
+
+    def step(self) -> None:
+        """
+        Executes a step for the model. See `VirusModel.step`.
+        """
+        profiler = self.profiler
+        if profiler is not None:
+            step_start = start = profiler.start()
+            recorded = profiler.get_total_time()
+
+        self.day_step = self.total_steps % DAY_DURATION
+        self.collect()
+        if profiler is not None:
+            profiler.record(PHASE_COLLECT, start)
+        if self.steps % DAY_DURATION == 0:
+            self.next_day()
+
+        # Skip weekends
+        if self.day % 7 > 4:
+            self.steps += DAY_DURATION
+            if profiler is not None:
+                profiler.record_step(step_start, recorded)
+            if self.counters is not None:
+                self.counters.record_step()
+            return
+
+        self.step_agents()
+        self.steps += 1
+        self.total_steps = self.steps + self.virtual_steps
+        if profiler is not None:
+            profiler.record_step(step_start, recorded)
+        if self.counters is not None:
+            self.counters.record_step()
+
+    def __update_values(self) -> None:
+        """
+        Computes the values of the `MODEL_REPORTERS` for all the replicates at once and stores them in the
+        `Replicate.values` of every replicate.
+        """
+        values = np.stack([reporter(self) for reporter in MODEL_REPORTERS.values()], axis=1)
+        for replicate, row in zip(self.replicates, values):
+            replicate.values = row
+
+    def collect(self) -> None:
+        """
+        Collects the values of the current step for every replicate.
+        """
+        self.__update_values()
+        for replicate in self.replicates:
+            replicate.datacollector.collect(replicate)
+
+    def collect_repeated(self, count: int) -> None:
+        """
+        Collects the values of the current step a number of times for every replicate. See
+        `StreamingDataCollector.collect_repeated`.
+
+        :param count: The number of rows to collect for every replicate.
+        """
+        self.__update_values()
+        for replicate in self.replicates:
+            if isinstance(replicate.datacollector, StreamingDataCollector):
+                replicate.datacollector.collect_repeated(replicate, count)
+            else:
+                for _ in range(count):
+                    replicate.datacollector.collect(replicate)
+
+    def get_model_vars_dataframes(self) -> List[pd.DataFrame]:
+        """
+        Gets the collected data of every replicate. See `DataCollector.get_model_vars_dataframe`.
+
+        :return: The collected data of every replicate, in the order of the replicates.
+        """
+        return [replicate.datacollector.get_model_vars_dataframe() for replicate in self.replicates]
+
+
+def count_states(model: VectorizedVirusModel) -> np.ndarray:
+    """
+    Counts the number of agents in every `DiseaseState` for every replicate.
+
+    :param model: The model to count the states of.
+    :return: The number of agents in every state, with shape (replicates, states), indexed by the value of the state.
+    """
+    offsets = np.arange(model.num_replicates)[:, None] * STATE_COUNT
+    return np.bincount((model.disease_state + offsets).ravel(),
+                       minlength=model.num_replicates * STATE_COUNT).reshape(model.num_replicates, STATE_COUNT)
+
+
+def count_state(state: DiseaseState):
+    """
+    Creates a reporter that counts the number of agents in the given `DiseaseState` for every replicate.
+
+    The reporter is a partial function rather than a closure, so the model can still be pickled (see
+    `virus_model.snapshot`).
+
+    :param state: The `DiseaseState` to count.
+    :return: The reporter function.
+    """
+    return functools.partial(get_state_count, state)
+
+
+def get_state_count(state: DiseaseState, model: VectorizedVirusModel) -> np.ndarray:
+    """
+    Gets the number of agents in a `DiseaseState` for every replicate. See `count_state`.
+
+    :param state: The `DiseaseState` to count.
+    :param model: The model to count the agents of.
+    :return: The number of agents in the state, for every replicate.
+    """
+    return count_states(model)[:, state.value]
+
+
+def count_tests(outcome: str):
+    """
+    Creates a reporter that gets the number of tests with the given outcome for every replicate. See `test_counts`.
+
+    :param outcome: The outcome of the tests to count: 'total', 'pending', 'positive' or 'negative'.
+    :return: The reporter function.
+    """
+    return functools.partial(get_test_count, outcome)
+
+
+def get_test_count(outcome: str, model: VectorizedVirusModel) -> np.ndarray:
+    """
+    Gets the number of tests with an outcome for every replicate. See `count_tests`.
+
+    :param outcome: The outcome of the tests to count: 'total', 'pending', 'positive' or 'negative'.
+    :param model: The model to count the tests of.
+    :return: The number of tests with the outcome, for every replicate.
+    """
+    return model.test_counts[outcome]
+
+
+def get_infection_rate(model: VectorizedVirusModel) -> np.ndarray:
+    """
+    Gets the number of infected agents (in any stage of the disease) for every replicate.
+
+    :param model: The model to count the agents of.
+    :return: The number of infected agents, for every replicate.
+    """
+    return np.count_nonzero(model.disease_state >= DiseaseState.INFECTED.value, axis=1)
+
+
+def get_quarantined_count(model: VectorizedVirusModel) -> np.ndarray:
+    """
+    Gets the number of quarantined agents for every replicate.
+
+    :param model: The model to count the agents of.
+    :return: The number of quarantined agents, for every replicate.
+    """
+    return np.count_nonzero(model.quarantine, axis=1)
+
+
+def get_quarantined_infected(model: VectorizedVirusModel) -> np.ndarray:
+    """
+    Gets the number of quarantined agents that are infected for every replicate.
+
+    :param model: The model to count the agents of.
+    :return: The number of quarantined, infected agents, for every replicate.
+    """
+    return np.count_nonzero(model.quarantine & (model.disease_state >= DiseaseState.INFECTED.value), axis=1)
+
+
+def get_quarantined_healthy(model: VectorizedVirusModel) -> np.ndarray:
+    """
+    Gets the number of quarantined agents that aren't infected for every replicate.
+
+    :param model: The model to count the agents of.
+    :return: The number of quarantined, healthy agents, for every replicate.
+    """
+    return np.count_nonzero(model.quarantine & (model.disease_state < DiseaseState.INFECTED.value), axis=1)
+
+
+def get_notquarantined_infected(model: VectorizedVirusModel) -> np.ndarray:
+    """
+    Gets the number of infected agents that aren't quarantined for every replicate.
+
+    :param model: The model to count the agents of.
+    :return: The number of infected agents that aren't quarantined, for every replicate.
+    """
+    return np.count_nonzero(~model.quarantine & (model.disease_state >= DiseaseState.INFECTED.value), axis=1)
+
+
+MODEL_REPORTERS = {
+    "infected": get_infection_rate, "deaths": count_state(DiseaseState.DECEASED),
+    "quarantined": get_quarantined_count,
+    "healthy": count_state(DiseaseState.HEALTHY), "just infected": count_state(DiseaseState.INFECTED),
+    "testable": count_state(DiseaseState.TESTABLE),
+    "infectious": count_state(DiseaseState.INFECTIOUS), "symptomatic": count_state(DiseaseState.SYMPTOMATIC),
+    "recovered": count_state(DiseaseState.RECOVERED),
+    "quarantined: infected": get_quarantined_infected,
+    "quarantined: healthy": get_quarantined_healthy,
+    "not quarantined: infected": get_notquarantined_infected,
+    "tested total": count_tests("total"),
+    "tested pending": count_tests("pending"),
+    "tested positive": count_tests("positive"),
+    "tested negative": count_tests("negative"),
+}
+"""
+The reporters of the `VectorizedVirusModel`. Every reporter computes the value of a column for all the replicates at
+once. The values of every replicate are collected by its own DataCollector, see `Replicate`. The columns are identical
+to those of `VirusModel`.
+"""
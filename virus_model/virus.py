@@ -1,6 +1,7 @@
 from enum import Enum
 from functools import total_ordering
 from random import Random
+from typing import Callable, Optional
 
 DISEASE_PROGRESSION_TO_TESTABLE = 4
 """
@@ -38,17 +39,21 @@ The lethality of the virus, expressed as a percentage (0 - 100) of agents that w
 
 
 class Virus:
-    def __init__(self, rand: Random, starting_state: 'DiseaseState'):
+    def __init__(self, rand: Random, starting_state: 'DiseaseState',
+                 state_listener: Optional[Callable[['DiseaseState', 'DiseaseState'], None]] = None):
         """
         Create a new Virus object for an agent. Note that this doesn't immediately mean that the agent is infected.
         It only means that they can be infected.
 
         :param rand: The random instance to use for randomization.
         :param starting_state: The `DiseaseState` this Virus starts with.
+        :param state_listener: An optional function that is called with the old and the new `DiseaseState` whenever
+        the state of the disease changes.
         """
         self.random = rand
+        self.state_listener = state_listener
         self.disease_state = starting_state
-        self.__next_disease_update = self.__get_next_update()
+        self.__next_disease_update = self.__get_next_update(starting_state)
         """
         Describes the day on which the next update to the disease stage will be applied.
         """
@@ -110,9 +115,8 @@ class Virus:
 
         if self.disease_state is DiseaseState.SYMPTOMATIC:
             if self.random.randrange(0, 100) < DISEASE_LETHALITY:
-                self.disease_state = DiseaseState.DECEASED
+                self.__set_state(DiseaseState.DECEASED)
             else:
-                self.disease_state = DiseaseState.HEALTHY
                 self.__set_stage(DiseaseState.RECOVERED, day)
         else:
             self.__set_stage(self.disease_state.next(), day)
@@ -124,47 +128,76 @@ class Virus:
         :param new_state: The new state of the disease.
         :param day: The day on which this is applied.
         """
+        # The day of the next update is set first, so the `state_listener` can already use it.
+        self.__next_disease_update = day + self.__get_next_update(new_state)
+        self.__set_state(new_state)
+
+    def __set_state(self, new_state: 'DiseaseState') -> None:
+        """
+        Updates the current state of the disease and notifies the `state_listener`, if there is one.
+
+        :param new_state: The new state of the disease.
+        """
+        old_state = self.disease_state
         self.disease_state = new_state
-        self.__next_disease_update = day + self.__get_next_update()
+        if self.state_listener is not None and old_state is not new_state:
+            self.state_listener(old_state, new_state)
 
-    def __get_next_update(self) -> int:
+    def __get_next_update(self, state: 'DiseaseState') -> int:
         """
-        Gets the number of days between the current state and the next state.
+        Gets the number of days between a state and the next state.
 
         If the amount is considered infinite, 9999 will be returned.
 
-        :return: The number of days between the current state and the next state.
+        :param state: The state to get the number of days for.
+        :return: The number of days between the given state and the next state.
         """
-        if self.disease_state < DiseaseState.INFECTED:
+        if state < DiseaseState.INFECTED:
             return 9999
 
-        if self.disease_state is DiseaseState.INFECTED:
+        if state is DiseaseState.INFECTED:
             return DISEASE_PROGRESSION_TO_TESTABLE
-        elif self.disease_state is DiseaseState.TESTABLE:
+        elif state is DiseaseState.TESTABLE:
             return DISEASE_PROGRESSION_TO_INFECTIOUS
-        elif self.disease_state is DiseaseState.INFECTIOUS:
+        elif state is DiseaseState.INFECTIOUS:
             return DISEASE_PROGRESSION_TO_SYMPTOMATIC
-        elif self.disease_state is DiseaseState.SYMPTOMATIC:
+        elif state is DiseaseState.SYMPTOMATIC:
             return DISEASE_PROGRESSION_TO_OUTCOME
-        elif self.disease_state is DiseaseState.RECOVERED:
+        elif state is DiseaseState.RECOVERED:
             return RECOVERY_COOLDOWN
         else:
             return 9999
 
-    def infect(self, infection_chance: int, day: int) -> None:
+    def get_next_update_day(self) -> int:
         """
-        Attempts to infect the agent.
+        Gets the day on which the disease advances to its next stage. Only infected agents (see `is_infected`) advance.
 
-        :param infection_chance: The chance of the infection being spread.
-        :param day: The day on which the infection takes place.
+        :return: The day of the next update to the stage of the disease.
+        """
+        return self.__next_disease_update
+
+    def is_susceptible(self, day: int) -> bool:
+        """
+        Checks if the owner of this Virus can get infected.
+
+        :param day: The current day.
+        :return: True if the owner of this Virus can get infected on the given day.
         """
         if self.disease_state >= DiseaseState.INFECTED or self.disease_state is DiseaseState.DECEASED:
-            return
+            return False
 
         if self.disease_state == DiseaseState.RECOVERED and day < self.__next_disease_update:
-            return
+            return False
+        return True
 
-        if self.random.randrange(0, 100) < infection_chance:
+    def set_infected(self, day: int) -> None:
+        """
+        Infects the agent without any further chance involved. The chance of the infection being spread is applied
+        beforehand, e.g. by the `TransmissionKernel`.
+
+        :param day: The day on which the infection takes place.
+        """
+        if self.is_susceptible(day):
             self.__set_stage(DiseaseState.INFECTED, day)
 
 
@@ -1,7 +1,7 @@
 from enum import Enum
 from random import Random
 
-from typing import List
+from typing import List, Optional
 
 from virus_model.virus import Virus
 
@@ -73,7 +73,12 @@ class TestStatistics:
     """
     This class keeps track of all the tests that have been performed for the entire duration of the model.
     """
-    def __init__(self):
+    def __init__(self, parent: Optional['TestStatistics'] = None):
+        """
+        :param parent: Optional statistics that every test result is forwarded to as well. This can be used to keep
+        track of the tests of all agents at once.
+        """
+        self.parent = parent
         self.__total = 0
         self.__positive = 0
         self.__negative = 0
@@ -96,6 +101,9 @@ class TestStatistics:
             raise ValueError("Trying to add test statistic for untested result. This is invalid.")
         self.__pending -= 1
 
+        if self.parent is not None:
+            self.parent.add_test_result(outcome)
+
     def register_new_result(self) -> None:
         """
         Registers a new result. Registering simply means added the result as pending.
@@ -103,6 +111,9 @@ class TestStatistics:
         self.__pending += 1
         self.__total += 1
 
+        if self.parent is not None:
+            self.parent.register_new_result()
+
     def get_pending_count(self) -> int:
         """
         Gets the number of tests whose results are not yet available.
@@ -139,20 +150,23 @@ class TestStatistics:
 
 
 class VirusTest:
-    def __init__(self, result_delay: int, random: Random, false_negative_rate: int = 0, false_positive_rate: int = 0):
+    def __init__(self, result_delay: int, random: Random, false_negative_rate: int = 0, false_positive_rate: int = 0,
+                 parent_stats: Optional[TestStatistics] = None):
         """
         Creates a new VirusTest object. This object allows you to create new tests and obtain their results.
 
         :param result_delay: The number of days between performing a test and its result being available.
         :param false_negative_rate: The rate of false negatives. 0 (disabled) by default.
         :param false_positive_rate: The rate of false positives. 0 (disabled) by default.
+        :param parent_stats: Optional statistics that the results of the tests are forwarded to as well.
+        See `TestStatistics`.
         """
         self.result_delay = result_delay
         self.random = random
         self.false_negative_rate = false_negative_rate
         self.false_positive_rate = false_positive_rate
         self.__test_queue: List[TestResult] = []
-        self.test_stats = TestStatistics()
+        self.test_stats = TestStatistics(parent_stats)
 
     def new_day(self, day: int) -> None:
         """
@@ -234,6 +248,17 @@ class VirusTest:
         """
         return len(self.__test_queue)
 
+    def has_positive_result(self, day: int) -> bool:
+        """
+        Checks whether any of the queued tests has a positive outcome that is active on this day or will be on a later
+        day.
+
+        :param day: The number of the day.
+        :return: True if a positive result is or will become active on or after this day.
+        """
+        return any(test_result.get_raw_result() == TestOutcome.POSITIVE and
+                   test_result.get_result_day() + RESULT_ACTIVE_DAY >= day for test_result in self.__test_queue)
+
     def get_test_stats(self) -> TestStatistics:
         """
         Gets the statistics of the tests performed so far.
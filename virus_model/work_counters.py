@@ -0,0 +1,218 @@
+"""
+Counts how much work the model does in every step, e.g. the number of pairs of agents that are compared, the number of
+line-of-sight checks and the number of random values drawn from every stream.
+
+Unlike wall time, these counts don't depend on the machine or its load, so scaling problems (e.g. work that grows
+quadratically with the number of agents) show up in them without a profiler. Counting is opt-in: a model only counts
+its work when counters are attached to it using `set_counters`. When they are not (the default), the only cost is a
+check of an attribute in the places where work is counted.
+"""
+import random
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from virus_model.random_streams import RANDOM_STREAMS
+
+COUNTER_CANDIDATE_PAIRS = "candidate pairs"
+"""
+The pairs of an infectious agent and another agent (or position) whose distance is checked to find out whether the
+virus can spread between them. See `TransmissionKernel.find_pairs` and `VectorizedVirusModel.spread_virus`.
+"""
+
+COUNTER_PATH_CHECKS = "path checks"
+"""
+The checks whether the line between two positions is obstructed by a wall. See `RoomGrid.is_path_obstructed`.
+"""
+
+COUNTER_PATH_WALKS = "path walks"
+"""
+The path checks that couldn't be answered by the occlusion index, so the line between the two positions was walked.
+"""
+
+COUNTER_PATH_CELLS = "path cells"
+"""
+The cells visited while walking the lines of `COUNTER_PATH_WALKS`.
+"""
+
+COUNTER_TRACED_NEIGHBORS = "traced neighbors"
+"""
+The agents around the infectious agents that were examined by contact tracing. See `VirusModel.trace_contacts`.
+"""
+
+COUNTER_CONTACTS = "contacts added"
+"""
+The contacts registered in the contact ledger. See `ContactLedger.add_contact`.
+"""
+
+COUNTER_POSITION_PICKS = "position picks"
+"""
+The random positions picked for agents that leave a lecture room. See `RoomGrid.get_random_pos`.
+"""
+
+COUNTER_SEAT_PICKS = "seat picks"
+"""
+The random seats picked for agents that enter a lecture room. See `LectureRoom.take_random_seat`.
+"""
+
+COUNTERS = [COUNTER_CANDIDATE_PAIRS, COUNTER_PATH_CHECKS, COUNTER_PATH_WALKS, COUNTER_PATH_CELLS,
+            COUNTER_TRACED_NEIGHBORS, COUNTER_CONTACTS, COUNTER_POSITION_PICKS, COUNTER_SEAT_PICKS]
+"""
+All the counters of the work of the model, in the order they are reported in. The random draws of every stream are
+counted as well, see `get_draw_counter`.
+"""
+
+
+def get_draw_counter(stream: str) -> str:
+    """
+    Gets the name of the counter of the random values drawn from a stream. Every call of `random` or `getrandbits` of
+    the `random.Random` of the stream counts as a draw, so the retries of `randrange` are included. For the NumPy
+    generator of the stream, every value drawn counts.
+
+    :param stream: The name of the stream. See `RANDOM_STREAMS`.
+    :return: The name of the counter.
+    """
+    return "{} draws".format(stream)
+
+
+ALL_COUNTERS = COUNTERS + [get_draw_counter(stream) for stream in RANDOM_STREAMS]
+"""
+All the counters, including the draws of every random stream.
+"""
+
+
+class CountingGenerator:
+    """
+    Wraps a NumPy `Generator` and counts every value drawn from it. See `WorkCounters.count_generator_draws`.
+    """
+
+    def __init__(self, generator: np.random.Generator, counters: 'WorkCounters', counter: str):
+        """
+        :param generator: The generator to draw the values from.
+        :param counters: The counters to add the draws to.
+        :param counter: The name of the counter of the draws.
+        """
+        self.generator = generator
+        self.counters = counters
+        self.counter = counter
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        method = getattr(self.generator, name)
+
+        def draw(*args, **kwargs):
+            values = method(*args, **kwargs)
+            self.counters.add(self.counter, np.size(values))
+            return values
+        return draw
+
+
+class WorkCounters:
+    """
+    Accumulates the counts of the current step and keeps the counts of all the finished steps.
+    """
+
+    def __init__(self, first_step: int = 0):
+        """
+        :param first_step: The number of the first step that is counted, e.g. when continuing from a snapshot.
+        """
+        self.first_step = first_step
+
+        self.__current: Dict[str, int] = dict.fromkeys(ALL_COUNTERS, 0)
+        """
+        The counts of the current step.
+        """
+
+        self.__steps: List[Dict[str, int]] = []
+        """
+        The counts of every finished step.
+        """
+
+    def add(self, counter: str, amount: int = 1) -> None:
+        """
+        Adds to a counter of the current step.
+
+        :param counter: The name of the counter. See `ALL_COUNTERS`.
+        :param amount: The amount of work to add.
+        """
+        self.__current[counter] += int(amount)
+
+    def count_random_draws(self, stream: str, rand: random.Random) -> None:
+        """
+        Counts the values drawn from a `random.Random` from now on. The random values themselves are not affected.
+        See `RandomStreams.set_counters`.
+
+        :param stream: The name of the stream of the random object. See `get_draw_counter`.
+        :param rand: The random object. Its `random` and `getrandbits` methods are replaced by counting ones, which
+        are also used by all its other methods (e.g. `randrange`).
+        """
+        counter = get_draw_counter(stream)
+
+        def draw_random() -> float:
+            self.add(counter)
+            return random.Random.random(rand)
+
+        def draw_bits(k: int) -> int:
+            self.add(counter)
+            return random.Random.getrandbits(rand, k)
+
+        rand.random = draw_random
+        rand.getrandbits = draw_bits
+
+    def count_generator_draws(self, stream: str, generator: np.random.Generator) -> CountingGenerator:
+        """
+        Wraps a NumPy generator, so the values drawn from it are counted. See `RandomStreams.get_generator`.
+
+        :param stream: The name of the stream of the generator. See `get_draw_counter`.
+        :param generator: The generator to wrap.
+        :return: A generator that draws the same values as the given one, but counts them.
+        """
+        return CountingGenerator(generator, self, get_draw_counter(stream))
+
+    def record_step(self) -> None:
+        """
+        Finishes the current step. The counts of the next step start at zero.
+        """
+        self.__steps.append(self.__current)
+        self.__current = dict.fromkeys(ALL_COUNTERS, 0)
+
+    def get_steps(self) -> List[Dict[str, int]]:
+        """
+        Gets the counts of every finished step.
+
+        :return: The counts by counter, for every step in order.
+        """
+        return [dict(counts) for counts in self.__steps]
+
+    def get_totals(self) -> Dict[str, int]:
+        """
+        Gets the counts of all the finished steps combined.
+
+        :return: The total count of every counter.
+        """
+        return {counter: sum(counts[counter] for counts in self.__steps) for counter in ALL_COUNTERS}
+
+    def format_summary(self) -> str:
+        """
+        Formats the totals of all the counters as a table.
+
+        :return: The table, with the total, the mean per step and the maximum in a single step of every counter.
+        """
+        steps = max(len(self.__steps), 1)
+        lines = ["{:<20} {:>14} {:>14} {:>12}".format("counter", "total", "per step", "max")]
+        for counter, total in self.get_totals().items():
+            maximum = max((counts[counter] for counts in self.__steps), default=0)
+            lines.append("{:<20} {:>14} {:>14.1f} {:>12}".format(counter, total, total / steps, maximum))
+        lines.append("{:<20} {:>14}".format("steps", len(self.__steps)))
+        return "\n".join(lines)
+
+    def write_csv(self, file: str) -> None:
+        """
+        Writes the counts of every step to a CSV file, with a row for every step and a column for every counter.
+
+        :param file: The file to write the counts to.
+        """
+        with open(file, "w") as output:
+            output.write("step,{}\n".format(",".join(ALL_COUNTERS)))
+            for idx, counts in enumerate(self.__steps):
+                output.write("{},{}\n".format(self.first_step + idx,
+                                              ",".join(str(counts[counter]) for counter in ALL_COUNTERS)))